@@ -0,0 +1,246 @@
+"""
+Download und Auswertung von Aktivitäts-Streams (Sekundenwerte).
+
+Streams (Zeit, Leistung, Herzfrequenz, Kadenz) werden pro Aktivität parallel
+über /activity/<id>/streams geladen und als typisierte NumPy-Arrays
+komprimiert abgelegt (<streams_dir>/<id>.npz). Bereits vorhandene Dateien
+werden nicht erneut geladen.
+
+Auswertung (vektorisiert):
+- Zeit in Leistungs-/HF-Zonen (Zonen relativ zu FTP bzw. LTHR)
+- beste mittlere Leistung über feste Dauern (Power-Curve)
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from intervals_client import DEFAULT_MAX_WORKERS, IntervalsClient
+
+STREAM_TYPES = ("time", "watts", "heartrate", "cadence")
+STREAM_DTYPES = {
+    "time": np.int32,
+    "watts": np.float32,
+    "heartrate": np.float32,
+    "cadence": np.float32,
+}
+
+# Obergrenzen der Zonen relativ zu FTP (Coggan Z1–Z6, Z7 darüber)
+POWER_ZONE_PCT = (0.55, 0.75, 0.90, 1.05, 1.20, 1.50)
+# Obergrenzen der HF-Zonen relativ zur LTHR (Friel Z1–Z5a, darüber Z5b/c)
+HR_ZONE_PCT = (0.81, 0.89, 0.94, 1.00, 1.03, 1.06)
+
+# Dauern der Power-Curve in Sekunden
+POWER_CURVE_DURATIONS = (5, 15, 30, 60, 300, 600, 1200, 3600)
+
+# Lücken zwischen zwei Samples werden höchstens so lange gezählt (Pausen)
+MAX_SAMPLE_GAP_S = 5
+
+
+def stream_path(streams_dir: str, activity_id) -> Path:
+    return Path(streams_dir) / f"{activity_id}.npz"
+
+
+def parse_streams(data, types=STREAM_TYPES) -> dict[str, np.ndarray]:
+    """
+    API-Antwort (Liste von {"type", "data"}) → Dict typ → Array.
+    Fehlende Werte (None) werden bei Gleitkomma-Streams zu NaN.
+    """
+    out = {}
+    for stream in data or []:
+        kind = stream.get("type")
+        values = stream.get("data")
+        if kind not in types or not values:
+            continue
+        # None → NaN beim Umwandeln nach float64, danach kompakter Zieltyp
+        arr = np.array(values, dtype=np.float64)
+        dtype = STREAM_DTYPES.get(kind, np.float32)
+        if not np.issubdtype(dtype, np.floating):
+            arr = np.nan_to_num(arr)
+        out[kind] = arr.astype(dtype)
+    return out
+
+
+def save_streams(path: Path, streams: dict[str, np.ndarray]):
+    """
+    Atomar schreiben; auch leere Ergebnisse werden gespeichert, damit die
+    Aktivität beim nächsten Lauf übersprungen wird.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **streams)
+    os.replace(tmp, path)
+
+
+def load_streams(path: Path) -> dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def _download_one(client: IntervalsClient, activity_id, path: Path, types) -> int:
+    url = f"{client.base_url}/activity/{activity_id}/streams"
+    resp = client.get(url, params={"types": ",".join(types)})
+    if resp.status_code == 404:
+        streams = {}
+    else:
+        resp.raise_for_status()
+        streams = parse_streams(resp.json(), types)
+    save_streams(path, streams)
+    return sum(a.nbytes for a in streams.values())
+
+
+def download_streams(
+    client: IntervalsClient,
+    activity_ids,
+    streams_dir: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    types=STREAM_TYPES,
+    on_result=None,
+) -> dict:
+    """
+    Lädt die Streams aller noch nicht gespeicherten Aktivitäten parallel.
+    Dekodieren und Speichern laufen in den Worker-Threads.
+    Rückgabe: {"downloaded", "skipped", "failed": [(id, Fehler), ...], "bytes"}.
+    """
+    Path(streams_dir).mkdir(parents=True, exist_ok=True)
+    todo = []
+    skipped = 0
+    for activity_id in dict.fromkeys(a for a in activity_ids if a is not None):
+        path = stream_path(streams_dir, activity_id)
+        if path.exists():
+            skipped += 1
+        else:
+            todo.append((activity_id, path))
+
+    summary = {"downloaded": 0, "skipped": skipped, "failed": [], "bytes": 0}
+    if not todo:
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(_download_one, client, activity_id, path, types): activity_id
+            for activity_id, path in todo
+        }
+        for fut in as_completed(futures):
+            activity_id = futures[fut]
+            try:
+                summary["bytes"] += fut.result()
+                summary["downloaded"] += 1
+                error = None
+            except (requests.RequestException, ValueError, OSError) as e:
+                error = str(e)
+                summary["failed"].append((activity_id, error))
+            if on_result:
+                on_result(activity_id, error)
+    return summary
+
+
+def sample_durations(time: np.ndarray) -> np.ndarray:
+    """
+    Dauer pro Sample in Sekunden (Abstand zum nächsten, Pausen gekappt).
+    """
+    if len(time) == 0:
+        return np.zeros(0)
+    gaps = np.diff(time.astype(np.float64), append=float(time[-1]) + 1.0)
+    return np.clip(gaps, 0.0, MAX_SAMPLE_GAP_S)
+
+
+def time_in_zones(values: np.ndarray, upper_bounds, durations: np.ndarray) -> list[float]:
+    """
+    Sekunden pro Zone; Zone i umfasst Werte < upper_bounds[i],
+    die letzte Zone alles darüber. NaN-Werte zählen nicht.
+    """
+    valid = ~np.isnan(values)
+    zone = np.searchsorted(np.asarray(upper_bounds, dtype=float), values[valid], side="right")
+    seconds = np.bincount(
+        zone, weights=durations[valid], minlength=len(upper_bounds) + 1)
+    return [round(float(s), 1) for s in seconds]
+
+
+def resample_1hz(time: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Legt Werte auf ein 1-Sekunden-Raster (Lücken = 0 W, wie bei Pausen).
+    """
+    out = np.zeros(int(time[-1]) + 1 if len(time) else 0)
+    out[time.astype(np.int64)] = np.nan_to_num(values)
+    return out
+
+
+def power_curve(watts_1hz: np.ndarray, durations=POWER_CURVE_DURATIONS) -> dict[str, float]:
+    """
+    Beste mittlere Leistung pro Dauer über kumulative Summen.
+    """
+    csum = np.concatenate([[0.0], np.cumsum(watts_1hz)])
+    out = {}
+    for d in durations:
+        if d > len(watts_1hz):
+            break
+        out[str(d)] = round(float((csum[d:] - csum[:-d]).max() / d), 1)
+    return out
+
+
+def stream_metrics(
+    streams: dict[str, np.ndarray],
+    ftp: float | None = None,
+    lthr: float | None = None,
+) -> dict:
+    """
+    Kennzahlen einer Aktivität aus ihren Streams.
+    """
+    time = streams.get("time")
+    if time is None or not len(time):
+        return {}
+    durations = sample_durations(time)
+    out: dict = {"duration_s": int(time[-1] - time[0]) + 1}
+
+    watts = streams.get("watts")
+    if watts is not None and len(watts) == len(time):
+        if ftp:
+            out["power_zones_s"] = time_in_zones(
+                watts, [ftp * p for p in POWER_ZONE_PCT], durations)
+        out["power_curve"] = power_curve(resample_1hz(time, watts))
+
+    hr = streams.get("heartrate")
+    if hr is not None and len(hr) == len(time) and lthr:
+        out["hr_zones_s"] = time_in_zones(
+            hr, [lthr * p for p in HR_ZONE_PCT], durations)
+
+    cadence = streams.get("cadence")
+    if cadence is not None and len(cadence) == len(time):
+        pedaling = cadence[cadence > 0]
+        if len(pedaling):
+            out["avg_cadence"] = round(float(np.nanmean(pedaling)), 1)
+    return out
+
+
+def summarize_streams(
+    streams_dir: str,
+    activity_ids,
+    ftp: float | None = None,
+    lthr: float | None = None,
+) -> dict:
+    """
+    Kennzahlen pro Aktivität plus beste Power-Curve über alle Aktivitäten.
+    """
+    activities = {}
+    best: dict[str, float] = {}
+    for activity_id in dict.fromkeys(a for a in activity_ids if a is not None):
+        path = stream_path(streams_dir, activity_id)
+        if not path.exists():
+            continue
+        metrics = stream_metrics(load_streams(path), ftp, lthr)
+        if not metrics:
+            continue
+        activities[str(activity_id)] = metrics
+        for d, w in metrics.get("power_curve", {}).items():
+            best[d] = max(best.get(d, 0.0), w)
+    return {"ftp": ftp, "lthr": lthr, "power_curve": best, "activities": activities}
+
+
+def write_streams_summary(summary: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
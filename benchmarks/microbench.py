@@ -0,0 +1,461 @@
+"""
+Microbenchmarks für die reinen Hot-Path-Funktionen (ohne Netzwerk).
+
+Ein Generator erzeugt synthetische Workouts, Events, API-Aktivitäten und
+Wellness-Daten (10k bis 1M Datensätze, deterministisch über den Seed).
+Jede Funktion wird isoliert gemessen:
+
+- Durchsatz: beste von --repeat Messungen (Datensätze pro Sekunde) und
+  relativ zu einer festen Referenzlast, die abwechselnd mit der Funktion
+  gemessen wird (Median der Verhältnisse, dazu deren Streuung als "noise")
+- Allokationen: Peak und nach dem Lauf noch belegter Speicher
+  (tracemalloc, separater Lauf, damit die Zeitmessung unverfälscht bleibt)
+
+Mit --save-baseline werden die Durchsätze gespeichert; spätere Läufe
+vergleichen die relativen Durchsätze dagegen und melden Funktionen, die
+mehr als --tolerance (mindestens aber die gemessene Streuung) langsamer
+sind. Nur mit --check endet der Lauf dann mit Exit-Code 1. Baselines sind
+maschinenabhängig – pro Rechner einmal erzeugen.
+
+    python benchmarks/microbench.py --sizes 10000,100000 --save-baseline
+    python benchmarks/microbench.py --sizes 10000,100000 --check
+    python benchmarks/microbench.py --sizes 1000000 --only build_event_payload
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_intervals_server import synthetic_activities, synthetic_wellness  # noqa: E402
+from run_benchmarks import _int_list, load_modules  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / "microbench_baseline.json"
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_REPEAT = 7
+# Kurze Funktionen werden pro Messung so oft wiederholt, dass sie mindestens
+# so lange laufen – sonst dominiert das Rauschen des Timers/Schedulers
+MIN_SAMPLE_S = 0.2
+CALIBRATION_OPS = 20_000
+START_DATE = datetime.date(2000, 1, 1)
+
+DURATIONS = ("30s", "2m", "3m", "5m", "8m", "10m", "12m", "15m", "20m", "30m", "45m", "1h", "1h30m", "2h")
+ZONES = ("Z1", "Z2", "Z3", "SS", "Z4", "Z5", "Z6")
+CADENCES = ("Free", "85rpm", "90rpm", "90-100rpm", "100rpm")
+SPORTS = ("Ride", "Ride", "Ride", "Run", "Strength", "VirtualRow")
+
+
+def _step(rnd: random.Random, intensity: str) -> dict:
+    return {
+        "duration": rnd.choice(DURATIONS),
+        "zone": rnd.choice(ZONES),
+        "cadence": rnd.choice(CADENCES),
+        "intensity": intensity,
+    }
+
+
+def synthetic_workouts(n: int, seed: int = 0) -> list[dict]:
+    """
+    n Plan-Workouts ab START_DATE (ca. 1,5 pro Tag) in allen Step-Formaten:
+    Dicts, Wiederholungsblöcke, Kurzform-Strings und Workouts ohne Steps.
+    """
+    rnd = random.Random(seed)
+    workouts = []
+    for i in range(n):
+        day = START_DATE + datetime.timedelta(days=i * 2 // 3)
+        kind = rnd.random()
+        workout = {
+            "date": day.isoformat(),
+            "plan_id": f"MB-{day.isoformat()}-{i}",
+            "name": f"Workout {i % 97}",
+            "type": rnd.choice(SPORTS),
+            "description": "Synthetisches Workout" if kind < 0.5 else "",
+        }
+        if kind < 0.4:
+            workout["steps"] = [
+                {**_step(rnd, "warmup"), "ramp": True},
+                {"repeat": rnd.randint(2, 6), "steps": [_step(rnd, "active"), _step(rnd, "recovery")]},
+                _step(rnd, "cooldown"),
+            ]
+        elif kind < 0.8:
+            reps = rnd.randint(2, 8)
+            workout["steps"] = [
+                f"{rnd.choice(DURATIONS)} ramp Z1 Free intensity=warmup",
+                f"{reps}x [{rnd.choice(DURATIONS)} {rnd.choice(ZONES)} {rnd.choice(CADENCES)} "
+                f"intensity=active, {rnd.choice(DURATIONS)} Z1 Free intensity=recovery]",
+                f"{rnd.choice(DURATIONS)} Z1 Free intensity=cooldown",
+            ]
+        else:
+            workout["moving_time"] = rnd.randint(20, 180) * 60
+        workouts.append(workout)
+    return workouts
+
+
+def synthetic_events(upload, workouts: list[dict], seed: int = 0) -> list[dict]:
+    """
+    Events im Format der /events-API zu den Workouts (PLAN-ID- und
+    Hash-Marker wie beim Upload); jedes zehnte Event ist manuell angelegt
+    und hat keine PLAN-ID.
+    """
+    rnd = random.Random(seed)
+    events = []
+    for i, w in enumerate(workouts):
+        body = f"{w.get('description') or 'Workout'}\n- 10m Z1 Free intensity=warmup\n- 20m Z2 Free"
+        if i % 10 == 9:
+            description = body
+        else:
+            marker = f"{upload.PLAN_MARKER_PREFIX}{w['plan_id']}{upload.PLAN_MARKER_SUFFIX}"
+            description = upload.add_hash_marker(f"{marker}\n{body}", w["plan_id"], f"{rnd.getrandbits(64):016x}")
+        events.append({
+            "id": 10_000_000 + i,
+            "start_date_local": f"{w['date']}T17:00:00",
+            "category": "WORKOUT",
+            "name": w["name"],
+            "type": "Ride",
+            "description": description,
+        })
+    return events
+
+
+def synthetic_api_activities(n: int, per_day: float = 1.2, seed: int = 0) -> list[dict]:
+    """
+    n Aktivitäten im Format der /activities-API (wie der Mock-Server).
+    """
+    out = []
+    day = START_DATE
+    while len(out) < n:
+        out.extend(synthetic_activities(day, per_day, seed))
+        day += datetime.timedelta(days=1)
+    return out[:n]
+
+
+# Eingaben, die eine Funktion braucht (nur diese werden erzeugt)
+NEEDS = {
+    "convert_duration": ("durations",),
+    "build_description_with_steps": ("descriptions",),
+    "build_event_payload": ("workouts",),
+    "index_events_by_plan_id": ("events",),
+    "combine_coach_data": ("activities", "wellness", "range"),
+    "project_activities": ("raw_activities", "range"),
+}
+
+
+def prepare(fetch, upload, n: int, seed: int, needs: set) -> dict:
+    """
+    Eingaben für Größe n (wird nicht mitgemessen). Nur die Schlüssel aus
+    `needs` werden erzeugt, damit auch 1M Datensätze in den Speicher passen.
+    """
+    data = {}
+    if needs & {"workouts", "descriptions", "events"}:
+        workouts = synthetic_workouts(n, seed)
+        if "workouts" in needs:
+            data["workouts"] = workouts
+        if "descriptions" in needs:
+            data["descriptions"] = [
+                (w["plan_id"], w.get("description"), upload.compile_steps(w.get("steps")))
+                for w in workouts
+            ]
+        if "events" in needs:
+            data["events"] = synthetic_events(upload, workouts, seed)
+        del workouts
+    if "durations" in needs:
+        rnd = random.Random(seed)
+        data["durations"] = [rnd.choice(DURATIONS) for _ in range(n)]
+    if needs & {"raw_activities", "activities", "wellness", "range"}:
+        raw_activities = synthetic_api_activities(n, seed=seed)
+        first = START_DATE
+        last = datetime.date.fromisoformat(raw_activities[-1]["start_date_local"][:10])
+        data["range"] = (first, last)
+        if "activities" in needs:
+            data["activities"] = list(fetch.project_activities(raw_activities, first, last))
+        if "raw_activities" in needs:
+            data["raw_activities"] = raw_activities
+        del raw_activities
+        if "wellness" in needs:
+            wellness = {}
+            day = first
+            while day <= last:
+                wellness[day.isoformat()] = fetch.extract_wellness(synthetic_wellness(day, seed))
+                day += datetime.timedelta(days=1)
+            data["wellness"] = wellness
+    return data
+
+
+def benchmarks(fetch, upload) -> dict:
+    """
+    Name → (Funktion über die vorbereiteten Daten, Anzahl Datensätze).
+    """
+    return {
+        "convert_duration": (
+            lambda d: [upload.convert_duration(s) for s in d["durations"]],
+            lambda d: len(d["durations"]),
+        ),
+        "build_description_with_steps": (
+            lambda d: [upload.build_description_with_steps(*args) for args in d["descriptions"]],
+            lambda d: len(d["descriptions"]),
+        ),
+        "build_event_payload": (
+            lambda d: [upload.build_event_payload(w) for w in d["workouts"]],
+            lambda d: len(d["workouts"]),
+        ),
+        "index_events_by_plan_id": (
+            lambda d: upload.index_events_by_plan_id_from_description(d["events"]),
+            lambda d: len(d["events"]),
+        ),
+        "combine_coach_data": (
+            lambda d: fetch.combine_coach_data(d["activities"], d["wellness"], *d["range"]),
+            lambda d: len(d["activities"]),
+        ),
+        "project_activities": (
+            lambda d: list(fetch.project_activities(d["raw_activities"], *d["range"])),
+            lambda d: len(d["raw_activities"]),
+        ),
+    }
+
+
+def calibration(_data=None):
+    """
+    Feste Referenzlast (Dicts, Strings, JSON) als Maß für die momentane
+    Geschwindigkeit des Rechners.
+    """
+    out = []
+    for i in range(CALIBRATION_OPS):
+        record = {"id": i, "name": f"Workout {i}", "date": "2026-01-01T17:00:00"}
+        out.append(json.dumps(record, sort_keys=True).split(":", 1)[0])
+    return out
+
+
+def _sample(fn, data: dict, loops: int) -> float:
+    gc.collect()
+    t0 = time.perf_counter()
+    for _ in range(loops):
+        fn(data)
+    return (time.perf_counter() - t0) / loops
+
+
+def _loops(fn, data: dict) -> int:
+    # Aufwärmlauf (füllt auch die Memo-Caches) bestimmt die Wiederholungen
+    warmup = _sample(fn, data, 1)
+    return max(1, math.ceil(MIN_SAMPLE_S / warmup)) if warmup > 0 else 1
+
+
+def _noise(ratios: list[float]) -> float:
+    """
+    Relative Streuung (Interquartilsabstand / Median) der Verhältnisse.
+    """
+    if len(ratios) < 4:
+        return 0.0
+    q1, _, q3 = statistics.quantiles(ratios, n=4)
+    median = statistics.median(ratios)
+    return (q3 - q1) / median if median > 0 else 0.0
+
+
+def measure(fn, data: dict, count: int, repeat: int) -> dict:
+    """
+    `repeat` Messungen von je mindestens MIN_SAMPLE_S, abwechselnd mit einer
+    Messung der Referenzlast (die Reihenfolge wechselt jedes Mal). "score"
+    ist der Median der Verhältnisse Referenzlast/Funktion, also der
+    Durchsatz relativ zur Referenzlast – er bleibt stabil, wenn der ganze
+    Rechner zwischendurch langsamer wird; "noise" ist deren Streuung.
+    "best_s" ist die beste Messung. Danach ein Lauf unter tracemalloc.
+    """
+    loops = _loops(fn, data)
+    calib_loops = _loops(calibration, None)
+    best = math.inf
+    ratios = []
+    for i in range(repeat):
+        if i % 2:
+            elapsed = _sample(fn, data, loops)
+            calib = _sample(calibration, None, calib_loops)
+        else:
+            calib = _sample(calibration, None, calib_loops)
+            elapsed = _sample(fn, data, loops)
+        best = min(best, elapsed)
+        if elapsed > 0:
+            ratios.append(calib / elapsed)
+    score = statistics.median(ratios) if ratios else 0.0
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn(data)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "count": count,
+        "loops": loops,
+        "best_s": round(best, 5),
+        "ops_per_s": round(count / best) if best > 0 else None,
+        "score": round(score * count / CALIBRATION_OPS, 4),
+        "noise": round(_noise(ratios), 3),
+        "peak_mb": round(peak / 2**20, 2),
+        "retained_mb": round(retained / 2**20, 2),
+        "bytes_per_op": round(peak / count) if count else None,
+    }
+
+
+def _key(name: str, size: int) -> str:
+    return f"{name}@{size}"
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: list[dict]):
+    data = {
+        "environment": environment(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "score": {_key(r["name"], r["size"]): r["score"] for r in results},
+        "ops_per_s": {_key(r["name"], r["size"]): r["ops_per_s"] for r in results},
+        "noise": {_key(r["name"], r["size"]): r["noise"] for r in results},
+    }
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Trägt pro Ergebnis das Verhältnis zur Baseline ein (über den Score,
+    also relativ zur Referenzlast) und liefert die Ergebnisse, die mehr als
+    `tolerance` langsamer sind. Ist die gemessene Streuung (aktueller Lauf
+    plus Baseline) größer, gilt sie als Toleranz ("allowed").
+    """
+    regressions = []
+    stored = baseline.get("score", {})
+    stored_noise = baseline.get("noise", {})
+    for r in results:
+        key = _key(r["name"], r["size"])
+        ref = stored.get(key)
+        if not ref or not r["score"]:
+            r["vs_baseline"] = None
+            continue
+        r["vs_baseline"] = round(r["score"] / ref, 3)
+        r["allowed"] = round(max(tolerance, r["noise"] + stored_noise.get(key, 0.0)), 3)
+        if r["vs_baseline"] < 1.0 - r["allowed"]:
+            regressions.append(r)
+    return regressions
+
+
+def print_table(results: list[dict]):
+    header = (
+        f"{'Funktion':<32}{'Größe':>9}{'Zeit [s]':>10}{'Ops/s':>12}"
+        f"{'Peak [MB]':>11}{'B/Op':>8}{'Streuung':>10}{'Baseline':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        ratio = r.get("vs_baseline")
+        print(
+            f"{r['name']:<32}{r['size']:>9}{r['best_s']:>10.4f}{r['ops_per_s'] or 0:>12}"
+            f"{r['peak_mb']:>11.2f}{r['bytes_per_op'] or 0:>8}{r['noise']:>10.0%}"
+            f"{'' if ratio is None else f'{ratio:.2f}×':>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks der Hot-Path-Funktionen")
+    parser.add_argument("--sizes", type=_int_list, default=DEFAULT_SIZES,
+                        help="Komma-getrennte Anzahl Datensätze (Standard: 10000,100000).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Anzahl Messungspaare Funktion/Referenzlast (Standard: {DEFAULT_REPEAT}).")
+    parser.add_argument("--only", help="Nur diese Funktionen (komma-getrennt).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help=f"Baseline-Datei (Standard: {DEFAULT_BASELINE.name}).")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Ergebnisse als neue Baseline speichern statt zu vergleichen.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=(
+                            "Erlaubter Durchsatzverlust gegenüber der Baseline, mindestens die "
+                            "gemessene Streuung (Standard: 0.2 = 20%%)."
+                        ))
+    parser.add_argument("--check", action="store_true",
+                        help="Bei einem Rückschritt mit Exit-Code 1 enden (Standard: nur melden).")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON schreiben.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Die Module lesen die Config beim Import; Requests gibt es hier keine
+        fetch, upload = load_modules("http://127.0.0.1:9", Path(tmp))
+        suite = benchmarks(fetch, upload)
+        names = [n.strip() for n in args.only.split(",")] if args.only else list(suite)
+        unknown = [n for n in names if n not in suite]
+        if unknown:
+            parser.error(f"Unbekannte Funktionen: {', '.join(unknown)} (bekannt: {', '.join(suite)})")
+
+        for size in args.sizes:
+            print(f"Erzeuge synthetische Daten ({size}) ...", file=sys.stderr)
+            data = prepare(fetch, upload, size, args.seed, {k for n in names for k in NEEDS[n]})
+            for name in names:
+                fn, count = suite[name]
+                r = measure(fn, data, count(data), args.repeat)
+                results.append({"name": name, "size": size, **r})
+            del data
+
+    regressions = []
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    if baseline:
+        if baseline.get("environment") != environment():
+            print(
+                f"Hinweis: Baseline stammt aus einer anderen Umgebung "
+                f"({baseline.get('environment')}).",
+                file=sys.stderr,
+            )
+        regressions = compare(results, baseline, args.tolerance)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nGespeichert in {args.json}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline gespeichert in {args.baseline}")
+    elif baseline is None:
+        print(f"\nKeine Baseline ({args.baseline}) – mit --save-baseline anlegen.")
+    elif regressions:
+        print(f"\n{'❌' if args.check else '⚠️ '} Langsamer als die Baseline:")
+        for r in regressions:
+            print(
+                f"  {r['name']} @ {r['size']}: {r['vs_baseline']:.2f}× der Baseline "
+                f"(Toleranz {r['allowed']:.0%})"
+            )
+        if args.check:
+            raise SystemExit(1)
+    else:
+        print(f"\n✅ Kein Rückschritt gegenüber der Baseline (Toleranz mind. {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+Lokaler Stand-in für die Intervals.icu API (nur die Endpunkte, die
+fetch_coach_data.py und upload_plan_to_intervals.py nutzen).
+
+- GET    /api/v1/athlete/<id>/activities?oldest=&newest=[&fields=a,b]
+- GET    /api/v1/athlete/<id>/wellness?oldest=&newest=[&cols=a,b]
+- GET    /api/v1/athlete/<id>/events?oldest=&newest=
+- POST   /api/v1/athlete/<id>/events/bulk[?upsert=true]
+- PUT    /api/v1/athlete/<id>/events/<event_id>
+- DELETE /api/v1/athlete/<id>/events/<event_id>
+- GET    /api/v1/activity/<activity_id>/streams?types=time,watts,...
+
+Aktivitäten und Wellness werden deterministisch aus dem Datum erzeugt,
+Events liegen im Speicher. Latenz und Rate-Limit (429 + Retry-After) sind
+konfigurierbar. Größere Antworten werden gzip-komprimiert, wenn der Client
+das per Accept-Encoding erlaubt (wie die echte API).
+
+Standalone:
+    python benchmarks/mock_intervals_server.py --port 8765 --latency 0.05
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/api/v1"
+GZIP_MIN_BYTES = 1024
+
+SPORTS = ("Ride", "VirtualRide", "Run", "WeightTraining")
+
+
+def synthetic_activities(day: datetime.date, per_day: float, seed: int = 0) -> list[dict]:
+    """
+    Erzeugt Aktivitäten für einen Tag im Format der /activities-API.
+    Gleicher Tag + Seed → gleiche Daten.
+    """
+    rnd = random.Random(day.toordinal() * 7919 + seed)
+    count = int(per_day) + (1 if rnd.random() < per_day - int(per_day) else 0)
+    out = []
+    for i in range(count):
+        moving = rnd.randint(1800, 14400)
+        sport = rnd.choice(SPORTS)
+        out.append({
+            "id": f"i{day.toordinal()}{i:02d}",
+            "start_date_local": f"{day.isoformat()}T{7 + 5 * i:02d}:00:00",
+            "name": f"{sport} {day.isoformat()}",
+            "type": sport,
+            "elapsed_time": moving + rnd.randint(0, 900),
+            "moving_time": moving,
+            "distance": moving * rnd.uniform(5.0, 9.0),
+            "total_elevation_gain": rnd.uniform(0, 1500),
+            "icu_training_load": round(moving / 3600 * rnd.uniform(40, 90)),
+            "icu_weighted_avg_watts": rnd.randint(150, 280),
+            "icu_average_watts": rnd.randint(130, 250),
+            "icu_intensity": rnd.uniform(55, 95),
+            "strain_score": rnd.uniform(20, 200),
+            "average_heartrate": rnd.randint(110, 160),
+            "max_heartrate": rnd.randint(160, 195),
+            "icu_rpe": rnd.randint(2, 9),
+            "feel": rnd.randint(1, 5),
+            "description": None,
+            "trainer": sport.startswith("Virtual"),
+            "commute": False,
+            "race": rnd.random() < 0.02,
+            "device_name": "Garmin Edge 540",
+            "source": "GARMIN_CONNECT",
+        })
+    return out
+
+
+def synthetic_wellness(day: datetime.date, seed: int = 0) -> dict:
+    rnd = random.Random(day.toordinal() * 104729 + seed)
+    sleep = rnd.randint(5 * 3600, 9 * 3600)
+    return {
+        "id": day.isoformat(),
+        "ctl": rnd.uniform(30, 80),
+        "atl": rnd.uniform(20, 110),
+        "rampRate": rnd.uniform(-5, 8),
+        "ctlLoad": rnd.uniform(0, 150),
+        "atlLoad": rnd.uniform(0, 150),
+        "weight": rnd.uniform(68, 74),
+        "restingHR": rnd.randint(42, 56),
+        "hrv": rnd.uniform(40, 90),
+        "hrvSDNN": rnd.uniform(40, 110),
+        "kcalConsumed": None,
+        "sleepSecs": sleep,
+        "sleepScore": rnd.randint(50, 95),
+        "sleepQuality": rnd.randint(1, 4),
+        "avgSleepingHR": rnd.randint(40, 55),
+        "steps": rnd.randint(2000, 20000),
+        "updated": f"{day.isoformat()}T23:59:00.000+00:00",
+    }
+
+
+def synthetic_streams(activity_id: str, types: list[str], seed: int = 0) -> list[dict]:
+    """
+    Sekundenwerte für eine Aktivität (deterministisch aus der ID).
+    """
+    rnd = random.Random(f"{activity_id}:{seed}")
+    n = rnd.randint(1800, 7200)
+    base = rnd.randint(150, 250)
+    watts = [max(0, int(base + 60 * rnd.gauss(0, 1))) for _ in range(n)]
+    data = {
+        "time": list(range(n)),
+        "watts": watts,
+        "heartrate": [int(110 + w / 5) for w in watts],
+        "cadence": [0 if w == 0 else rnd.randint(80, 100) for w in watts],
+    }
+    return [{"type": t, "data": data[t]} for t in types if t in data]
+
+
+def _iter_days(oldest: datetime.date, newest: datetime.date):
+    d = oldest
+    while d <= newest:
+        yield d
+        d += datetime.timedelta(days=1)
+
+
+class MockIntervalsServer(ThreadingHTTPServer):
+    """
+    HTTP-Server mit In-Memory-Events und Request-Zählern.
+
+    latency: künstliche Verzögerung pro Request in Sekunden
+    rate_limit: max. Requests pro Sekunde (None = unbegrenzt), darüber 429
+    activities_per_day: mittlere Anzahl synthetischer Aktivitäten pro Tag
+    compress: Antworten ab GZIP_MIN_BYTES gzip-komprimieren
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        rate_limit: float | None = None,
+        activities_per_day: float = 1.2,
+        seed: int = 0,
+        compress: bool = True,
+    ):
+        super().__init__((host, port), MockIntervalsHandler)
+        self.compress = compress
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.activities_per_day = activities_per_day
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.events: dict[int, dict] = {}
+        self.next_event_id = 1
+        self.counts: Counter = Counter()
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset(self, events: bool = True):
+        with self.lock:
+            if events:
+                self.events.clear()
+            self.counts.clear()
+            self.throttled = 0
+            self.bytes_sent = 0
+
+    def total_requests(self) -> int:
+        with self.lock:
+            return sum(self.counts.values())
+
+    def allow_request(self) -> bool:
+        """
+        Einfaches Fenster-Limit pro Sekunde.
+        """
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            if self._window_count >= self.rate_limit:
+                self.throttled += 1
+                return False
+            self._window_count += 1
+            return True
+
+
+class MockIntervalsHandler(BaseHTTPRequestHandler):
+    server: MockIntervalsServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # --------------------------------------------------------------
+    # Hilfen
+    # --------------------------------------------------------------
+
+    def _send(self, status: int, obj=None, headers: dict | None = None):
+        body = json.dumps(obj if obj is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        accept = self.headers.get("Accept-Encoding") or ""
+        if self.server.compress and len(body) >= GZIP_MIN_BYTES and "gzip" in accept:
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+    def _read_json(self):
+        return json.loads(self._body) if self._body else None
+
+    def _route(self, method: str):
+        """
+        Zerlegt den Pfad in (endpoint, rest, query); endpoint z.B. "events".
+        Gibt None zurück, wenn der Request bereits beantwortet wurde.
+        """
+        # Body immer komplett lesen, sonst bricht Keep-Alive bei 404/429
+        length = int(self.headers.get("Content-Length") or 0)
+        self._body = self.rfile.read(length) if length else b""
+
+        parsed = urlparse(self.path)
+        parts = parsed.path[len(API_PREFIX):].strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "activity":
+            # /activity/<id>/streams → endpoint "streams", rest [<id>]
+            parts = ["activity", "", parts[2], parts[1]]
+        if len(parts) < 3 or parts[0] not in ("athlete", "activity"):
+            self._send(404, {"error": "not found"})
+            return None
+        endpoint = parts[2]
+        rest = parts[3:]
+        if not rest or endpoint == "streams":
+            key = f"{method} {endpoint}"
+        elif rest[0] == "bulk":
+            key = f"{method} {endpoint}/bulk"
+        else:
+            key = f"{method} {endpoint}/{{id}}"
+        with self.server.lock:
+            self.server.counts[key] += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not self.server.allow_request():
+            self._send(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            return None
+        return endpoint, rest, parse_qs(parsed.query)
+
+    @staticmethod
+    def _date_range(query):
+        oldest = datetime.date.fromisoformat(query.get("oldest", ["1970-01-01"])[0][:10])
+        newest = datetime.date.fromisoformat(query.get("newest", ["2100-01-01"])[0][:10])
+        return oldest, newest
+
+    @staticmethod
+    def _select(records: list[dict], fields):
+        """
+        Feldauswahl wie bei der API (fields=/cols=, komma-getrennt).
+        """
+        if not fields:
+            return records
+        names = fields[0].split(",")
+        return [{k: r[k] for k in names if k in r} for r in records]
+
+    # --------------------------------------------------------------
+    # HTTP-Methoden
+    # --------------------------------------------------------------
+
+    def do_GET(self):
+        routed = self._route("GET")
+        if routed is None:
+            return
+        endpoint, _rest, query = routed
+        oldest, newest = self._date_range(query)
+        srv = self.server
+
+        if endpoint == "activities":
+            out = []
+            for d in _iter_days(oldest, newest):
+                out.extend(synthetic_activities(d, srv.activities_per_day, srv.seed))
+            self._send(200, self._select(out, query.get("fields")))
+        elif endpoint == "wellness":
+            out = [synthetic_wellness(d, srv.seed) for d in _iter_days(oldest, newest)]
+            self._send(200, self._select(out, query.get("cols")))
+        elif endpoint == "streams":
+            types = query.get("types", [",".join(("time", "watts", "heartrate", "cadence"))])[0]
+            self._send(200, synthetic_streams(_rest[0], types.split(","), srv.seed))
+        elif endpoint == "events":
+            lo, hi = oldest.isoformat(), newest.isoformat()
+            with srv.lock:
+                out = [
+                    e for e in srv.events.values()
+                    if lo <= e.get("start_date_local", "")[:10] <= hi
+                ]
+            self._send(200, out)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        routed = self._route("POST")
+        if routed is None:
+            return
+        endpoint, rest, query = routed
+        if endpoint != "events" or rest != ["bulk"]:
+            self._send(404, {"error": "not found"})
+            return
+        payloads = self._read_json() or []
+        upsert = query.get("upsert", ["false"])[0] == "true"
+        out = []
+        with self.server.lock:
+            by_external_id = {
+                e["external_id"]: e["id"]
+                for e in self.server.events.values() if e.get("external_id")
+            } if upsert else {}
+            for p in payloads:
+                event_id = by_external_id.get(p.get("external_id"))
+                if event_id is None:
+                    event_id = self.server.next_event_id
+                    self.server.next_event_id += 1
+                    event = dict(p, id=event_id)
+                else:
+                    event = dict(self.server.events[event_id], **p, id=event_id)
+                self.server.events[event_id] = event
+                out.append(event)
+        self._send(200, out)
+
+    def do_PUT(self):
+        routed = self._route("PUT")
+        if routed is None:
+            return
+        endpoint, rest, _query = routed
+        payload = self._read_json() or {}
+        with self.server.lock:
+            event_id = int(rest[0]) if endpoint == "events" and rest else None
+            if event_id not in self.server.events:
+                event = None
+            else:
+                event = dict(self.server.events[event_id], **payload, id=event_id)
+                self.server.events[event_id] = event
+        if event is None:
+            self._send(404, {"error": "event not found"})
+        else:
+            self._send(200, event)
+
+    def do_DELETE(self):
+        routed = self._route("DELETE")
+        if routed is None:
+            return
+        endpoint, rest, _query = routed
+        with self.server.lock:
+            event_id = int(rest[0]) if endpoint == "events" and rest else None
+            event = self.server.events.pop(event_id, None)
+        if event is None:
+            self._send(404, {"error": "event not found"})
+        else:
+            self._send(200, {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Mock der Intervals.icu API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Künstliche Latenz pro Request in Sekunden.")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Max. Requests pro Sekunde, darüber 429.")
+    parser.add_argument("--activities-per-day", type=float, default=1.2)
+    args = parser.parse_args()
+
+    server = MockIntervalsServer(
+        args.host, args.port, args.latency, args.rate_limit, args.activities_per_day
+    )
+    print(f"Mock-Server läuft auf {server.base_url} (Strg+C zum Beenden)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+End-to-End-Benchmarks für fetch_coach_data.py und upload_plan_to_intervals.py
+gegen den lokalen Mock-Server (kein Zugriff auf die echte API).
+
+Gemessen pro Szenario: Laufzeit, Anzahl Requests (serverseitig gezählt),
+übertragene Bytes und Peak-Speicher (tracemalloc, separater Lauf).
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --history-days 30,365,1825 \\
+        --plan-sizes 50,500 --latency 0.02 --json bench.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_intervals_server import MockIntervalsServer  # noqa: E402
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def load_modules(base_url: str, workdir: Path):
+    """
+    Schreibt eine config.json, die auf base_url (Mock-Server) zeigt, und importiert
+    beide Scripts damit (sie lesen die Config beim Import).
+    """
+    plan_dir = workdir / "plans"
+    plan_dir.mkdir(exist_ok=True)
+    config = {
+        "api_key": "benchmark",
+        "athlete_id": "i0",
+        "base_url": base_url,
+        "paths": {
+            "plan_dir": str(plan_dir),
+            "weekly_output": str(workdir / "weekly_coach_data.json"),
+            "sync_db": str(workdir / "coach_data.sqlite"),
+        },
+    }
+    config_path = workdir / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    os.environ["INTERVALS_CONFIG"] = str(config_path)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    fetch = importlib.import_module("fetch_coach_data")
+    upload = importlib.import_module("upload_plan_to_intervals")
+    return fetch, upload
+
+
+def synthetic_plan(n: int, start: datetime.date | None = None) -> list[dict]:
+    """
+    n Workouts ab `start` (Standard: heute), abwechselnd GA1 und Sweetspot.
+    """
+    start = start or datetime.date.today()
+    plan = []
+    for i in range(n):
+        day = start + datetime.timedelta(days=i)
+        if i % 2:
+            steps = [
+                {"duration": "15m", "zone": "Z1", "cadence": "Free", "intensity": "warmup", "ramp": True},
+                {"repeat": 3, "steps": [
+                    {"duration": "8m", "zone": "SS", "cadence": "90rpm", "intensity": "active"},
+                    {"duration": "5m", "zone": "Z1", "cadence": "Free", "intensity": "recovery"},
+                ]},
+                {"duration": "10m", "zone": "Z1", "cadence": "Free", "intensity": "cooldown"},
+            ]
+            name = "Sweetspot 3×8min"
+        else:
+            steps = [{"duration": "90m", "zone": "Z2", "cadence": "Free", "intensity": "active"}]
+            name = "GA1 90min"
+        plan.append({
+            "date": day.isoformat(),
+            "plan_id": f"bench-{day.isoformat()}-{i}",
+            "name": name,
+            "type": "Ride",
+            "steps": steps,
+        })
+    return plan
+
+
+def measure(server: MockIntervalsServer, setup, run) -> dict:
+    """
+    Führt setup()+run() zweimal aus: einmal für Zeit/Requests,
+    einmal unter tracemalloc für den Peak-Speicher.
+    """
+    setup()
+    server.reset(events=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        run()
+        wall = time.perf_counter() - t0
+    requests_made = server.total_requests()
+    counts = dict(server.counts)
+    throttled = server.throttled
+    bytes_sent = server.bytes_sent
+
+    setup()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_s": round(wall, 4),
+        "requests": requests_made,
+        "throttled": throttled,
+        "response_bytes": bytes_sent,
+        "peak_mem_mb": round(peak / 2**20, 2),
+        "by_endpoint": counts,
+    }
+
+
+def bench_fetch(fetch, server, days: int) -> dict:
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=days - 1)
+
+    def run():
+        activities, wellness = fetch.fetch_coach_range(start, end)
+        fetch.combine_coach_data(activities, wellness, start, end)
+
+    return measure(server, lambda: None, run)
+
+
+def bench_upsert(upload, server, n: int, phase: str) -> dict:
+    """
+    phase "create": leerer Kalender, alles neu
+    phase "unchanged": alle Events existieren bereits mit gleichem Inhalt
+    """
+    plan = synthetic_plan(n)
+
+    def setup():
+        server.reset(events=True)
+        if phase == "unchanged":
+            with contextlib.redirect_stdout(io.StringIO()):
+                upload.upsert_plan(plan)
+
+    return measure(server, setup, lambda: upload.upsert_plan(plan))
+
+
+def print_table(results: list[dict]):
+    header = f"{'Szenario':<28}{'Zeit [s]':>10}{'Requests':>10}{'429':>6}{'Bytes':>12}{'Peak [MB]':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<28}{r['wall_s']:>10.3f}{r['requests']:>10}"
+            f"{r['throttled']:>6}{r['response_bytes']:>12}{r['peak_mem_mb']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks gegen den Intervals.icu-Mock")
+    parser.add_argument("--history-days", type=_int_list, default=[30, 365, 1825],
+                        help="Komma-getrennte Zeiträume für fetch (Tage).")
+    parser.add_argument("--plan-sizes", type=_int_list, default=[50, 200, 1000],
+                        help="Komma-getrennte Plan-Größen für upsert (Workouts).")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Künstliche Latenz pro Request in Sekunden.")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Max. Requests pro Sekunde am Mock (429 darüber).")
+    parser.add_argument("--activities-per-day", type=float, default=1.2)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON schreiben.")
+    args = parser.parse_args()
+
+    server = MockIntervalsServer(
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        activities_per_day=args.activities_per_day,
+    ).start()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fetch, upload = load_modules(server.base_url, Path(tmp))
+        try:
+            for days in args.history_days:
+                r = bench_fetch(fetch, server, days)
+                results.append({"scenario": f"fetch {days}d", **r})
+            for n in args.plan_sizes:
+                for phase in ("create", "unchanged"):
+                    r = bench_upsert(upload, server, n, phase)
+                    results.append({"scenario": f"upsert {n} ({phase})", **r})
+        finally:
+            server.stop()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "latency": args.latency,
+                    "rate_limit": args.rate_limit,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nGespeichert in {args.json}")
+
+
+if __name__ == "__main__":
+    main()
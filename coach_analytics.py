@@ -0,0 +1,401 @@
+"""
+Trainingslast-Auswertung der Coach-Daten (vektorisiert mit NumPy).
+
+Die Tage aus combine_coach_data() bzw. der Ausgabedatei werden einmal in
+Spalten-Arrays umgewandelt; alle Kennzahlen laufen danach ohne Python-Schleife
+über die Tage:
+
+- CTL/ATL/TSB aus training_load (exponentiell gewichtete Mittel, 42/7 Tage)
+- Wochensummen (Load, Dauer, Distanz, Anzahl) pro Sportart
+- Monotonie und Strain pro Woche (Foster)
+- HRV- und Ruhepuls-Baselines (gleitende Mittel, z-Score)
+
+Standalone:
+    python coach_analytics.py weekly_coach_data.json -o coach_analytics.json
+    python coach_analytics.py coach_columns --start 2024-01-01 -o analytics.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from coach_columns import ColumnStore
+from coach_data_io import iter_coach_data
+
+CTL_DAYS = 42
+ATL_DAYS = 7
+
+# Blocklänge für die EWMA: innerhalb eines Blocks wird mit Potenzen von
+# 1/decay skaliert; kurze Blöcke halten die Werte im float64-Bereich.
+EWMA_BLOCK = 128
+
+BASELINE_SHORT_DAYS = 7
+BASELINE_LONG_DAYS = 28
+
+_ACTIVITY_COLUMNS = ("training_load", "duration_s", "moving_s", "distance_m")
+_WELLNESS_COLUMNS = ("ctl", "atl", "hrv", "resting_hr")
+
+
+def _num(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def to_columns(days) -> dict:
+    """
+    Wandelt Tagesobjekte ({"date", "wellness", "activities"}) in Spalten um.
+
+    Tages-Spalten (Länge = Anzahl Tage, fehlende Tage werden aufgefüllt):
+    "dates" (datetime64[D]), "daily_load" sowie "ctl", "atl", "hrv",
+    "resting_hr" aus den Wellness-Daten (NaN = kein Wert).
+    Aktivitäts-Spalten: "act_day" (Index in "dates"), "act_sport" (Index in
+    "sports"), training_load, duration_s, moving_s, distance_m (NaN = leer).
+    """
+    day_dates = []
+    wellness = {k: [] for k in _WELLNESS_COLUMNS}
+    act_dates = []
+    act_sport = []
+    act = {k: [] for k in _ACTIVITY_COLUMNS}
+
+    for day in days:
+        day_dates.append(day["date"])
+        w = day.get("wellness") or {}
+        for k in _WELLNESS_COLUMNS:
+            wellness[k].append(_num(w.get(k)))
+        for a in day.get("activities") or []:
+            act_dates.append(a.get("date") or day["date"])
+            act_sport.append(a.get("type") or "Unknown")
+            for k in _ACTIVITY_COLUMNS:
+                act[k].append(_num(a.get(k)))
+
+    if not day_dates:
+        raise ValueError("Keine Tage in den Coach-Daten.")
+
+    raw_dates = np.array(day_dates, dtype="datetime64[D]")
+    sports, sport_idx = np.unique(np.array(act_sport, dtype=str), return_inverse=True)
+    return _assemble_columns(
+        raw_dates.min(),
+        raw_dates.max(),
+        raw_dates,
+        {k: np.array(v, dtype=float) for k, v in wellness.items()},
+        np.array(act_dates, dtype="datetime64[D]"),
+        sports,
+        sport_idx,
+        {k: np.array(v, dtype=float) for k, v in act.items()},
+    )
+
+
+def columns_from_store(store, start: str | None = None, end: str | None = None) -> dict:
+    """
+    Wie to_columns(), liest aber direkt aus einem Spaltenverzeichnis
+    (coach_columns.ColumnStore) – nur die benötigten Felder im Datumsbereich.
+    """
+    if store.start is None:
+        raise ValueError("Keine Tage im Spaltenverzeichnis.")
+    start = max(start or store.start, store.start)
+    end = min(end or store.end, store.end)
+    if start is None or start > end:
+        raise ValueError("Keine Tage im gewählten Zeitraum.")
+
+    def read(kind, fields):
+        available = set(store.fields(kind))
+        data = store.read(kind, [f for f in fields if f in available], start, end)
+        n = len(data["date"])
+        return {f: data.get(f, np.full(n, np.nan)) for f in fields}
+
+    w = read("wellness", ("date",) + _WELLNESS_COLUMNS)
+    a = read("activities", ("date", "type") + _ACTIVITY_COLUMNS)
+
+    if "type" in store.meta["activities"]["columns"]:
+        sport_values, sport_idx = store.dictionary("activities", "type", a["type"])
+    else:
+        sport_values, sport_idx = [], np.full(len(a["date"]), -1)
+    sports = np.array(sport_values + ["Unknown"], dtype=str)
+    sport_idx = np.where(sport_idx < 0, len(sports) - 1, sport_idx)
+    # Wörterbuch-Reihenfolge → alphabetisch wie bei np.unique in to_columns()
+    order = np.argsort(sports, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    sports, sport_idx = sports[order], rank[sport_idx]
+
+    return _assemble_columns(
+        np.datetime64(start, "D"),
+        np.datetime64(end, "D"),
+        np.asarray(w["date"]),
+        {k: np.asarray(w[k], dtype=float) for k in _WELLNESS_COLUMNS},
+        np.asarray(a["date"]),
+        sports,
+        sport_idx,
+        {k: np.asarray(a[k], dtype=float) for k in _ACTIVITY_COLUMNS},
+    )
+
+
+def _assemble_columns(
+    first, last, wellness_dates, wellness, act_dates, sports, sport_idx, act
+) -> dict:
+    dates = np.arange(first, last + 1, dtype="datetime64[D]")
+    day_idx = (wellness_dates - first).astype(np.int64)
+
+    cols = {"dates": dates}
+    for k, values in wellness.items():
+        col = np.full(len(dates), np.nan)
+        col[day_idx] = values
+        cols[k] = col
+
+    cols["sports"] = sports
+    cols["act_sport"] = np.asarray(sport_idx, dtype=np.int64)
+    cols["act_day"] = (act_dates - first).astype(np.int64)
+    for k, values in act.items():
+        cols[k] = values
+
+    cols["daily_load"] = np.bincount(
+        cols["act_day"],
+        weights=np.nan_to_num(cols["training_load"]),
+        minlength=len(dates),
+    )
+    return cols
+
+
+def ewma(values: np.ndarray, days: int, initial: float = 0.0) -> np.ndarray:
+    """
+    y[t] = y[t-1] + (x[t] - y[t-1]) / days  (wie CTL/ATL bei Intervals.icu).
+
+    Blockweise geschlossen berechnet: innerhalb eines Blocks
+    y[j] = d^(j+1) * y0 + (1-d) * d^j * cumsum(x[k] / d^k), d = 1 - 1/days.
+    """
+    values = np.asarray(values, dtype=float)
+    decay = 1.0 - 1.0 / days
+    out = np.empty_like(values)
+    powers = decay ** np.arange(EWMA_BLOCK + 1)
+    prev = initial
+    for start in range(0, len(values), EWMA_BLOCK):
+        block = values[start:start + EWMA_BLOCK]
+        n = len(block)
+        p = powers[:n]
+        acc = np.cumsum(block / p)
+        out[start:start + n] = powers[1:n + 1] * prev + (1.0 - decay) * p * acc
+        prev = out[start + n - 1]
+    return out
+
+
+def _first_valid(col: np.ndarray, default: float = 0.0) -> float:
+    valid = np.flatnonzero(~np.isnan(col))
+    return float(col[valid[0]]) if len(valid) else default
+
+
+def training_load(cols: dict) -> dict:
+    """
+    CTL/ATL/TSB aus den Tageslasten. Startwert ist der erste CTL/ATL-Wert
+    aus den Wellness-Daten (sonst 0); TSB = CTL - ATL des Vortags.
+    """
+    load = cols["daily_load"]
+    ctl = ewma(load, CTL_DAYS, _first_valid(cols["ctl"]))
+    atl = ewma(load, ATL_DAYS, _first_valid(cols["atl"]))
+    form = np.empty_like(ctl)
+    form[0] = _first_valid(cols["ctl"]) - _first_valid(cols["atl"])
+    form[1:] = ctl[:-1] - atl[:-1]
+    return {"ctl": ctl, "atl": atl, "tsb": form}
+
+
+def _week_index(cols: dict):
+    """
+    Wochennummer (Montag-basiert) pro Tag relativ zur ersten Woche
+    und der Montag der ersten Woche.
+    """
+    dates = cols["dates"]
+    # 1970-01-01 war ein Donnerstag → +3 verschiebt auf Montag = 0
+    weekday = (dates.astype(np.int64) + 3) % 7
+    first_monday = dates[0] - weekday[0]
+    week = (dates - first_monday).astype(np.int64) // 7
+    return week, first_monday
+
+
+def weekly_totals(cols: dict) -> list[dict]:
+    """
+    Summen pro Woche und Sportart: training_load, duration_s, moving_s,
+    distance_m und Anzahl Aktivitäten.
+    """
+    if not len(cols["act_day"]):
+        return []
+    week, first_monday = _week_index(cols)
+    n_sports = len(cols["sports"])
+    key = week[cols["act_day"]] * n_sports + cols["act_sport"]
+    n_keys = (int(week[-1]) + 1) * n_sports
+
+    sums = {
+        k: np.bincount(key, weights=np.nan_to_num(cols[k]), minlength=n_keys)
+        for k in _ACTIVITY_COLUMNS
+    }
+    counts = np.bincount(key, minlength=n_keys)
+
+    out = []
+    for k in np.flatnonzero(counts):
+        w, s = divmod(int(k), n_sports)
+        out.append({
+            "week_start": str(first_monday + 7 * w),
+            "sport": str(cols["sports"][s]),
+            "count": int(counts[k]),
+            **{name: round(float(v[k]), 1) for name, v in sums.items()},
+        })
+    return out
+
+
+def monotony_strain(cols: dict) -> list[dict]:
+    """
+    Pro Kalenderwoche: Load-Summe, Monotonie (Mittel / Standardabweichung
+    der Tageslasten) und Strain (Summe × Monotonie). Nur vollständig
+    abgedeckte Wochen; bei Standardabweichung 0 ist die Monotonie None.
+    """
+    week, first_monday = _week_index(cols)
+    offset = int((cols["dates"][0] - first_monday).astype(np.int64))
+    padded = np.full(offset + len(week), np.nan)
+    padded[offset:] = cols["daily_load"]
+    padded = np.concatenate([padded, np.full(-len(padded) % 7, np.nan)])
+    grid = padded.reshape(-1, 7)
+
+    complete = ~np.isnan(grid).any(axis=1)
+    total = np.nansum(grid, axis=1)
+    mean = total / 7.0
+    std = np.nanstd(grid, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monotony = np.where(std > 0, mean / std, np.nan)
+    strain = total * monotony
+
+    out = []
+    for w in np.flatnonzero(complete):
+        mono = monotony[w]
+        out.append({
+            "week_start": str(first_monday + 7 * int(w)),
+            "load": round(float(total[w]), 1),
+            "monotony": None if np.isnan(mono) else round(float(mono), 2),
+            "strain": None if np.isnan(mono) else round(float(strain[w]), 1),
+        })
+    return out
+
+
+def rolling_mean_std(values: np.ndarray, window: int):
+    """
+    Gleitendes Mittel und Standardabweichung über `window` Tage bis
+    einschließlich t, NaN-Werte werden ignoriert (über kumulative Summen).
+    Weniger als die Hälfte gültiger Werte im Fenster → NaN.
+    """
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+
+    def window_sum(a):
+        c = np.concatenate([[0.0], np.cumsum(a)])
+        lo = np.maximum(np.arange(1, len(a) + 1) - window, 0)
+        return c[1:] - c[lo]
+
+    n = window_sum(valid.astype(float))
+    s = window_sum(x)
+    s2 = window_sum(x * x)
+    enough = n >= max(1, window // 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(enough, s / n, np.nan)
+        var = np.where(enough, s2 / n - mean * mean, np.nan)
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def baselines(cols: dict) -> dict:
+    """
+    HRV- und Ruhepuls-Baselines: 7-Tage-Mittel, 28-Tage-Mittel/-Streuung
+    und z-Score des 7-Tage-Mittels gegenüber der 28-Tage-Baseline.
+    """
+    out = {}
+    for name in ("hrv", "resting_hr"):
+        short, _ = rolling_mean_std(cols[name], BASELINE_SHORT_DAYS)
+        long, long_std = rolling_mean_std(cols[name], BASELINE_LONG_DAYS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(long_std > 0, (short - long) / long_std, np.nan)
+        out[name] = {
+            f"mean_{BASELINE_SHORT_DAYS}d": short,
+            f"mean_{BASELINE_LONG_DAYS}d": long,
+            f"std_{BASELINE_LONG_DAYS}d": long_std,
+            "z": z,
+        }
+    return out
+
+
+def _rounded(col: np.ndarray, digits: int = 1) -> list:
+    return [None if np.isnan(v) else v for v in np.round(col, digits).tolist()]
+
+
+def compute_analytics(days=None, cols: dict | None = None) -> dict:
+    """
+    Komplette Auswertung als JSON-serialisierbares Dict, aus Tagesobjekten
+    oder bereits aufbereiteten Spalten (to_columns/columns_from_store).
+    """
+    if cols is None:
+        cols = to_columns(days)
+    load = training_load(cols)
+    base = baselines(cols)
+
+    daily = {
+        "date": [str(d) for d in cols["dates"]],
+        "load": _rounded(cols["daily_load"]),
+        "ctl": _rounded(load["ctl"]),
+        "atl": _rounded(load["atl"]),
+        "tsb": _rounded(load["tsb"]),
+    }
+    for name, series in base.items():
+        for key, col in series.items():
+            daily[f"{name}_{key}"] = _rounded(col, 2)
+
+    return {
+        "range": {"start": daily["date"][0], "end": daily["date"][-1]},
+        "daily": daily,
+        "weekly": weekly_totals(cols),
+        "weekly_load": monotony_strain(cols),
+    }
+
+
+def write_analytics(analytics: dict, path: str):
+    """
+    Schreibt den Report nach `path` ("-" = stdout).
+    """
+    if path == "-":
+        json.dump(analytics, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(analytics, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Trainingslast-Auswertung der Coach-Daten (JSON oder NDJSON)"
+    )
+    parser.add_argument(
+        "input",
+        help="Ausgabedatei von fetch_coach_data.py oder Spaltenverzeichnis (--columnar).",
+    )
+    parser.add_argument("--start", help="Nur bei Spaltenverzeichnis: erster Tag (YYYY-MM-DD).")
+    parser.add_argument("--end", help="Nur bei Spaltenverzeichnis: letzter Tag (YYYY-MM-DD).")
+    parser.add_argument(
+        "--output", "-o", default="-",
+        help="Zieldatei für den Report (Standard: stdout).",
+    )
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if Path(args.input).is_dir():
+        store = ColumnStore(args.input)
+        analytics = compute_analytics(cols=columns_from_store(store, args.start, args.end))
+    else:
+        analytics = compute_analytics(iter_coach_data(args.input))
+    write_analytics(analytics, args.output)
+    if args.output != "-":
+        elapsed = time.perf_counter() - t0
+        print(
+            f"Auswertung {analytics['range']['start']} bis "
+            f"{analytics['range']['end']} gespeichert in {args.output} "
+            f"({elapsed:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
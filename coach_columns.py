@@ -0,0 +1,311 @@
+"""
+Spaltenformat für lange Aktivitäts-/Wellness-Historien.
+
+Jedes Feld liegt als eigene .npy-Datei im Verzeichnis, getrennt nach
+"activities" und "wellness"; meta.json beschreibt Zeilen, Typen und
+Wörterbücher. Beim Lesen werden die Spalten per Memory-Mapping geöffnet –
+geladen wird nur, was an Feldern und Datumsbereich angefragt wird.
+
+    <dir>/meta.json
+    <dir>/activities/date.npy, training_load.npy, type.npy, ...
+    <dir>/wellness/date.npy, ctl.npy, hrv.npy, ...
+
+Spaltentypen:
+- "float": float64, None → NaN
+- "bool": int8, None → -1
+- "dict": Strings als int32-Codes in ein Wörterbuch (meta.json), None → -1;
+  nur für Felder mit wenigen verschiedenen Werten (z.B. type)
+- "text": übrige Strings (id, name, notes, ...) als UTF-8 in <field>.utf8.npy,
+  dazu <field>.npy mit (Start, Ende) pro Zeile, None → (-1, -1)
+Felder mit gemischten Typen (z.B. sleep_quality als Zahl oder Text)
+werden als Text gespeichert.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+COLUMNS_VERSION = 2
+# Version 1 kannte nur "dict" als Textspalte und ist weiter lesbar
+READABLE_VERSIONS = (1, COLUMNS_VERSION)
+KINDS = ("activities", "wellness")
+META_NAME = "meta.json"
+TEXT_SUFFIX = ".utf8"
+# Wörterbuch nur, wenn höchstens so viele verschiedene Werte vorkommen
+# (Anteil an den gefüllten Zeilen, kleine Wörterbücher immer)
+DICT_MAX_RATIO = 0.5
+DICT_MIN_VALUES = 16
+
+
+def _column_kind(values: list) -> str:
+    kinds = set()
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool):
+            kinds.add("bool")
+        elif isinstance(v, (int, float)):
+            kinds.add("float")
+        else:
+            kinds.add("dict")
+    if len(kinds) == 1:
+        return kinds.pop()
+    # leer → float (nur NaN), gemischt → als Text
+    return "float" if not kinds else "dict"
+
+
+def _encode_text(texts: list):
+    """
+    UTF-8-Bytes aller Werte hintereinander plus (Start, Ende) pro Zeile.
+    """
+    spans = np.empty((len(texts), 2), dtype=np.int64)
+    parts = []
+    pos = 0
+    for i, t in enumerate(texts):
+        if t is None:
+            spans[i] = -1
+            continue
+        b = t.encode("utf-8")
+        spans[i] = (pos, pos + len(b))
+        parts.append(b)
+        pos += len(b)
+    blob = np.frombuffer(b"".join(parts), dtype=np.uint8)
+    return spans, blob
+
+
+def _encode(values: list):
+    """
+    Gibt (Array, Spalten-Meta, Text-Bytes oder None) zurück.
+    """
+    kind = _column_kind(values)
+    if kind == "float":
+        arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return arr, {"type": "float"}, None
+    if kind == "bool":
+        arr = np.array([-1 if v is None else int(v) for v in values], dtype=np.int8)
+        return arr, {"type": "bool"}, None
+
+    texts = [None if v is None else str(v) for v in values]
+    filled = len(texts) - texts.count(None)
+    distinct = set(texts)
+    distinct.discard(None)
+    if len(distinct) > max(DICT_MIN_VALUES, DICT_MAX_RATIO * filled):
+        spans, blob = _encode_text(texts)
+        return spans, {"type": "text", "bytes": len(blob)}, blob
+
+    mapping: dict[str, int] = {}
+    codes = np.empty(len(texts), dtype=np.int32)
+    for i, t in enumerate(texts):
+        codes[i] = -1 if t is None else mapping.setdefault(t, len(mapping))
+    return codes, {"type": "dict", "values": list(mapping)}, None
+
+
+def _write_kind(directory: Path, rows: list[dict]) -> dict:
+    """
+    Schreibt eine Tabelle (Liste von Dicts mit "date") spaltenweise.
+    Zeilen werden stabil nach Datum sortiert (Voraussetzung für searchsorted).
+    """
+    directory.mkdir(parents=True)
+    rows = sorted(rows, key=lambda r: r["date"])
+    fields = []
+    for r in rows:
+        for k in r:
+            if k not in fields:
+                fields.append(k)
+
+    columns = {}
+    for field in fields:
+        values = [r.get(field) for r in rows]
+        if field == "date":
+            arr, meta, blob = np.array(values, dtype="datetime64[D]"), {"type": "date"}, None
+        else:
+            arr, meta, blob = _encode(values)
+        np.save(directory / f"{field}.npy", arr, allow_pickle=False)
+        if blob is not None:
+            np.save(directory / f"{field}{TEXT_SUFFIX}.npy", blob, allow_pickle=False)
+        columns[field] = meta
+    if "date" not in columns:
+        np.save(directory / "date.npy", np.array([], dtype="datetime64[D]"))
+        columns["date"] = {"type": "date"}
+    return {"rows": len(rows), "columns": columns}
+
+
+def export_columns(days, path: str) -> dict:
+    """
+    Schreibt Coach-Tage ({"date", "wellness", "activities"}) ins Spaltenformat.
+    Das Verzeichnis wird komplett ersetzt (erst temporär geschrieben, dann
+    umbenannt). Gibt die Meta-Daten zurück.
+    """
+    activities = []
+    wellness = []
+    first = last = None
+    for day in days:
+        d = day["date"]
+        first = d if first is None or d < first else first
+        last = d if last is None or d > last else last
+        if day.get("wellness"):
+            wellness.append({"date": d, **day["wellness"]})
+        for a in day.get("activities") or []:
+            activities.append({**a, "date": a.get("date") or d})
+
+    target = Path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    meta = {
+        "version": COLUMNS_VERSION,
+        "start": first,
+        "end": last,
+        "activities": _write_kind(tmp / "activities", activities),
+        "wellness": _write_kind(tmp / "wellness", wellness),
+    }
+    with open(tmp / META_NAME, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    if target.exists():
+        old = target.with_name(target.name + ".old")
+        if old.exists():
+            shutil.rmtree(old)
+        os.replace(target, old)
+        os.replace(tmp, target)
+        shutil.rmtree(old)
+    else:
+        os.replace(tmp, target)
+    return meta
+
+
+class ColumnStore:
+    """
+    Lesezugriff auf ein Spaltenverzeichnis (Memory-Mapping, lazy).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / META_NAME, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") not in READABLE_VERSIONS:
+            raise ValueError(
+                f"Unbekannte Version des Spaltenformats in {path}: "
+                f"{self.meta.get('version')}"
+            )
+        self._mmaps: dict[tuple[str, str], np.ndarray] = {}
+        self._blobs: dict[tuple[str, str], np.ndarray] = {}
+
+    @property
+    def start(self) -> str | None:
+        return self.meta.get("start")
+
+    @property
+    def end(self) -> str | None:
+        return self.meta.get("end")
+
+    def fields(self, kind: str) -> list[str]:
+        return list(self.meta[kind]["columns"])
+
+    def column(self, kind: str, field: str) -> np.ndarray:
+        """
+        Rohe Spalte als Memory-Map (Codes bei "dict"/"bool",
+        (Start, Ende)-Paare bei "text").
+        """
+        key = (kind, field)
+        if key not in self._mmaps:
+            if field not in self.meta[kind]["columns"]:
+                raise KeyError(f"Unbekanntes Feld '{field}' in {kind}")
+            file = self.path / kind / f"{field}.npy"
+            # leere Arrays lassen sich nicht mappen
+            mode = "r" if self.meta[kind]["rows"] else None
+            self._mmaps[key] = np.load(file, mmap_mode=mode, allow_pickle=False)
+        return self._mmaps[key]
+
+    def _text_bytes(self, kind: str, field: str) -> np.ndarray:
+        key = (kind, field)
+        if key not in self._blobs:
+            file = self.path / kind / f"{field}{TEXT_SUFFIX}.npy"
+            mode = "r" if self.meta[kind]["columns"][field]["bytes"] else None
+            self._blobs[key] = np.load(file, mmap_mode=mode, allow_pickle=False)
+        return self._blobs[key]
+
+    def row_range(self, kind: str, start: str | None = None, end: str | None = None):
+        """
+        Zeilenbereich [lo, hi) für start ≤ date ≤ end (binäre Suche).
+        """
+        dates = self.column(kind, "date")
+        lo = 0 if start is None else int(
+            np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(
+            np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return lo, max(lo, hi)
+
+    def decode(self, kind: str, field: str, raw: np.ndarray) -> np.ndarray:
+        """
+        Wandelt Codes in Python-Werte (object-Array, None für leere Werte).
+        """
+        meta = self.meta[kind]["columns"][field]
+        if meta["type"] == "dict":
+            lookup = np.array(meta["values"] + [None], dtype=object)
+            return lookup[raw]  # -1 → letzter Eintrag (None)
+        if meta["type"] == "bool":
+            return np.array([None, False, True], dtype=object)[raw.astype(np.int64) + 1]
+        if meta["type"] == "text":
+            blob = self._text_bytes(kind, field)
+            out = np.empty(len(raw), dtype=object)
+            out[:] = [
+                None if start < 0 else blob[start:end].tobytes().decode("utf-8")
+                for start, end in raw.tolist()
+            ]
+            return out
+        return raw
+
+    def dictionary(self, kind: str, field: str, raw: np.ndarray):
+        """
+        (Werte, Codes) einer Textspalte, Codes -1 für leere Werte. Bei
+        "dict" direkt aus meta.json, bei "text" aus den dekodierten Zeilen.
+        """
+        meta = self.meta[kind]["columns"][field]
+        if meta["type"] == "dict":
+            return list(meta["values"]), np.asarray(raw, dtype=np.int64)
+        mapping: dict[str, int] = {}
+        codes = np.array(
+            [-1 if v is None else mapping.setdefault(v, len(mapping))
+             for v in self.decode(kind, field, raw)],
+            dtype=np.int64,
+        )
+        return list(mapping), codes
+
+    def read(
+        self,
+        kind: str,
+        fields: list[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        decode: bool = False,
+    ) -> dict[str, np.ndarray]:
+        """
+        Liest die gewünschten Felder im Datumsbereich.
+
+        Float- und Datumsspalten sind Ausschnitte der Memory-Map (ohne Kopie);
+        mit decode=True werden Text- und Bool-Spalten in Python-Werte
+        übersetzt, sonst bleiben es Codes.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unbekannte Tabelle: {kind}")
+        fields = fields or self.fields(kind)
+        lo, hi = self.row_range(kind, start, end)
+        out = {}
+        for field in fields:
+            raw = self.column(kind, field)[lo:hi]
+            out[field] = self.decode(kind, field, raw) if decode else raw
+        return out
+
+    def code_of(self, kind: str, field: str, value: str) -> int:
+        """
+        Code eines Textwerts (z.B. type="Ride") oder -1, wenn unbekannt
+        (nur für Wörterbuch-Spalten).
+        """
+        values = self.meta[kind]["columns"][field].get("values", [])
+        return values.index(value) if value in values else -1
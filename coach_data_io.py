@@ -0,0 +1,122 @@
+import json
+import os
+from pathlib import Path
+
+FORMATS = ("json", "ndjson")
+
+# Blockgröße beim Rückwärtslesen des Dateiendes (append-Modus)
+_TAIL_BLOCK = 4096
+
+
+def write_json(days, path: str) -> int:
+    """
+    Schreibt die Tage als eingerücktes JSON-Array (bisheriges Format).
+    """
+    days = list(days)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(days, f, indent=2, ensure_ascii=False)
+    return len(days)
+
+
+def _line_date(line: bytes) -> str | None:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line.decode("utf-8")).get("date")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _ndjson_tail(path: str) -> tuple[str | None, int, bool]:
+    """
+    Liest nur das Ende einer NDJSON-Datei. Rückgabe: (date der letzten
+    lesbaren Zeile, Anzahl Bytes ohne abgebrochene letzte Zeile, ob der
+    letzten Zeile nur der Zeilenumbruch fehlt).
+
+    Eine letzte Zeile ohne Zeilenumbruch, die kein gültiges JSON ist, stammt
+    von einem abgebrochenen Schreibvorgang und zählt nicht mit.
+    """
+    p = Path(path)
+    if not p.exists():
+        return None, 0, False
+
+    keep = None
+    with p.open("rb") as f:
+        size = pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        # rückwärts lesen, bis eine vollständige, lesbare Zeile vorliegt
+        while pos > 0:
+            step = min(_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            lines = tail.split(b"\n")
+            if pos > 0 and len(lines) < 2:
+                continue
+            if keep is None:
+                last = lines[-1]
+                date = _line_date(last)
+                if date is not None:
+                    return date, size, True
+                keep = size - (len(last) if last.strip() else 0)
+            for line in reversed(lines[1:-1] if pos > 0 else lines[:-1]):
+                date = _line_date(line)
+                if date is not None:
+                    return date, keep, False
+    return None, keep or 0, False
+
+
+def last_ndjson_date(path: str) -> str | None:
+    """
+    Liest nur das Ende einer NDJSON-Datei und liefert das `date` der
+    letzten vollständigen Zeile (oder None bei fehlender/leerer Datei).
+    """
+    return _ndjson_tail(path)[0]
+
+
+def write_ndjson(days, path: str, append: bool = False) -> int:
+    """
+    Schreibt jeden Tag als eine JSON-Zeile, sobald er erzeugt wird
+    (kein Aufbau der kompletten Liste im Speicher).
+
+    append=True: bestehende Datei wird nicht neu geschrieben; es werden nur
+    Tage angehängt, die nach dem letzten Datum in der Datei liegen. Eine
+    abgebrochene letzte Zeile (z.B. nach einem Absturz) wird vorher entfernt.
+    Gibt die Anzahl geschriebener Tage zurück.
+    """
+    after, newline = None, False
+    if append:
+        after, keep, newline = _ndjson_tail(path)
+        if Path(path).exists() and keep < Path(path).stat().st_size:
+            os.truncate(path, keep)
+    written = 0
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        if newline:
+            f.write("\n")
+        for day in days:
+            if after is not None and day["date"] <= after:
+                continue
+            f.write(json.dumps(day, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            written += 1
+    return written
+
+
+def iter_coach_data(path: str):
+    """
+    Liest Coach-Daten tageweise, egal ob JSON-Array oder NDJSON.
+    NDJSON wird zeilenweise gestreamt.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
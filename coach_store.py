@@ -0,0 +1,226 @@
+import datetime
+import json
+import sqlite3
+from pathlib import Path
+
+# Tage gelten als "abgeschlossen", wenn sie mindestens so viele Tage nach
+# ihrem Datum synchronisiert wurden. Jüngere Tage (Nachträge, RPE, Schlaf
+# der Folgenacht ...) werden bei jedem Lauf erneut geholt.
+DEFAULT_REFRESH_DAYS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    key TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activities_date ON activities(date);
+
+CREATE TABLE IF NOT EXISTS wellness (
+    date TEXT PRIMARY KEY,
+    updated TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS synced_days (
+    kind TEXT NOT NULL,
+    date TEXT NOT NULL,
+    synced_on TEXT NOT NULL,
+    PRIMARY KEY (kind, date)
+);
+"""
+
+
+def _iter_days(start_date: datetime.date, end_date: datetime.date):
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += datetime.timedelta(days=1)
+
+
+def _activity_keys(activities: list[dict]) -> list[str]:
+    """
+    Key pro Aktivität: die ID, ohne ID Datum + laufende Nummer innerhalb
+    des Tages (unabhängig davon, welche Tage sonst im Bereich liegen).
+    """
+    per_day: dict[str, int] = {}
+    keys = []
+    for a in activities:
+        if a.get("id") is not None:
+            keys.append(str(a["id"]))
+            continue
+        index = per_day.get(a["date"], 0)
+        per_day[a["date"]] = index + 1
+        keys.append(f"{a['date']}#{index}")
+    return keys
+
+
+class CoachDataStore:
+    """
+    Lokaler SQLite-Speicher für bereits geholte Aktivitäten (Key: Aktivitäts-ID)
+    und Wellness-Tage (Key: Datum).
+
+    Pro Tag und Datentyp wird gemerkt, wann er zuletzt synchronisiert wurde.
+    Daraus ergeben sich die "schmutzigen" Bereiche, die ein Lauf noch von der
+    API holen muss – der Rest kommt direkt aus dem Store.
+    """
+
+    def __init__(self, path: str, refresh_days: int = DEFAULT_REFRESH_DAYS):
+        self.path = Path(path)
+        self.refresh_days = refresh_days
+        # Nur aus dem Haupt-Thread benutzen; Fetch-Threads liefern ihre
+        # Ergebnisse zurück, gespeichert wird danach.
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Sync-Status
+    # ------------------------------------------------------------------
+
+    def dirty_ranges(
+        self,
+        kind: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> list[tuple[datetime.date, datetime.date]]:
+        """
+        Liefert zusammenhängende Datumsbereiche in [start_date, end_date],
+        die (noch) von der API geholt werden müssen:
+        - nie synchronisiert, oder
+        - synchronisiert, bevor der Tag refresh_days alt war.
+        """
+        rows = self.conn.execute(
+            "SELECT date, synced_on FROM synced_days "
+            "WHERE kind = ? AND date BETWEEN ? AND ?",
+            (kind, start_date.isoformat(), end_date.isoformat()),
+        ).fetchall()
+        synced_on = dict(rows)
+        settle = datetime.timedelta(days=self.refresh_days)
+
+        ranges: list[tuple[datetime.date, datetime.date]] = []
+        run_start = None
+        prev = None
+        for d in _iter_days(start_date, end_date):
+            s = synced_on.get(d.isoformat())
+            dirty = s is None or datetime.date.fromisoformat(s) < d + settle
+            if dirty and run_start is None:
+                run_start = d
+            elif not dirty and run_start is not None:
+                ranges.append((run_start, prev))
+                run_start = None
+            prev = d
+        if run_start is not None:
+            ranges.append((run_start, end_date))
+        return ranges
+
+    def _mark_synced(self, kind, start_date, end_date, synced_on):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO synced_days (kind, date, synced_on) "
+            "VALUES (?, ?, ?)",
+            [
+                (kind, d.isoformat(), synced_on.isoformat())
+                for d in _iter_days(start_date, end_date)
+            ],
+        )
+
+    # ------------------------------------------------------------------
+    # Schreiben
+    # ------------------------------------------------------------------
+
+    def save_activities(
+        self,
+        activities: list[dict],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        synced_on: datetime.date | None = None,
+    ) -> int:
+        """
+        Ersetzt alle Aktivitäten im Bereich durch die frisch geholten
+        (gelöschte Aktivitäten verschwinden so auch aus dem Store).
+        Gibt die Anzahl gespeicherter Aktivitäten zurück.
+        """
+        synced_on = synced_on or datetime.date.today()
+        rows = [
+            (key, a["date"], json.dumps(a, ensure_ascii=False))
+            for key, a in zip(_activity_keys(activities), activities)
+        ]
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM activities WHERE date BETWEEN ? AND ?",
+                (start_date.isoformat(), end_date.isoformat()),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO activities (key, date, data) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._mark_synced("activities", start_date, end_date, synced_on)
+        return len(rows)
+
+    def save_wellness(
+        self,
+        wellness_by_date: dict[str, dict],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        synced_on: datetime.date | None = None,
+    ) -> int:
+        """
+        Schreibt nur Wellness-Tage, deren `updated`-Zeitstempel sich
+        geändert hat. Gibt die Anzahl tatsächlich geänderter Tage zurück.
+        """
+        synced_on = synced_on or datetime.date.today()
+        known = dict(
+            self.conn.execute(
+                "SELECT date, updated FROM wellness WHERE date BETWEEN ? AND ?",
+                (start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+        )
+
+        rows = []
+        for dstr, w in wellness_by_date.items():
+            updated = w.get("updated")
+            if dstr in known and updated is not None and known[dstr] == updated:
+                continue
+            rows.append((dstr, updated, json.dumps(w, ensure_ascii=False)))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO wellness (date, updated, data) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._mark_synced("wellness", start_date, end_date, synced_on)
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Lesen
+    # ------------------------------------------------------------------
+
+    def load_activities(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT data FROM activities WHERE date BETWEEN ? AND ? "
+            "ORDER BY date, rowid",
+            (start_date.isoformat(), end_date.isoformat()),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def load_wellness(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> dict[str, dict]:
+        rows = self.conn.execute(
+            "SELECT date, data FROM wellness WHERE date BETWEEN ? AND ? "
+            "ORDER BY date",
+            (start_date.isoformat(), end_date.isoformat()),
+        )
+        return {dstr: json.loads(data) for dstr, data in rows}
@@ -1,7 +1,9 @@
 import json
+import os
 from pathlib import Path
 
-CONFIG_PATH = Path("config.json")
+# Pfad kann per Umgebungsvariable überschrieben werden (z.B. für Benchmarks)
+CONFIG_PATH = Path(os.environ.get("INTERVALS_CONFIG", "config.json"))
 
 
 def load_config():
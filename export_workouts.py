@@ -0,0 +1,141 @@
+import argparse
+import time
+from pathlib import Path
+
+from config_loader import load_config
+from instrumentation import METRICS
+from plan_files import load_plan_workouts
+from roster import load_roster, select_athletes
+from workout_export import FORMATS, ZONE_FTP_PCT, export_workouts
+
+config = load_config()
+
+EXPORT_CFG = config.get("export", {})
+EXPORT_DIR = config.get("paths", {}).get("export_dir", "workout_exports")
+EXPORT_FORMATS = EXPORT_CFG.get("formats", list(FORMATS))
+# Anzahl Prozesse für den Export (None = Anzahl CPU-Kerne)
+EXPORT_WORKERS = EXPORT_CFG.get("max_workers")
+
+
+def export_settings(cfg: dict) -> dict:
+    """
+    FTP und Zonentabelle aus der (ggf. athletenspezifischen) Config.
+    """
+    export_cfg = cfg.get("export", {})
+    return {
+        "ftp": export_cfg.get("ftp") or cfg.get("streams", {}).get("ftp"),
+        "zones": {**ZONE_FTP_PCT, **export_cfg.get("zones", {})},
+    }
+
+
+@METRICS.timed()
+def run_export(args, cfg: dict = config, out_dir: str = EXPORT_DIR) -> dict:
+    paths = cfg.get("paths", {})
+    # Alle Workouts inkl. vergangener – der "ab heute"-Filter gilt nur für den Upload
+    plan, failed_files = load_plan_workouts(
+        plan_dir=paths.get("plan_dir"),
+        plan_file=paths.get("plan_file"),
+        max_workers=args.max_workers,
+    )
+    settings = export_settings(cfg)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    if "erg" in formats and not settings["ftp"]:
+        print("Keine FTP gesetzt (export.ftp) – .erg wird übersprungen.")
+        formats.remove("erg")
+
+    print(
+        f"Exportiere {len(plan)} Workouts ({', '.join(formats)}) nach {out_dir} ..."
+    )
+    t0 = time.perf_counter()
+    summary = export_workouts(
+        plan,
+        out_dir,
+        formats=formats,
+        zones=settings["zones"],
+        ftp=settings["ftp"],
+        max_workers=args.max_workers,
+        # unvollständiger Plan: Exporte nicht gelesener Dateien behalten
+        remove_missing=not failed_files,
+    )
+    if failed_files:
+        print(
+            f"⚠️  {len(failed_files)} Plan-Dateien nicht geladen – "
+            "nicht mehr geplante Exporte werden diesmal nicht entfernt."
+        )
+    for plan_id, error in summary["failed"]:
+        print(f"  ❌ {plan_id}: {error}")
+    print(
+        f"{'❌' if summary['failed'] else '✅'} Fertig in "
+        f"{time.perf_counter() - t0:.2f}s. Exportiert: {summary['exported']}, "
+        f"aktuell: {summary['skipped']}, ohne Steps: {summary['no_steps']}, "
+        f"entfernt: {summary['removed']}, "
+        f"fehlgeschlagen: {len(summary['failed'])}"
+    )
+    summary["failed_files"] = failed_files
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Geplante Workouts als .zwo/.erg/.mrc exportieren"
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(EXPORT_FORMATS),
+        help=f"Komma-getrennte Formate (Standard: {','.join(EXPORT_FORMATS)}).",
+    )
+    parser.add_argument(
+        "--output",
+        default=EXPORT_DIR,
+        help=f"Zielverzeichnis (Standard: paths.export_dir = {EXPORT_DIR}).",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=EXPORT_WORKERS,
+        help="Anzahl Prozesse für Parsen und Export (Standard: CPU-Kerne).",
+    )
+    parser.add_argument(
+        "--all-athletes",
+        action="store_true",
+        help=(
+            "Für alle Athleten im Kader exportieren, jeweils aus dem eigenen "
+            "plan_dir in das eigene export_dir (mit eigener FTP)."
+        ),
+    )
+    parser.add_argument(
+        "--athletes",
+        help="Nur diese Athleten aus dem Kader (komma-getrennte Namen).",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Phasen messen und am Ende als JSON-Report schreiben (ohne PATH auf stderr).",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    try:
+        if args.all_athletes or args.athletes:
+            # Athleten nacheinander, jeder nutzt den ganzen Prozess-Pool
+            for athlete_cfg in select_athletes(load_roster(config), args.athletes):
+                print(f"\n[{athlete_cfg['name']}]")
+                out_dir = athlete_cfg["paths"].get("export_dir") or str(
+                    Path(EXPORT_DIR) / athlete_cfg["name"])
+                summary = run_export(args, athlete_cfg, out_dir)
+                failed = failed or bool(summary["failed"] or summary["failed_files"])
+        else:
+            summary = run_export(args, config, args.output)
+            failed = bool(summary["failed"] or summary["failed_files"])
+    finally:
+        if args.profile:
+            METRICS.write_report(
+                args.profile, script="export_workouts", args=vars(args))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,91 @@
-import requests
 import datetime
-import json
 import argparse
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config_loader import load_config
+from intervals_client import IntervalsClient, StreamInterrupted, iter_json_array
+from instrumentation import METRICS
+from coach_store import CoachDataStore, DEFAULT_REFRESH_DAYS
+from coach_data_io import FORMATS, iter_coach_data, write_json, write_ndjson
+from coach_analytics import columns_from_store, compute_analytics, write_analytics
+from coach_columns import ColumnStore, export_columns
+from activity_streams import (
+    STREAM_TYPES,
+    download_streams,
+    summarize_streams,
+    write_streams_summary,
+)
+from field_projection import (
+    API_FIELDS_PARAMS,
+    compile_projection,
+    request_fields,
+    resolve_projection,
+)
+from roster import (
+    DEFAULT_ATHLETE_WORKERS,
+    load_roster,
+    print_roster_summary,
+    run_for_roster,
+    select_athletes,
+)
 
 config = load_config()
 
-API_KEY = config["api_key"]
-ATHLETE_ID = config["athlete_id"]
-BASE_URL = config["base_url"]
-WEEKLY_FILE = config["paths"].get("weekly_output", "weekly_coach_data.json")
+PATHS = config.get("paths", {})
+WEEKLY_FILE = PATHS.get("weekly_output", "weekly_coach_data.json")
+SYNC_DB = PATHS.get("sync_db", "coach_data.sqlite")
+ANALYTICS_FILE = PATHS.get("analytics_output", "coach_analytics.json")
+COLUMNAR_DIR = PATHS.get("columnar_dir", "coach_columns")
+STREAMS_DIR = PATHS.get("streams_dir", "activity_streams")
+STREAMS_CFG = config.get("streams", {})
+STREAM_WORKERS = STREAMS_CFG.get("max_workers", 8)
+SYNC_REFRESH_DAYS = config.get("sync", {}).get(
+    "refresh_days", DEFAULT_REFRESH_DAYS)
 
+# Lange Zeiträume werden in Fenster ("Shards") zerlegt und parallel geholt
+FETCH_CFG = config.get("fetch", {})
+SHARD_DAYS = FETCH_CFG.get("shard_days", 31)
+SHARD_WORKERS = FETCH_CFG.get("max_workers", 4)
+SHARD_RETRIES = FETCH_CFG.get("shard_retries", 2)
 
-def auth():
-    return ("API_KEY", API_KEY)
+ATHLETE_WORKERS = config.get("roster", {}).get(
+    "max_workers", DEFAULT_ATHLETE_WORKERS)
+
+
+def fetch_settings(cfg: dict) -> dict:
+    """
+    Abruf-, Sync- und Stream-Einstellungen aus der (ggf. athletenspezifischen)
+    Config. Die Feldauswahl (fields) gilt global.
+    """
+    fetch_cfg = cfg.get("fetch", {})
+    return {
+        "shard_days": fetch_cfg.get("shard_days", 31),
+        "shard_workers": fetch_cfg.get("max_workers", 4),
+        "shard_retries": fetch_cfg.get("shard_retries", 2),
+        "refresh_days": cfg.get("sync", {}).get("refresh_days", DEFAULT_REFRESH_DAYS),
+        "streams": cfg.get("streams", {}),
+    }
+
+# Feldauswahl: einmal kompiliert; optional nur diese Felder von der API anfordern
+FIELDS_CFG = config.get("fields", {})
+ACTIVITY_PROJECTION = resolve_projection("activities", FIELDS_CFG.get("activities"))
+WELLNESS_PROJECTION = resolve_projection("wellness", FIELDS_CFG.get("wellness"))
+extract_activity = compile_projection(ACTIVITY_PROJECTION, leading=("date",))
+extract_wellness = compile_projection(WELLNESS_PROJECTION)
+REQUEST_FIELDS = FIELDS_CFG.get("request_fields", True)
+ACTIVITY_PARAMS = (
+    {API_FIELDS_PARAMS["activities"]: request_fields("activities", ACTIVITY_PROJECTION)}
+    if REQUEST_FIELDS and "activities" in FIELDS_CFG else {}
+)
+WELLNESS_PARAMS = (
+    {API_FIELDS_PARAMS["wellness"]: request_fields("wellness", WELLNESS_PROJECTION)}
+    if REQUEST_FIELDS and "wellness" in FIELDS_CFG else {}
+)
+
+# Eine gepoolte Session für alle Requests (Keep-Alive statt neuer TLS-Handshakes).
+# Reine Kader-Configs (nur "athletes") haben keinen Standard-Client.
+CLIENT = IntervalsClient.from_config(config) if config.get("athlete_id") else None
 
 
 def get_date_range(days=7):
@@ -26,18 +98,28 @@ def get_date_range(days=7):
     return start, today
 
 
-def fetch_activities(start_date, end_date):
-    url = f"{BASE_URL}/athlete/{ATHLETE_ID}/activities"
+@METRICS.timed()
+def fetch_activities(start_date, end_date, client: IntervalsClient | None = None):
+    client = client or CLIENT
+    url = client.athlete_url("activities")
     params = {
         "oldest": start_date.isoformat(),
         "newest": end_date.isoformat(),
+        **ACTIVITY_PARAMS,
     }
-    r = requests.get(url, auth=auth(), params=params, timeout=30)
+    r = client.get(url, params=params, stream=True)
     r.raise_for_status()
-    data = r.json()
 
-    activities = []
-    for a in data:
+    # Datensätze werden beim Lesen dekodiert und sofort projiziert
+    return list(project_activities(iter_json_array(r, metrics=client.metrics), start_date, end_date))
+
+
+def project_activities(records, start_date, end_date):
+    """
+    Übersetzt Datensätze der /activities-API in Aktivitäten (Generator):
+    Datum aus start_date_local, nur start_date ≤ Datum ≤ end_date.
+    """
+    for a in records:
         raw_date = a.get("start_date_local") or a.get("start_date")
         parsed_date = None
         if raw_date:
@@ -50,51 +132,23 @@ def fetch_activities(start_date, end_date):
         if parsed_date is None or not (start_date <= parsed_date <= end_date):
             continue
 
-        activities.append({
-            "date": parsed_date.isoformat(),
-            "id": a.get("id"),
-            "name": a.get("name"),
-            "type": a.get("type"),
-            "duration_s": a.get("elapsed_time"),
-            "moving_s": a.get("moving_time"),
-            "distance_m": a.get("distance"),
-            "elevation_gain_m": a.get("total_elevation_gain"),
-            "training_load": a.get("icu_training_load"),
-            "np_est": a.get("icu_weighted_avg_watts"),
-            "avg_power": a.get("icu_average_watts"),
-            "intensity_index": a.get("icu_intensity"),
-            "strain_score": a.get("strain_score"),
-            "avg_hr": a.get("average_heartrate"),
-            "max_hr": a.get("max_heartrate"),
-            "session_rpe": (
-                a.get("session_rpe")
-                or a.get("icu_rpe")
-                or a.get("perceived_exertion")
-            ),
-            "feeling": a.get("feel"),
-            "notes": a.get("description"),
-            "trainer": a.get("trainer"),
-            "commute": a.get("commute"),
-            "race": a.get("race"),
-            "device_name": a.get("device_name"),
-            "source": a.get("source"),
-        })
-
-    return activities
-
-
-def fetch_wellness(start_date, end_date):
-    url = f"{BASE_URL}/athlete/{ATHLETE_ID}/wellness"
+        yield extract_activity(a, parsed_date.isoformat())
+
+
+@METRICS.timed()
+def fetch_wellness(start_date, end_date, client: IntervalsClient | None = None):
+    client = client or CLIENT
+    url = client.athlete_url("wellness")
     params = {
         "oldest": start_date.isoformat(),
         "newest": end_date.isoformat(),
+        **WELLNESS_PARAMS,
     }
-    r = requests.get(url, auth=auth(), params=params, timeout=30)
+    r = client.get(url, params=params, stream=True)
     r.raise_for_status()
-    data = r.json()
 
     wellness_by_date = {}
-    for w in data:
+    for w in iter_json_array(r, metrics=client.metrics):
         dstr = w.get("id")
         if not dstr:
             continue
@@ -105,49 +159,253 @@ def fetch_wellness(start_date, end_date):
         if not (start_date <= d <= end_date):
             continue
 
-        wellness_by_date[dstr] = {
-            "ctl": w.get("ctl"),
-            "atl": w.get("atl"),
-            "rampRate": w.get("rampRate"),
-            "ctlLoad": w.get("ctlLoad"),
-            "atlLoad": w.get("atlLoad"),
-            "weight": w.get("weight"),
-            "resting_hr": w.get("restingHR"),
-            "hrv": w.get("hrv"),
-            "hrv_sdnn": w.get("hrvSDNN"),
-            "kcal_consumed": w.get("kcalConsumed"),
-            "sleep_secs": w.get("sleepSecs"),
-            "sleep_hours": (
-                w.get("sleepSecs") / 3600.0 if w.get("sleepSecs") else None
-            ),
-            "sleep_score": w.get("sleepScore"),
-            "sleep_quality": w.get("sleepQuality"),
-            "avg_sleeping_hr": w.get("avgSleepingHR"),
-            "steps": w.get("steps"), 
-            "updated": w.get("updated"),
-        }
+        wellness_by_date[dstr] = extract_wellness(w)
 
     return wellness_by_date
 
 
-def combine_coach_data(activities, wellness_by_date, start_date, end_date):
+FETCHERS = {
+    "activities": fetch_activities,
+    "wellness": fetch_wellness,
+}
+
+
+def split_date_range(start_date, end_date, shard_days=SHARD_DAYS):
+    """
+    Zerlegt [start_date, end_date] in aufeinanderfolgende Fenster
+    von höchstens `shard_days` Tagen (inklusive Grenzen).
+    """
+    shard_days = max(1, shard_days)
+    shards = []
+    current = start_date
+    while current <= end_date:
+        shard_end = min(current + datetime.timedelta(days=shard_days - 1), end_date)
+        shards.append((current, shard_end))
+        current = shard_end + datetime.timedelta(days=1)
+    return shards
+
+
+def _fetch_shard_with_retry(kind, start_date, end_date, retries, client):
+    # Nur abgebrochene Streams wiederholen: 429/5xx und Verbindungsfehler
+    # beim Request hat der Client schon selbst wiederholt, 4xx ist endgültig
+    fetch = FETCHERS[kind]
+    attempt = 0
+    while True:
+        try:
+            return fetch(start_date, end_date, client=client)
+        except StreamInterrupted as e:
+            if attempt >= retries:
+                raise
+            attempt += 1
+            wait = min(2 ** attempt, 30)
+            print(
+                f"  ⚠️  {kind} {start_date} bis {end_date} fehlgeschlagen ({e}), "
+                f"Versuch {attempt + 1}/{retries + 1} in {wait}s ..."
+            )
+            time.sleep(wait)
+
+
+def fetch_shards(jobs, max_workers=SHARD_WORKERS, retries=SHARD_RETRIES, client=None):
+    """
+    Holt alle Shards (kind, start, end) parallel mit begrenzter Anzahl Worker.
+    Bricht das Lesen einer Antwort ab, wird nur dieser Shard wiederholt;
+    HTTP-Fehler wiederholt allein der Client.
+
+    Liefert (kind, start, end, result) in Fertigstellungsreihenfolge;
+    endgültig fehlgeschlagene Shards landen in der zurückgegebenen Liste
+    `failed` (wird erst nach Ende des Generators vollständig).
+    """
+    failed: list[tuple[str, datetime.date, datetime.date, Exception]] = []
+
+    def generate():
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                pool.submit(_fetch_shard_with_retry, kind, s, e, retries, client): (kind, s, e)
+                for kind, s, e in jobs
+            }
+            for fut in as_completed(futures):
+                kind, s, e = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as exc:
+                    print(f"  ❌ {kind} {s} bis {e} endgültig fehlgeschlagen: {exc}")
+                    failed.append((kind, s, e, exc))
+                    continue
+                yield kind, s, e, result
+
+    return generate(), failed
+
+
+def _raise_on_failed_shards(failed):
+    if failed:
+        shards = ", ".join(f"{kind} {s}..{e}" for kind, s, e, _ in failed)
+        raise RuntimeError(f"{len(failed)} Shard(s) fehlgeschlagen: {shards}")
+
+
+@METRICS.timed()
+def fetch_coach_range(
+    start_date,
+    end_date,
+    shard_days=SHARD_DAYS,
+    client=None,
+    max_workers=SHARD_WORKERS,
+    retries=SHARD_RETRIES,
+):
+    """
+    Holt Aktivitäten und Wellness für den Zeitraum, zerlegt in Shards,
+    und führt die Ergebnisse in Datumsreihenfolge zusammen.
+    """
+    shards = split_date_range(start_date, end_date, shard_days)
+    jobs = [(kind, s, e) for kind in FETCHERS for s, e in shards]
+    if len(shards) > 1:
+        print(f"  {len(shards)} Zeitfenster à max. {shard_days} Tage ...")
+
+    results, failed = fetch_shards(jobs, max_workers, retries, client=client)
+    by_shard = {(kind, s): result for kind, s, _e, result in results}
+    _raise_on_failed_shards(failed)
+
+    activities = []
+    wellness_by_date = {}
+    for s, _e in shards:
+        activities.extend(by_shard[("activities", s)])
+        wellness_by_date.update(by_shard[("wellness", s)])
+    return activities, wellness_by_date
+
+
+def iter_coach_days(activities, wellness_by_date, start_date, end_date):
+    """
+    Erzeugt die Tagesobjekte einzeln (Generator), in Datumsreihenfolge.
+    """
     # Aktivitäten pro Datum gruppieren
     act_by_date = {}
     for a in activities:
         act_by_date.setdefault(a["date"], []).append(a)
 
-    combined = []
     current = start_date
     while current <= end_date:
         dstr = current.isoformat()
-        combined.append({
+        yield {
             "date": dstr,
             "wellness": wellness_by_date.get(dstr),
             "activities": act_by_date.get(dstr, []),
-        })
+        }
         current += datetime.timedelta(days=1)
 
-    return combined
+
+@METRICS.timed()
+def combine_coach_data(activities, wellness_by_date, start_date, end_date):
+    return list(iter_coach_days(activities, wellness_by_date, start_date, end_date))
+
+
+@METRICS.timed()
+def sync_coach_data(
+    store: CoachDataStore,
+    start_date,
+    end_date,
+    shard_days=SHARD_DAYS,
+    client=None,
+    max_workers=SHARD_WORKERS,
+    retries=SHARD_RETRIES,
+):
+    """
+    Holt nur die Bereiche von der API, die im Store fehlen oder noch nicht
+    abgeschlossen sind, und schreibt sie in den Store.
+
+    Jeder Bereich wird in Shards zerlegt; jeder fertige Shard wird sofort
+    gespeichert. Bricht ein Lauf ab, holt der nächste nur die fehlenden Shards.
+    """
+    jobs = []
+    for kind in FETCHERS:
+        for s, e in store.dirty_ranges(kind, start_date, end_date):
+            jobs.extend(
+                (kind, ss, se) for ss, se in split_date_range(s, e, shard_days)
+            )
+
+    if not jobs:
+        print("Store ist aktuell – keine API-Abfrage nötig.")
+        return
+
+    results, failed = fetch_shards(jobs, max_workers, retries, client=client)
+    for kind, s, e, result in results:
+        if kind == "activities":
+            n = store.save_activities(result, s, e)
+            print(f"  Aktivitäten {s} bis {e}: {n} synchronisiert")
+        else:
+            n = store.save_wellness(result, s, e)
+            print(f"  Wellness {s} bis {e}: {n} Tage geändert")
+    _raise_on_failed_shards(failed)
+
+
+def iter_coach_days_from_store(
+    store: CoachDataStore, start_date, end_date, shard_days=SHARD_DAYS
+):
+    """
+    Wie iter_coach_days(), liest den Store aber fensterweise, sodass nie
+    mehr als ein Fenster im Speicher liegt.
+    """
+    for s, e in split_date_range(start_date, end_date, shard_days):
+        yield from iter_coach_days(
+            store.load_activities(s, e), store.load_wellness(s, e), s, e
+        )
+
+
+def combine_coach_data_from_store(store: CoachDataStore, start_date, end_date):
+    """
+    Baut die Coach-Daten direkt aus dem lokalen Store (ohne API-Zugriff).
+    """
+    return list(iter_coach_days_from_store(store, start_date, end_date))
+
+
+@METRICS.timed()
+def write_coach_data(days, path: str, fmt: str = "json", append: bool = False) -> int:
+    if fmt == "ndjson":
+        return write_ndjson(days, path, append=append)
+    return write_json(days, path)
+
+
+@METRICS.timed()
+def fetch_activity_streams(
+    weekly_file: str, streams_dir: str, client=None, streams_cfg: dict = STREAMS_CFG
+):
+    """
+    Lädt die Streams aller Aktivitäten aus der Ausgabedatei (fehlende
+    parallel, vorhandene werden übersprungen) und schreibt die Kennzahlen
+    nach <streams_dir>/summary.json.
+    """
+    client = client or CLIENT
+    activity_ids = [
+        a.get("id")
+        for day in iter_coach_data(weekly_file)
+        for a in day.get("activities") or []
+    ]
+    print(f"Lade Streams für {len(activity_ids)} Aktivitäten nach {streams_dir} ...")
+    result = download_streams(
+        client,
+        activity_ids,
+        streams_dir,
+        max_workers=streams_cfg.get("max_workers", STREAM_WORKERS),
+        types=streams_cfg.get("types", STREAM_TYPES),
+    )
+    print(
+        f"  geladen: {result['downloaded']}, vorhanden: {result['skipped']}, "
+        f"fehlgeschlagen: {len(result['failed'])}, "
+        f"{result['bytes'] / 2**20:.1f} MB Rohdaten"
+    )
+    for activity_id, error in result["failed"]:
+        print(f"  ❌ {activity_id}: {error}")
+
+    with METRICS.phase("stream_metrics"):
+        summary = summarize_streams(
+            streams_dir,
+            activity_ids,
+            ftp=streams_cfg.get("ftp"),
+            lthr=streams_cfg.get("lthr"),
+        )
+    summary_path = str(Path(streams_dir) / "summary.json")
+    write_streams_summary(summary, summary_path)
+    print(f"Stream-Kennzahlen gespeichert in {summary_path}")
+    if result["failed"]:
+        raise SystemExit(1)
 
 
 def parse_cli_date(date_str: str) -> datetime.date:
@@ -175,8 +433,163 @@ def main():
         type=int,
         help="Anzahl der Tage (Standard: 7)."
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help=(
+            "Lokalen Store (paths.sync_db) nutzen und nur fehlende bzw. "
+            "noch nicht abgeschlossene Tage von der API holen."
+        ),
+    )
+    parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="Wie --sync, aber den gesamten Zeitraum neu holen.",
+    )
+    parser.add_argument(
+        "--shard-days",
+        type=int,
+        help=f"Größe der parallel geholten Zeitfenster in Tagen (Standard: {SHARD_DAYS}).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help=(
+            "Ausgabeformat: json (eingerücktes Array, Standard) oder "
+            "ndjson (ein Tag pro Zeile, gestreamt)."
+        ),
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help=(
+            "Nur mit --format ndjson: bestehende Datei nicht neu schreiben, "
+            "sondern nur neue Tage (nach dem letzten Datum) anhängen."
+        ),
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help=(
+            "Zusätzlich ein Spaltenformat (.npy pro Feld, memory-mapped) "
+            f"exportieren (paths.columnar_dir, Standard: {COLUMNAR_DIR})."
+        ),
+    )
+    parser.add_argument(
+        "--streams",
+        action="store_true",
+        help=(
+            "Sekunden-Streams (Leistung, HF, Kadenz) aller Aktivitäten parallel "
+            f"laden, komprimiert in paths.streams_dir ablegen (Standard: {STREAMS_DIR}) "
+            "und Zeit in Zonen sowie Power-Curve berechnen."
+        ),
+    )
+    parser.add_argument(
+        "--analytics",
+        action="store_true",
+        help=(
+            "Nach dem Schreiben CTL/ATL/TSB, Wochensummen, Monotonie/Strain "
+            "und HRV-/Ruhepuls-Baselines berechnen (paths.analytics_output, "
+            f"Standard: {ANALYTICS_FILE})."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help=(
+            "Requests und Phasen messen und am Ende als JSON-Report schreiben "
+            "(ohne PATH auf stderr)."
+        ),
+    )
+    parser.add_argument(
+        "--all-athletes",
+        action="store_true",
+        help=(
+            "Für alle Athleten im Kader (config.athletes bzw. paths.roster) "
+            "parallel ausführen, mit eigener Ausgabedatei pro Athlet."
+        ),
+    )
+    parser.add_argument(
+        "--athletes",
+        help="Nur diese Athleten aus dem Kader (komma-getrennte Namen).",
+    )
+    parser.add_argument(
+        "--athlete-workers",
+        type=int,
+        default=ATHLETE_WORKERS,
+        help=f"Anzahl parallel bearbeiteter Athleten (Standard: {ATHLETE_WORKERS}).",
+    )
     args = parser.parse_args()
 
+    try:
+        if args.all_athletes or args.athletes:
+            run_roster(args)
+        elif CLIENT is None:
+            print("Keine athlete_id in der Config – --all-athletes verwenden?")
+        else:
+            run_fetch(args)
+    finally:
+        if args.profile:
+            METRICS.write_report(
+                args.profile, script="fetch_coach_data", args=vars(args))
+
+
+def run_roster(args):
+    athletes = select_athletes(load_roster(config), args.athletes)
+    print(f"Hole Coach-Daten für {len(athletes)} Athleten ...")
+
+    def task(athlete_cfg, client):
+        paths = athlete_cfg.get("paths", {})
+        return run_fetch(
+            args,
+            client=client,
+            weekly_file=paths.get("weekly_output", WEEKLY_FILE),
+            sync_db=paths.get("sync_db", SYNC_DB),
+            analytics_file=paths.get("analytics_output", ANALYTICS_FILE),
+            columnar_dir=paths.get("columnar_dir", COLUMNAR_DIR),
+            streams_dir=paths.get("streams_dir", STREAMS_DIR),
+            settings=fetch_settings(athlete_cfg),
+        )
+
+    summaries = run_for_roster(athletes, task, max_workers=args.athlete_workers)
+    print_roster_summary(
+        summaries,
+        describe=lambda r: f"{r['days']} Tage → {r['output']}" if r else "",
+    )
+    if not all(s["ok"] for s in summaries):
+        raise SystemExit(1)
+
+
+def run_fetch(
+    args,
+    client=None,
+    weekly_file=WEEKLY_FILE,
+    sync_db=SYNC_DB,
+    analytics_file=ANALYTICS_FILE,
+    columnar_dir=COLUMNAR_DIR,
+    streams_dir=STREAMS_DIR,
+    settings=None,
+):
+    """
+    Ein kompletter Lauf für einen Athleten. Gibt eine kurze Zusammenfassung
+    zurück (None bei ungültigen Argumenten). settings: siehe fetch_settings()
+    (Standard: globale Config); --shard-days hat Vorrang.
+    """
+    client = client or CLIENT
+    settings = settings or fetch_settings(config)
+    shard_days = args.shard_days or settings["shard_days"]
+    shards = {
+        "client": client,
+        "max_workers": settings["shard_workers"],
+        "retries": settings["shard_retries"],
+    }
+    if args.append and args.format != "ndjson":
+        print("--append ist nur mit --format ndjson möglich.")
+        return None
+
     # Standardwert für Tage
     days = args.days if (args.days and args.days > 0) else 7
 
@@ -186,7 +599,7 @@ def main():
             start = parse_cli_date(args.start)
         except ValueError as e:
             print(e)
-            return
+            return None
 
         # end = start + (days - 1) → genau 'days' Tage
         end = start + datetime.timedelta(days=days - 1)
@@ -196,20 +609,52 @@ def main():
 
     print(f"Zeitraum: {start} bis {end}")
 
-    print("Hole Aktivitäten...")
-    activities = fetch_activities(start, end)
-    print(f"Aktivitäten: {len(activities)}")
-
-    print("Hole Wellness-Daten...")
-    wellness_by_date = fetch_wellness(start, end)
-    print(f"Wellness-Tage: {len(wellness_by_date)}")
-
-    combined = combine_coach_data(activities, wellness_by_date, start, end)
-
-    with open(WEEKLY_FILE, "w", encoding="utf-8") as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False)
-
-    print(f"Gespeichert in {WEEKLY_FILE}")
+    if args.sync or args.full_sync:
+        # full-sync: refresh_days so groß, dass kein Tag als abgeschlossen gilt
+        refresh_days = 10**5 if args.full_sync else settings["refresh_days"]
+        print(f"Synchronisiere mit lokalem Store {sync_db} ...")
+        with CoachDataStore(sync_db, refresh_days=refresh_days) as store:
+            sync_coach_data(store, start, end, shard_days=shard_days, **shards)
+            days_iter = iter_coach_days_from_store(
+                store, start, end, shard_days=shard_days)
+            written = write_coach_data(
+                days_iter, weekly_file, args.format, append=args.append)
+    else:
+        # Beide Endpunkte (und alle Zeitfenster) parallel abfragen
+        print("Hole Aktivitäten und Wellness-Daten...")
+        activities, wellness_by_date = fetch_coach_range(
+            start, end, shard_days=shard_days, **shards)
+        print(f"Aktivitäten: {len(activities)}")
+        print(f"Wellness-Tage: {len(wellness_by_date)}")
+
+        days_iter = iter_coach_days(activities, wellness_by_date, start, end)
+        written = write_coach_data(
+            days_iter, weekly_file, args.format, append=args.append)
+
+    print(f"Gespeichert in {weekly_file} ({written} Tage, {args.format})")
+
+    # Export und Auswertung über die komplette Datei
+    # (bei --append die ganze Historie)
+    if args.columnar:
+        with METRICS.phase("columnar_export"):
+            meta = export_columns(iter_coach_data(weekly_file), columnar_dir)
+        print(
+            f"Spaltenformat gespeichert in {columnar_dir} "
+            f"({meta['activities']['rows']} Aktivitäten, "
+            f"{meta['wellness']['rows']} Wellness-Tage)"
+        )
+    if args.streams:
+        fetch_activity_streams(weekly_file, streams_dir, client, settings["streams"])
+    if args.analytics:
+        with METRICS.phase("analytics"):
+            if args.columnar:
+                cols = columns_from_store(ColumnStore(columnar_dir))
+                analytics = compute_analytics(cols=cols)
+            else:
+                analytics = compute_analytics(iter_coach_data(weekly_file))
+            write_analytics(analytics, analytics_file)
+        print(f"Auswertung gespeichert in {analytics_file}")
+    return {"days": written, "output": weekly_file}
 
 
 if __name__ == "__main__":
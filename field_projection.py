@@ -0,0 +1,179 @@
+"""
+Deklarative Feldauswahl ("Projektion") für Aktivitäten und Wellness.
+
+Eine Projektion ist ein Dict Ausgabefeld → Quelle:
+- "icu_training_load": Feld aus der API-Antwort
+- ["session_rpe", "icu_rpe", "perceived_exertion"]: erster gesetzte Wert
+- {"from": "sleepSecs", "divide": 3600}: Zahl umgerechnet (0/None → None)
+
+compile_projection() erzeugt daraus einmalig eine Python-Funktion mit einem
+Dict-Literal (keine Schleife über die Felder pro Datensatz).
+
+In der Config ("fields") kann pro Art eine Liste von Ausgabefeldern
+(Auswahl aus den Standardfeldern) oder ein Dict mit eigenen Zuordnungen
+angegeben werden:
+
+    "fields": {
+      "activities": ["type", "duration_s", "training_load"],
+      "wellness": {"hrv": "hrv", "rhr": "restingHR"},
+      "request_fields": true
+    }
+"""
+
+DEFAULT_ACTIVITY_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "type": "type",
+    "duration_s": "elapsed_time",
+    "moving_s": "moving_time",
+    "distance_m": "distance",
+    "elevation_gain_m": "total_elevation_gain",
+    "training_load": "icu_training_load",
+    "np_est": "icu_weighted_avg_watts",
+    "avg_power": "icu_average_watts",
+    "intensity_index": "icu_intensity",
+    "strain_score": "strain_score",
+    "avg_hr": "average_heartrate",
+    "max_hr": "max_heartrate",
+    "session_rpe": ["session_rpe", "icu_rpe", "perceived_exertion"],
+    "feeling": "feel",
+    "notes": "description",
+    "trainer": "trainer",
+    "commute": "commute",
+    "race": "race",
+    "device_name": "device_name",
+    "source": "source",
+}
+
+DEFAULT_WELLNESS_FIELDS = {
+    "ctl": "ctl",
+    "atl": "atl",
+    "rampRate": "rampRate",
+    "ctlLoad": "ctlLoad",
+    "atlLoad": "atlLoad",
+    "weight": "weight",
+    "resting_hr": "restingHR",
+    "hrv": "hrv",
+    "hrv_sdnn": "hrvSDNN",
+    "kcal_consumed": "kcalConsumed",
+    "sleep_secs": "sleepSecs",
+    "sleep_hours": {"from": "sleepSecs", "divide": 3600.0},
+    "sleep_score": "sleepScore",
+    "sleep_quality": "sleepQuality",
+    "avg_sleeping_hr": "avgSleepingHR",
+    "steps": "steps",
+    "updated": "updated",
+}
+
+DEFAULTS = {
+    "activities": DEFAULT_ACTIVITY_FIELDS,
+    "wellness": DEFAULT_WELLNESS_FIELDS,
+}
+
+# Felder, die immer ausgegeben werden (Schlüssel bzw. Änderungserkennung im Store)
+REQUIRED_FIELDS = {
+    "activities": ("id",),
+    "wellness": ("updated",),
+}
+
+# Query-Parameter der API für die Feldauswahl
+API_FIELDS_PARAMS = {
+    "activities": "fields",
+    "wellness": "cols",
+}
+
+# Felder, die für Datum/Filter immer von der API kommen müssen
+REQUIRED_SOURCES = {
+    "activities": ("start_date_local", "start_date"),
+    "wellness": ("id",),
+}
+
+
+def _expression(spec) -> str:
+    """
+    Python-Ausdruck für eine Quelle; `g` ist record.get.
+    """
+    if isinstance(spec, str):
+        return f"g({spec!r})"
+    if isinstance(spec, (list, tuple)):
+        if not spec:
+            raise ValueError("Leere Fallback-Liste in der Feldauswahl")
+        return "(" + " or ".join(f"g({s!r})" for s in spec) + ")"
+    if isinstance(spec, dict) and "from" in spec:
+        source = f"g({spec['from']!r})"
+        divisor = float(spec.get("divide", 1.0))
+        return f"({source} / {divisor!r} if {source} else None)"
+    raise ValueError(f"Ungültige Feldquelle: {spec!r}")
+
+
+def source_fields(projection: dict) -> list[str]:
+    """
+    Alle API-Felder, die eine Projektion liest.
+    """
+    out = []
+    for spec in projection.values():
+        if isinstance(spec, str):
+            names = [spec]
+        elif isinstance(spec, dict):
+            names = [spec["from"]]
+        else:
+            names = list(spec)
+        for name in names:
+            if name not in out:
+                out.append(name)
+    return out
+
+
+def compile_projection(projection: dict, leading: tuple[str, ...] = ()):
+    """
+    Erzeugt extract(record, *leading) -> dict für die Projektion.
+    `leading` sind zusätzliche Argumente, die unverändert als erste Felder
+    ins Ergebnis kommen (z.B. das bereits geparste "date").
+    """
+    for name in leading:
+        if not name.isidentifier():
+            raise ValueError(f"Ungültiger Feldname: {name!r}")
+    items = ", ".join(
+        [f"{name!r}: {name}" for name in leading]
+        + [f"{name!r}: {_expression(spec)}" for name, spec in projection.items()]
+    )
+    args = ", ".join(("record",) + tuple(leading))
+    source = f"def extract({args}):\n    g = record.get\n    return {{{items}}}\n"
+    namespace: dict = {}
+    exec(compile(source, "<field_projection>", "exec"), namespace)
+    return namespace["extract"]
+
+
+def resolve_projection(kind: str, selection=None) -> dict:
+    """
+    Standardfelder (None), Auswahl daraus (Liste) oder eine komplett eigene
+    Zuordnung (Dict). Pflichtfelder kommen immer dazu.
+    """
+    defaults = DEFAULTS[kind]
+    if selection is None:
+        projection = dict(defaults)
+    elif isinstance(selection, dict):
+        projection = dict(selection)
+    else:
+        unknown = [name for name in selection if name not in defaults]
+        if unknown:
+            raise ValueError(
+                f"Unbekannte Felder für {kind}: {', '.join(unknown)} "
+                f"(bekannt: {', '.join(defaults)})"
+            )
+        projection = {name: defaults[name] for name in selection}
+
+    for name in REQUIRED_FIELDS[kind]:
+        projection.setdefault(name, defaults[name])
+    for spec in projection.values():
+        _expression(spec)  # früh validieren
+    return projection
+
+
+def request_fields(kind: str, projection: dict) -> str:
+    """
+    Komma-Liste der API-Felder für den Parameter aus API_FIELDS_PARAMS.
+    """
+    names = list(REQUIRED_SOURCES[kind])
+    names += [n for n in source_fields(projection) if n not in names]
+    return ",".join(names)
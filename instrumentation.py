@@ -0,0 +1,193 @@
+import bisect
+import functools
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Obergrenzen der Latenz-Buckets in Millisekunden (letzter Bucket: "inf")
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_ID_SEGMENTS = (
+    (re.compile(r"/athlete/[^/]+"), "/athlete/{id}"),
+    (re.compile(r"/activity/[^/]+"), "/activity/{id}"),
+    (re.compile(r"/events/\d+"), "/events/{id}"),
+)
+
+
+def normalize_endpoint(method: str, url: str) -> str:
+    """
+    "GET https://.../athlete/i123/events/42" → "GET /athlete/{id}/events/{id}"
+    """
+    path = urlparse(url).path
+    idx = path.find("/athlete/")
+    if idx == -1:
+        idx = path.find("/activity/")
+    if idx > 0:
+        path = path[idx:]
+    for pattern, repl in _ID_SEGMENTS:
+        path = pattern.sub(repl, path)
+    return f"{method.upper()} {path}"
+
+
+class Metrics:
+    """
+    Sammelt Request- und Phasen-Metriken eines Laufs (thread-safe).
+
+    - pro Endpunkt: Anzahl, Fehler, Status-Codes, Antwort-Bytes, Retries,
+      Latenz-Summe/-Maximum und Histogramm (LATENCY_BUCKETS_MS)
+    - pro Phase: Aufrufe, Gesamt- und Maximalzeit
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._t0 = time.perf_counter()
+            self.requests: dict[str, dict] = {}
+            self.phases: dict[str, dict] = {}
+
+    def _endpoint(self, key: str) -> dict:
+        ep = self.requests.get(key)
+        if ep is None:
+            ep = self.requests[key] = {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "status": Counter(),
+                "response_bytes": 0,
+                "latency_ms_sum": 0.0,
+                "latency_ms_max": 0.0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        return ep
+
+    def record_request(
+        self,
+        method: str,
+        url: str,
+        status: int | None,
+        elapsed_s: float,
+        response_bytes: int = 0,
+        error: bool = False,
+    ):
+        key = normalize_endpoint(method, url)
+        ms = elapsed_s * 1000.0
+        with self._lock:
+            ep = self._endpoint(key)
+            ep["count"] += 1
+            if error or status is None or status >= 400:
+                ep["errors"] += 1
+            ep["status"][str(status) if status is not None else "error"] += 1
+            ep["response_bytes"] += response_bytes
+            ep["latency_ms_sum"] += ms
+            ep["latency_ms_max"] = max(ep["latency_ms_max"], ms)
+            ep["histogram"][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    def record_retry(self, method: str, url: str):
+        key = normalize_endpoint(method, url)
+        with self._lock:
+            self._endpoint(key)["retries"] += 1
+
+    def add_phase_time(self, name: str, elapsed_s: float):
+        with self._lock:
+            ph = self.phases.get(name)
+            if ph is None:
+                ph = self.phases[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0}
+            ph["calls"] += 1
+            ph["total_s"] += elapsed_s
+            ph["max_s"] = max(ph["max_s"], elapsed_s)
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.perf_counter() - t0)
+
+    def timed(self, name: str | None = None):
+        """
+        Decorator: misst jede Ausführung der Funktion als Phase.
+        """
+        def decorator(fn):
+            phase_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add_phase_time(phase_name, time.perf_counter() - t0)
+            return wrapper
+        return decorator
+
+    def report(self, **extra) -> dict:
+        """
+        Maschinenlesbarer Report (JSON-serialisierbar).
+        """
+        with self._lock:
+            requests_out = {}
+            for key, ep in sorted(self.requests.items()):
+                count = ep["count"]
+                requests_out[key] = {
+                    "count": count,
+                    "errors": ep["errors"],
+                    "retries": ep["retries"],
+                    "status": dict(ep["status"]),
+                    "response_bytes": ep["response_bytes"],
+                    "latency_ms": {
+                        "mean": round(ep["latency_ms_sum"] / count, 2) if count else None,
+                        "max": round(ep["latency_ms_max"], 2),
+                        "buckets": [*LATENCY_BUCKETS_MS, "inf"],
+                        "histogram": list(ep["histogram"]),
+                    },
+                }
+            phases_out = {
+                name: {
+                    "calls": ph["calls"],
+                    "total_s": round(ph["total_s"], 6),
+                    "max_s": round(ph["max_s"], 6),
+                }
+                for name, ph in sorted(self.phases.items())
+            }
+            totals = {
+                "requests": sum(ep["count"] for ep in self.requests.values()),
+                "errors": sum(ep["errors"] for ep in self.requests.values()),
+                "retries": sum(ep["retries"] for ep in self.requests.values()),
+                "response_bytes": sum(ep["response_bytes"] for ep in self.requests.values()),
+            }
+            return {
+                **extra,
+                "started_at": time.strftime(
+                    "%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+                "wall_s": round(time.perf_counter() - self._t0, 6),
+                "totals": totals,
+                "requests": requests_out,
+                "phases": phases_out,
+            }
+
+    def write_report(self, path: str, **extra):
+        """
+        Schreibt den Report nach `path` ("-" = stderr, damit er sich nicht
+        mit Fortschrittsausgaben oder Daten auf stdout mischt).
+        """
+        data = self.report(**extra)
+        if path == "-":
+            json.dump(data, sys.stderr, indent=2)
+            sys.stderr.write("\n")
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+# Prozessweite Standard-Instanz, die Client und Scripts gemeinsam nutzen
+METRICS = Metrics()
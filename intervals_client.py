@@ -0,0 +1,421 @@
+import codecs
+import email.utils
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import METRICS, Metrics
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_WORKERS = 4
+
+# Retry-Verhalten bei 429/5xx und Verbindungsfehlern
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+# Längere Retry-After-Vorgaben nicht abwarten, sondern die Antwort zurückgeben
+DEFAULT_MAX_RETRY_AFTER = 300.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Blockgröße beim inkrementellen Dekodieren gestreamter JSON-Antworten
+JSON_STREAM_CHUNK = 64 * 1024
+
+
+class StreamInterrupted(requests.ConnectionError):
+    """
+    Verbindungsfehler beim Lesen eines gestreamten Bodys.
+
+    Der Request selbst war erfolgreich (und wurde ggf. schon vom Client
+    wiederholt) – nur das Nachladen der Daten brach ab. Aufrufer können
+    den ganzen Abruf gezielt neu starten.
+    """
+
+
+class TokenBucket:
+    """
+    Token-Bucket zum Takten von Requests (thread-safe).
+
+    rate: Tokens pro Sekunde (dauerhaft erlaubte Request-Rate)
+    burst: maximale Anzahl angesparter Tokens (kurzfristige Spitzen)
+
+    pause(seconds) sperrt den Bucket für alle Threads, z.B. nach einem 429
+    mit Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        """
+        Blockiert, bis ein Token verfügbar ist.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    if self.rate > 0:
+                        self.tokens = min(
+                            self.capacity,
+                            self.tokens + (now - self.updated) * self.rate,
+                        )
+                    else:
+                        self.tokens = self.capacity
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Retry-After als Sekunden oder HTTP-Datum → Wartezeit in Sekunden.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Erzeugt eine requests.Session mit Connection-Pool.
+    Alle Requests über diese Session teilen sich TCP/TLS-Verbindungen
+    (Keep-Alive), statt für jeden Aufruf neu zu verbinden.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class IntervalsClient:
+    """
+    Dünner Wrapper um eine gepoolte Session für die Intervals.icu API.
+    Kapselt Basis-URL, Athlete-ID und Auth ("API_KEY:<api_key>" Basic Auth).
+
+    Die Session ist thread-safe genug für parallele GETs/PUTs aus einem
+    ThreadPoolExecutor, solange pool_size >= Anzahl Worker ist.
+
+    Jeder Request wird in `metrics` (Standard: instrumentation.METRICS)
+    mit Endpunkt, Status, Latenz und Antwortgröße erfasst.
+
+    Rate-Limits: alle Requests laufen durch einen Token-Bucket
+    (rate_per_sec=0 → ungebremst). Bei 429/5xx bzw. Verbindungsfehlern werden
+    idempotente Requests (GET/PUT/DELETE) bis zu max_retries Mal mit
+    exponentiellem Backoff + Jitter wiederholt; POST nur bei 429, da der
+    Server ihn dann nachweislich nicht verarbeitet hat. Ein Retry-After
+    des Servers ist die Mindestwartezeit und pausiert den Bucket für alle
+    Threads; verlangt er mehr als max_retry_after Sekunden, wird nicht
+    gewartet, sondern die 429/503-Antwort sofort zurückgegeben.
+
+    Mit stream=True wird der Body nicht vorab gelesen (siehe
+    iter_json_array); als Antwortgröße zählt dann Content-Length, also die
+    (ggf. komprimierte) Größe auf der Leitung.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        athlete_id: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        metrics: Metrics | None = None,
+        rate_per_sec: float = 0,
+        burst: float | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.athlete_id = athlete_id
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = session or create_session()
+        self.metrics = metrics or METRICS
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def from_config(cls, config: dict, session: requests.Session | None = None):
+        http_cfg = config.get("http", {})
+        if session is None:
+            session = create_session(
+                http_cfg.get("pool_size", DEFAULT_POOL_SIZE))
+        return cls(
+            base_url=config["base_url"],
+            athlete_id=config["athlete_id"],
+            api_key=config["api_key"],
+            session=session,
+            timeout=http_cfg.get("timeout", DEFAULT_TIMEOUT),
+            rate_per_sec=http_cfg.get("rate_per_sec", 0),
+            burst=http_cfg.get("burst"),
+            max_retries=http_cfg.get("max_retries", DEFAULT_MAX_RETRIES),
+            backoff_base=http_cfg.get("backoff_base", DEFAULT_BACKOFF_BASE),
+            backoff_max=http_cfg.get("backoff_max", DEFAULT_BACKOFF_MAX),
+            max_retry_after=http_cfg.get("max_retry_after", DEFAULT_MAX_RETRY_AFTER),
+        )
+
+    def auth(self):
+        return ("API_KEY", self.api_key)
+
+    def athlete_url(self, path: str = "") -> str:
+        """
+        URL unterhalb von /athlete/<id>, z.B. athlete_url("events/bulk").
+        """
+        url = f"{self.base_url}/athlete/{self.athlete_id}"
+        if path:
+            url += "/" + path.lstrip("/")
+        return url
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Exponentielles Backoff mit "full jitter": zufällig in [0, base * 2^attempt].
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("auth", self.auth())
+        kwargs.setdefault("timeout", self.timeout)
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        stream = kwargs.get("stream", False)
+
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.metrics.record_request(
+                    method, url, None, time.perf_counter() - t0, error=True)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            except requests.RequestException:
+                self.metrics.record_request(
+                    method, url, None, time.perf_counter() - t0, error=True)
+                raise
+            else:
+                if stream:
+                    size = int(resp.headers.get("Content-Length") or 0)
+                else:
+                    size = len(resp.content)
+                self.metrics.record_request(
+                    method, url, resp.status_code, time.perf_counter() - t0, size)
+                status = resp.status_code
+                retryable = status in RETRY_STATUSES and (idempotent or status == 429)
+                if not retryable or attempt >= self.max_retries:
+                    return resp
+
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    if retry_after > self.max_retry_after:
+                        return resp
+                    # nie früher als vom Server verlangt
+                    delay = max(retry_after, self.backoff_delay(attempt)) + random.uniform(0, 0.1)
+                else:
+                    delay = self.backoff_delay(attempt)
+                if status == 429:
+                    # alle Threads dieses Clients bremsen, nicht nur diesen
+                    self.bucket.pause(delay)
+                # Verbindung freigeben, auch wenn der Body nie gelesen wurde
+                resp.close()
+
+            attempt += 1
+            self.metrics.record_retry(method, url)
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def iter_json_array(
+    resp: requests.Response,
+    chunk_size: int = JSON_STREAM_CHUNK,
+    metrics: Metrics | None = None,
+    phase: str = "json_decode",
+):
+    """
+    Liefert die Elemente eines JSON-Arrays einzeln, während die Antwort
+    (mit stream=True geholt) blockweise gelesen und entpackt wird.
+
+    Im Speicher liegt nie der ganze Body, sondern nur der aktuelle Block und
+    das gerade dekodierte Element. Die Antwort wird am Ende geschlossen.
+
+    Die Zeit für Lesen und Dekodieren (ohne die Verarbeitung beim Aufrufer)
+    wird pro Antwort als Phase `phase` in metrics (Standard: METRICS) erfasst.
+    """
+    metrics = metrics or METRICS
+    items = _decode_json_array(resp, chunk_size)
+    elapsed = 0.0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - t0
+            yield item
+    finally:
+        items.close()
+        metrics.add_phase_time(phase, elapsed)
+
+
+def _decode_json_array(resp: requests.Response, chunk_size: int):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = resp.iter_content(chunk_size=chunk_size)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        # Rest des Puffers behalten, nächsten Block anhängen
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = next(chunks, None)
+        except requests.RequestException as e:
+            raise StreamInterrupted(f"Antwort unvollständig gelesen: {e}") from e
+        if chunk is None:
+            eof = True
+            buf, pos = buf[pos:] + utf8.decode(b"", final=True), 0
+        else:
+            buf, pos = buf[pos:] + utf8.decode(chunk), 0
+        return True
+
+    def skip_ws() -> str | None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    try:
+        if skip_ws() != "[":
+            raise ValueError("JSON-Antwort ist kein Array")
+        pos += 1
+        if skip_ws() == "]":
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            if (end == len(buf) or buf[end] not in ",] \t\r\n") and fill():
+                # Element am Blockende evtl. abgeschnitten (z.B. Zahl "-1|.5")
+                # – mit mehr Daten neu dekodieren
+                continue
+            pos = end
+            yield item
+            sep = skip_ws()
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Ungültiges JSON-Array: {sep!r} statt ',' oder ']'")
+            pos += 1
+            skip_ws()
+    finally:
+        resp.close()
+
+
+def execute_requests(
+    client: IntervalsClient,
+    jobs: list[dict],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_result=None,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Führt viele unabhängige Requests über einen Worker-Pool mit begrenzter
+    Parallelität aus.
+
+    Jeder Job ist ein Dict mit "method", "url", optional "json" und einem
+    frei wählbaren "label" (z.B. Event-ID) für Ausgaben.
+
+    Fehler brechen nicht ab, sondern werden gesammelt. Rückgabe:
+    (erfolgreiche, fehlgeschlagene) Ergebnisse, jeweils als Dict mit
+    job, ok, status, text, error. on_result(result) wird pro fertigem
+    Request im aufrufenden Thread aufgerufen (z.B. für Fortschritt).
+    """
+    succeeded: list[dict] = []
+    failed: list[dict] = []
+    if not jobs:
+        return succeeded, failed
+
+    def run(job):
+        kwargs = {"json": job["json"]} if "json" in job else {}
+        return client.request(job["method"], job["url"], **kwargs)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(run, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            result = {"job": job, "ok": False, "status": None, "text": None, "error": None}
+            try:
+                resp = fut.result()
+                result["ok"] = resp.ok
+                result["status"] = resp.status_code
+                result["text"] = resp.text
+            except requests.RequestException as e:
+                result["error"] = str(e)
+
+            (succeeded if result["ok"] else failed).append(result)
+            if on_result:
+                on_result(result)
+
+    return succeeded, failed
@@ -0,0 +1,543 @@
+"""
+Soll-Ist-Abgleich: geplante Workouts gegen absolvierte Aktivitäten.
+
+Beide Seiten werden einmal in Sitzungen übersetzt und nach (Tag, Sportart)
+indiziert. Der Abgleich läuft in einem Durchgang über die geplanten
+Sitzungen; jede schaut nur in ihren eigenen Index-Eintrag (und bei
+match_days > 0 in die Nachbartage) statt über alle Aktivitäten – der
+Aufwand wächst linear mit der Anzahl Sitzungen, auch über Jahre.
+
+- Sportarten werden über SPORT_GROUPS zusammengefasst
+  (z.B. VirtualRide und GravelRide erfüllen ein geplantes Ride).
+- Pro Tag und Sportart werden die längste geplante mit der längsten
+  Aktivität gepaart usw.; übrig gebliebene Sitzungen dürfen danach um bis
+  zu match_days Tage verschoben zugeordnet werden.
+- Geplante Last: "training_load" aus dem Plan, sonst aus den Steps
+  geschätzt (Dauer × IF² × 100, IF über die Zonentabelle aus dem Export).
+
+Standalone:
+    python plan_compliance.py -o plan_compliance.json
+    python plan_compliance.py --coach-data coach_columns --start 2024-01-01
+"""
+
+import argparse
+import datetime
+import time
+from pathlib import Path
+
+import numpy as np
+
+from coach_analytics import write_analytics
+from coach_columns import ColumnStore
+from coach_data_io import iter_coach_data
+from config_loader import load_config
+from instrumentation import METRICS
+from plan_files import json_loads, parse_plan_data, read_plan_dir_files, split_workouts_by_date
+from plan_generator import iter_plan, load_plan_spec
+from roster import load_roster, select_athletes
+from workout_export import ZONE_FTP_PCT, power_segments
+from workout_steps import compile_steps, planned_seconds
+
+config = load_config()
+
+COMPLIANCE_CFG = config.get("compliance", {})
+COMPLIANCE_FILE = config.get("paths", {}).get("compliance_output", "plan_compliance.json")
+# Wie viele Tage eine Sitzung verschoben sein darf und trotzdem zählt
+MATCH_DAYS = COMPLIANCE_CFG.get("match_days", 1)
+
+# Aktivitätstypen von Intervals.icu → Gruppe für den Abgleich
+SPORT_GROUPS = {
+    "Ride": ("Ride", "VirtualRide", "GravelRide", "MountainBikeRide", "EBikeRide",
+             "EMountainBikeRide", "TrackRide", "Velomobile", "Handcycle"),
+    "Run": ("Run", "VirtualRun", "TrailRun"),
+    "Swim": ("Swim", "OpenWaterSwim"),
+    "WeightTraining": ("WeightTraining", "Strength", "Gym", "Kraft", "Crossfit"),
+    "Row": ("Rowing", "VirtualRow", "Row"),
+}
+
+
+def sport_lookup(groups: dict) -> dict:
+    """
+    Typ (klein geschrieben) → Gruppe; unbekannte Typen bilden eine eigene Gruppe.
+    """
+    return {t.lower(): group for group, types in groups.items() for t in (group, *types)}
+
+
+def _group(sport: str | None, lookup: dict) -> str:
+    sport = sport or "Unknown"
+    return lookup.get(sport.lower(), sport)
+
+
+def estimate_load(steps: tuple, zones: dict) -> float | None:
+    """
+    Geschätzte Trainingslast aus kompilierten Steps: Stunden × IF² × 100
+    (bei Rampen mit dem Mittel aus Start- und Zielwert).
+    """
+    try:
+        segments = power_segments(steps, zones)
+    except ValueError:
+        return None
+    if not segments:
+        return None
+    return sum(s / 3600 * ((a + b) / 2) ** 2 * 100 for s, a, b, _ in segments)
+
+
+def planned_sessions(workouts, zones: dict, lookup: dict, start: str, end: str) -> list[dict]:
+    """
+    Geplante Workouts im Bereich start ≤ date ≤ end als Sitzungen.
+    """
+    sessions = []
+    for w in workouts:
+        date = w.get("date")
+        if not date or not (start <= date <= end):
+            continue
+        sport = w.get("sport") or w.get("type") or "Ride"
+        try:
+            steps = compile_steps(w.get("steps"))
+            seconds = planned_seconds(w, steps)
+        except ValueError:
+            steps, seconds = (), planned_seconds({**w, "steps": None})
+        load = w.get("training_load")
+        if load is None and steps:
+            load = estimate_load(steps, zones)
+        sessions.append({
+            "plan_id": w.get("plan_id"),
+            "date": date,
+            "day": datetime.date.fromisoformat(date).toordinal(),
+            "sport": sport,
+            "group": _group(sport, lookup),
+            "name": w.get("name"),
+            "seconds": seconds,
+            "load": load,
+        })
+    return sessions
+
+
+def _activity_session(a: dict, date: str, lookup: dict) -> dict:
+    return {
+        "id": a.get("id"),
+        "date": date,
+        "day": datetime.date.fromisoformat(date).toordinal(),
+        "sport": a.get("type") or "Unknown",
+        "group": _group(a.get("type"), lookup),
+        "name": a.get("name"),
+        "seconds": a.get("moving_s") if a.get("moving_s") is not None else a.get("duration_s"),
+        "load": a.get("training_load"),
+    }
+
+
+def actual_sessions_from_days(days, lookup: dict, start: str | None, end: str | None):
+    """
+    Aktivitäten aus den Tagesobjekten (combine_coach_data / Ausgabedatei).
+    Rückgabe: (Sitzungen, erster Tag, letzter Tag der Daten).
+    """
+    sessions = []
+    first = last = None
+    for day in days:
+        date = day["date"]
+        if (start and date < start) or (end and date > end):
+            continue
+        first = first or date
+        last = date
+        for a in day.get("activities") or []:
+            sessions.append(_activity_session(a, a.get("date") or date, lookup))
+    return sessions, first, last
+
+
+def actual_sessions_from_store(store: ColumnStore, lookup: dict, start: str | None, end: str | None):
+    """
+    Wie actual_sessions_from_days(), liest aber nur die benötigten Spalten
+    aus einem Spaltenverzeichnis (coach_columns.ColumnStore).
+    """
+    if store.start is None:
+        return [], None, None
+    first = max(start or store.start, store.start)
+    last = min(end or store.end, store.end)
+    if first > last:
+        return [], None, None
+    available = set(store.fields("activities"))
+    fields = [f for f in ("date", "id", "name", "type", "moving_s", "duration_s", "training_load")
+              if f in available]
+    data = store.read("activities", fields, first, last, decode=True)
+    dates = [str(d) for d in data["date"]]
+    columns = {
+        f: [None if v != v else v for v in data[f].tolist()]  # NaN → None
+        for f in fields if f != "date"
+    }
+    sessions = [
+        _activity_session({f: col[i] for f, col in columns.items()}, date, lookup)
+        for i, date in enumerate(dates)
+    ]
+    return sessions, first, last
+
+
+def _index(sessions: list[dict]) -> dict:
+    """
+    (Tag, Gruppe) → Indizes der Sitzungen, längste zuerst.
+    """
+    index: dict[tuple, list[int]] = {}
+    for i, s in enumerate(sessions):
+        index.setdefault((s["day"], s["group"]), []).append(i)
+    for ids in index.values():
+        ids.sort(key=lambda i: -(sessions[i]["seconds"] or 0))
+    return index
+
+
+def _closest(candidates: list[int], sessions: list[dict], seconds) -> int:
+    """
+    Position der Sitzung mit der ähnlichsten Dauer in `candidates`.
+    """
+    if seconds is None or len(candidates) == 1:
+        return 0
+    return min(
+        range(len(candidates)),
+        key=lambda k: abs((sessions[candidates[k]]["seconds"] or 0) - seconds),
+    )
+
+
+def _pair(plan_ids: list[int], candidates: list[int], planned, actual, offset: int, matches: dict):
+    """
+    Paart die Sitzungen zweier Index-Einträge (beide nach Dauer sortiert):
+    gleich viele der Reihe nach, sonst sucht jede Sitzung der kleineren
+    Seite die mit der ähnlichsten Dauer auf der anderen.
+    """
+    if len(plan_ids) == len(candidates):
+        for p, a in zip(plan_ids, candidates):
+            matches[p] = (a, offset)
+        plan_ids.clear()
+        candidates.clear()
+    elif len(plan_ids) < len(candidates):
+        for p in plan_ids:
+            matches[p] = (candidates.pop(_closest(candidates, actual, planned[p]["seconds"])), offset)
+        plan_ids.clear()
+    else:
+        for a in candidates:
+            matches[plan_ids.pop(_closest(plan_ids, planned, actual[a]["seconds"]))] = (a, offset)
+        candidates.clear()
+
+
+def match_sessions(planned: list[dict], actual: list[dict], match_days: int = MATCH_DAYS):
+    """
+    Ordnet geplanten Sitzungen Aktivitäten zu.
+    Rückgabe: {Index geplant: (Index Aktivität, Verschiebung in Tagen)}
+    und die Indizes der Aktivitäten ohne Plan.
+    """
+    planned_index = _index(planned)
+    free = _index(actual)
+    matches: dict[int, tuple[int, int]] = {}
+
+    # 1. gleicher Tag, gleiche Sportart
+    for key, plan_ids in planned_index.items():
+        if free.get(key):
+            _pair(plan_ids, free[key], planned, actual, 0, matches)
+
+    # 2. übrig gebliebene Sitzungen in den Nachbartagen suchen
+    for shift in range(1, max(0, match_days) + 1):
+        for (day, group), plan_ids in planned_index.items():
+            for offset in (-shift, shift):
+                candidates = free.get((day + offset, group))
+                if plan_ids and candidates:
+                    _pair(plan_ids, candidates, planned, actual, offset, matches)
+
+    unplanned = sorted(i for ids in free.values() for i in ids)
+    return matches, unplanned
+
+
+def _pct(actual, planned) -> float | None:
+    if not planned or actual is None:
+        return None
+    return round(100.0 * actual / planned, 1)
+
+
+_COUNT_COLUMNS = ("planned", "completed", "missed", "unplanned")
+_SECONDS_COLUMNS = ("planned_s", "actual_s", "unplanned_s")
+_LOAD_COLUMNS = ("planned_load", "actual_load")
+
+
+def _row_columns(planned: list[dict], actual: list[dict], matches: dict, unplanned: list[int]) -> dict:
+    """
+    Spalten mit einer Zeile pro geplanter Sitzung und pro Aktivität ohne
+    Plan; Ist-Werte zählen nur für zugeordnete Aktivitäten.
+    """
+    done = [actual[matches[i][0]] if i in matches else None for i in range(len(planned))]
+    extra = [actual[i] for i in unplanned]
+    none = [0.0] * len(extra)
+
+    def col(values):
+        return np.array(values, dtype=float)
+
+    is_planned = col([1.0] * len(planned) + none)
+    completed = col([a is not None for a in done] + none)
+    return {
+        "day": np.array([p["day"] for p in planned] + [a["day"] for a in extra], dtype=np.int64),
+        "planned": is_planned,
+        "completed": completed,
+        "missed": is_planned - completed,
+        "unplanned": 1.0 - is_planned,
+        "planned_s": col([p["seconds"] or 0 for p in planned] + none),
+        "actual_s": col([(a["seconds"] or 0) if a else 0 for a in done] + none),
+        "unplanned_s": col([0.0] * len(planned) + [a["seconds"] or 0 for a in extra]),
+        "planned_load": col([p["load"] or 0 for p in planned] + none),
+        "actual_load": col([(a["load"] or 0) if a else 0 for a in done] + none),
+    }
+
+
+def _totals(cols: dict, key: np.ndarray, n: int) -> dict:
+    return {
+        f: np.bincount(key, weights=cols[f], minlength=n)
+        for f in _COUNT_COLUMNS + _SECONDS_COLUMNS + _LOAD_COLUMNS
+    }
+
+
+def _summary(values: dict) -> dict:
+    row = {f: int(round(values[f])) for f in _COUNT_COLUMNS + _SECONDS_COLUMNS}
+    row.update({f: round(values[f], 1) for f in _LOAD_COLUMNS})
+    row["completion_pct"] = _pct(row["completed"], row["planned"])
+    row["duration_pct"] = _pct(row["actual_s"], row["planned_s"])
+    row["load_pct"] = _pct(row["actual_load"], row["planned_load"])
+    return row
+
+
+def _rows(totals: dict, first: int, step: int, label: str) -> list[dict]:
+    """
+    Tage bzw. Wochen mit geplanten Sitzungen oder Aktivitäten als Zeilen.
+    """
+    used = np.flatnonzero(totals["planned"] + totals["unplanned"])
+    columns = {f: v[used].tolist() for f, v in totals.items()}
+    return [
+        {
+            label: datetime.date.fromordinal(first + step * int(k)).isoformat(),
+            **_summary({f: col[i] for f, col in columns.items()}),
+        }
+        for i, k in enumerate(used)
+    ]
+
+
+def compute_compliance(
+    planned: list[dict],
+    actual: list[dict],
+    start: str,
+    end: str,
+    match_days: int = MATCH_DAYS,
+) -> dict:
+    """
+    Kompletter Report als JSON-serialisierbares Dict:
+    - sessions: jede geplante Sitzung mit zugeordneter Aktivität und
+      Abweichung von Dauer und Last (Ist in % vom Soll)
+    - missed / unplanned: nicht absolvierte Sitzungen bzw. Aktivitäten ohne Plan
+    - daily / weekly (Montag-basiert): Anzahl geplant/absolviert/verpasst,
+      Soll/Ist-Dauer und -Last; Ist zählt nur zugeordnete Aktivitäten
+    Tage und Wochen werden über das geplante Datum zugeordnet.
+    """
+    matches, unplanned = match_sessions(planned, actual, match_days)
+
+    # Summen pro Tag und Woche ohne Python-Schleife über die Sitzungen
+    cols = _row_columns(planned, actual, matches, unplanned)
+    first = int(cols["day"].min()) if len(cols["day"]) else 1
+    # Ordinal 1 (0001-01-01) war ein Montag
+    first_monday = first - (first - 1) % 7
+    day_key = cols["day"] - first
+    week_key = (cols["day"] - first_monday) // 7
+    n_days = int(day_key.max()) + 1 if len(day_key) else 0
+    daily = _totals(cols, day_key, n_days)
+    weekly = _totals(cols, week_key, n_days // 7 + 2)
+
+    sessions = []
+    missed = []
+    for i, p in enumerate(planned):
+        match = matches.get(i)
+        entry = {
+            "plan_id": p["plan_id"],
+            "date": p["date"],
+            "sport": p["sport"],
+            "name": p["name"],
+            "planned_s": p["seconds"],
+            "planned_load": None if p["load"] is None else round(p["load"], 1),
+        }
+        if match is None:
+            missed.append(p["plan_id"])
+            entry["status"] = "missed"
+        else:
+            a = actual[match[0]]
+            entry.update(
+                status="completed",
+                activity_id=a["id"],
+                activity_date=a["date"],
+                activity_sport=a["sport"],
+                shift_days=match[1],
+                actual_s=a["seconds"],
+                actual_load=a["load"],
+                duration_pct=_pct(a["seconds"], p["seconds"]),
+                load_pct=_pct(a["load"], p["load"]),
+            )
+        sessions.append(entry)
+
+    sessions.sort(key=lambda s: (s["date"], s["plan_id"] or ""))
+    return {
+        "range": {"start": start, "end": end},
+        "match_days": match_days,
+        "summary": _summary({f: float(v.sum()) for f, v in daily.items()}),
+        "daily": _rows(daily, first, 1, "date"),
+        "weekly": _rows(weekly, first_monday, 7, "week_start"),
+        "sessions": sessions,
+        "missed": sorted(missed, key=str),
+        "unplanned": [
+            {k: actual[i][k] for k in ("id", "date", "sport", "name", "seconds", "load")}
+            for i in unplanned
+        ],
+    }
+
+
+@METRICS.timed()
+def load_plan_range(
+    start: str,
+    plan_dir: str | None = None,
+    plan_file: str | None = None,
+    plan_spec: str | None = None,
+    parse_workers: int | None = None,
+) -> list[dict]:
+    """
+    Alle Plan-Workouts ab `start` (auch vergangene, anders als beim Upload).
+    Quelle: plan_spec (Block-Spezifikation), sonst plan_dir, sonst plan_file.
+    """
+    if plan_spec:
+        return list(iter_plan(load_plan_spec(plan_spec),
+                              datetime.date.fromisoformat(start)))
+    if plan_dir:
+        files = sorted(Path(plan_dir).glob("*.json"))
+        workouts = []
+        # Untergrenze statt "heute": vergangene Workouts bleiben erhalten
+        for result in read_plan_dir_files(
+            [(str(f), start, None) for f in files], parse_workers
+        ):
+            if result["status"] == "parsed":
+                workouts.extend(result["workouts"])
+            elif result["status"] == "error":
+                print(f"Fehler beim Laden von {result['path']}: {result['error']}")
+        return workouts
+    if plan_file:
+        data = parse_plan_data(json_loads(Path(plan_file).read_bytes()), plan_file)
+        workouts, _, _, _ = split_workouts_by_date(data, datetime.date.fromisoformat(start))
+        return workouts
+    raise RuntimeError("Weder plan_spec, plan_dir noch plan_file angegeben.")
+
+
+@METRICS.timed()
+def run_compliance(args, cfg: dict = config, output: str = COMPLIANCE_FILE) -> dict:
+    paths = cfg.get("paths", {})
+    lookup = sport_lookup({**SPORT_GROUPS, **cfg.get("compliance", {}).get("sport_groups", {})})
+    zones = {**ZONE_FTP_PCT, **cfg.get("export", {}).get("zones", {})}
+    source = args.coach_data or paths.get("weekly_output", "weekly_coach_data.json")
+
+    t0 = time.perf_counter()
+    with METRICS.phase("load_actual"):
+        if Path(source).is_dir():
+            actual, first, last = actual_sessions_from_store(
+                ColumnStore(source), lookup, args.start, args.end)
+        else:
+            actual, first, last = actual_sessions_from_days(
+                iter_coach_data(source), lookup, args.start, args.end)
+    # Ohne Ist-Daten keine Aussage – Bereich endet mit dem letzten Datentag
+    start = args.start or first
+    end = args.end or last
+    if not start or not end:
+        raise ValueError(f"Keine Coach-Daten im gewählten Zeitraum ({source}).")
+
+    with METRICS.phase("load_plan"):
+        workouts = load_plan_range(
+            start,
+            plan_dir=None if args.plan_file else args.plan_dir or paths.get("plan_dir"),
+            plan_file=args.plan_file or paths.get("plan_file"),
+            # explizite --plan-dir/--plan-file haben Vorrang vor paths.plan_spec
+            plan_spec=args.spec or (
+                None if args.plan_dir or args.plan_file else paths.get("plan_spec")),
+            parse_workers=args.max_workers,
+        )
+        planned = planned_sessions(workouts, zones, lookup, start, end)
+
+    with METRICS.phase("match"):
+        report = compute_compliance(planned, actual, start, end, args.match_days)
+    write_analytics(report, output)
+
+    if output != "-":
+        s = report["summary"]
+        print(
+            f"Soll/Ist {start} bis {end}: {s['completed']}/{s['planned']} Sitzungen "
+            f"absolviert ({s['completion_pct'] or 0}%), {s['missed']} verpasst, "
+            f"{s['unplanned']} ohne Plan; Dauer {s['duration_pct'] or 0}%, "
+            f"Last {s['load_pct'] or 0}% vom Soll – gespeichert in {output} "
+            f"({time.perf_counter() - t0:.2f}s)"
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Soll-Ist-Abgleich: geplante Workouts gegen absolvierte Aktivitäten"
+    )
+    parser.add_argument(
+        "--coach-data",
+        help=(
+            "Ausgabedatei von fetch_coach_data.py (JSON/NDJSON) oder "
+            "Spaltenverzeichnis (Standard: paths.weekly_output)."
+        ),
+    )
+    parser.add_argument("--plan-dir", help="Trainingsverzeichnis (Standard: paths.plan_dir).")
+    parser.add_argument("--plan-file", help="Einzelne Plan-Datei statt plan_dir.")
+    parser.add_argument(
+        "--spec", help="Plan aus einer Block-Spezifikation erzeugen (Standard: paths.plan_spec).")
+    parser.add_argument("--start", help="Erster Tag (Standard: erster Tag der Coach-Daten).")
+    parser.add_argument("--end", help="Letzter Tag (Standard: letzter Tag der Coach-Daten).")
+    parser.add_argument(
+        "--match-days",
+        type=int,
+        default=MATCH_DAYS,
+        help=f"Um so viele Tage verschobene Sitzungen zählen noch (Standard: {MATCH_DAYS}).",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Anzahl Prozesse zum Parsen der Plan-Dateien (Standard: CPU-Kerne).",
+    )
+    parser.add_argument(
+        "--output", "-o",
+        default=COMPLIANCE_FILE,
+        help=f"Zieldatei für den Report (Standard: {COMPLIANCE_FILE}, '-' = stdout).",
+    )
+    parser.add_argument(
+        "--all-athletes",
+        action="store_true",
+        help="Für alle Athleten im Kader auswerten (jeweils eigene Pfade).",
+    )
+    parser.add_argument(
+        "--athletes",
+        help="Nur diese Athleten aus dem Kader (komma-getrennte Namen).",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Phasen messen und am Ende als JSON-Report schreiben (ohne PATH auf stderr).",
+    )
+    args = parser.parse_args()
+    if (args.all_athletes or args.athletes) and (args.plan_dir or args.plan_file):
+        # jeder Athlet hat seinen eigenen Plan (paths im Kader)
+        parser.error("--plan-dir/--plan-file gelten nur für einen einzelnen Athleten.")
+
+    try:
+        if args.all_athletes or args.athletes:
+            for athlete_cfg in select_athletes(load_roster(config), args.athletes):
+                print(f"\n[{athlete_cfg['name']}]")
+                paths = athlete_cfg["paths"]
+                run_compliance(args, athlete_cfg, paths.get("compliance_output") or str(
+                    Path(COMPLIANCE_FILE).with_suffix(f".{athlete_cfg['name']}.json")))
+        else:
+            run_compliance(args, config, args.output)
+    finally:
+        if args.profile:
+            METRICS.write_report(args.profile, script="plan_compliance", args=vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import datetime
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Optional: schnellerer JSON-Decoder, falls installiert (pip install orjson)
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+# Unterhalb dieser Anzahl Dateien lohnt sich der Start eines Prozess-Pools nicht
+PARALLEL_MIN_FILES = 16
+
+
+def parse_plan_data(data, path) -> list[dict]:
+    """
+    Erwartet eine Liste von Workouts oder ein Dict mit 'trainings'.
+    """
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and "trainings" in data:
+        return data["trainings"]
+
+    raise ValueError(f"Unbekanntes JSON-Format in {path}")
+
+
+def split_workouts_by_date(workouts: list[dict], today: datetime.date):
+    """
+    Filtert Workouts ab `today` heraus.
+    Rückgabe: (Workouts ab heute, frühestes Datum, spätestes Datum,
+    ungültige Datums-Strings) – Datumsangaben als ISO-Strings.
+    """
+    kept: list[dict] = []
+    invalid: list[str] = []
+    min_date = max_date = None
+    for w in workouts:
+        date_str = w.get("date")
+        if not date_str:
+            continue
+        try:
+            d = datetime.date.fromisoformat(date_str)
+        except Exception:
+            invalid.append(date_str)
+            continue
+        iso = d.isoformat()
+        if min_date is None or iso < min_date:
+            min_date = iso
+        if max_date is None or iso > max_date:
+            max_date = iso
+        if d >= today:
+            kept.append(w)
+    return kept, min_date, max_date, invalid
+
+
+def read_plan_dir_file(path: str, today_iso: str, known_sha256: str | None = None) -> dict:
+    """
+    Liest und parst eine Plan-Datei (läuft ggf. in einem Worker-Prozess,
+    daher nur picklebare Argumente und Rückgaben, keine Ausgaben).
+
+    Ist known_sha256 gesetzt und identisch mit dem Datei-Hash, wird nicht
+    geparst (status="unchanged"). Sonst status="parsed", "not_list" oder
+    "error" (mit Meldung in "error").
+    """
+    result = {"path": path, "status": "error", "error": None}
+    try:
+        raw = Path(path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        result["sha256"] = digest
+        if known_sha256 is not None and digest == known_sha256:
+            result["status"] = "unchanged"
+            return result
+
+        file_data = parse_plan_data(json_loads(raw), path)
+        if not isinstance(file_data, list):
+            result["status"] = "not_list"
+            return result
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    kept, min_date, max_date, invalid = split_workouts_by_date(
+        file_data, datetime.date.fromisoformat(today_iso))
+    result.update(
+        status="parsed",
+        workouts=kept,
+        count=len(file_data),
+        min_date=min_date,
+        max_date=max_date,
+        invalid=invalid,
+    )
+    return result
+
+
+def _read_plan_dir_file_args(args):
+    return read_plan_dir_file(*args)
+
+
+def read_plan_dir_files(tasks: list[tuple], max_workers: int | None = None):
+    """
+    Führt read_plan_dir_file() für alle (path, today_iso, known_sha256)-Tupel
+    aus – bei vielen Dateien parallel über einen Prozess-Pool.
+    Die Ergebnisse kommen in derselben Reihenfolge wie die Tasks zurück.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+        return [read_plan_dir_file(*t) for t in tasks]
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_read_plan_dir_file_args, tasks, chunksize=chunksize))
+
+
+def load_plan_workouts(
+    plan_dir: str | None = None,
+    plan_file: str | None = None,
+    from_iso: str = datetime.date.min.isoformat(),
+    max_workers: int | None = None,
+) -> tuple[list[dict], list[str]]:
+    """
+    Alle Workouts ab from_iso (Standard: alle, auch vergangene) aus allen
+    JSON-Dateien in plan_dir, sonst aus plan_file – ohne Manifest und ohne
+    den "ab heute"-Filter des Uploads.
+
+    Rückgabe: (Workouts, Dateien, die nicht gelesen werden konnten).
+    """
+    if plan_dir:
+        d = Path(plan_dir)
+        if not d.exists():
+            raise FileNotFoundError(f"Trainingsverzeichnis nicht gefunden: {plan_dir}")
+        tasks = [(str(f), from_iso, None) for f in sorted(d.glob("*.json"))]
+    elif plan_file:
+        tasks = [(plan_file, from_iso, None)]
+    else:
+        raise RuntimeError("Weder plan_dir noch plan_file in config.paths gesetzt.")
+
+    workouts: list[dict] = []
+    failed: list[str] = []
+    for result in read_plan_dir_files(tasks, max_workers):
+        if result["status"] == "parsed":
+            workouts.extend(result["workouts"])
+            continue
+        print(
+            f"Fehler beim Laden von {result['path']}: "
+            f"{result['error'] or 'kein Array von Workouts'}"
+        )
+        failed.append(result["path"])
+    return workouts, failed
@@ -0,0 +1,237 @@
+"""
+Erzeugt Workouts aus einer kompakten Block-Spezifikation (Periodisierung).
+
+Statt jeden Tag als eigenes Objekt in eine Plan-Datei zu schreiben, wird
+die Saison als Phasen mit Wochenmuster, Progression und Entlastungswochen
+beschrieben. iter_plan() liefert die Workouts lazy (Generator), Tag für
+Tag in Datumsreihenfolge – im Speicher liegt immer nur das aktuelle Workout.
+
+    {
+      "start": "2026-11-02",
+      "id_prefix": "S27",
+      "workouts": {
+        "GA": {"name": "GA1 locker {minutes}min", "type": "Ride", "minutes": 90,
+               "steps": ["{minutes}m Z2 Free intensity=active"]},
+        "SST": {"name": "Sweetspot {reps}×{interval}min", "type": "Ride",
+                "reps": 3, "interval": 8,
+                "steps": ["15m ramp Z1 Free intensity=warmup",
+                          "{reps}x [{interval}m SS 90rpm intensity=active, 5m Z1 Free intensity=recovery]",
+                          "10m Z1 Free intensity=cooldown"]}
+      },
+      "phases": [
+        {"name": "Grundlage", "weeks": 8,
+         "week": {"tue": "SST", "thu": "GA", "sat": {"workout": "GA", "minutes": 150}},
+         "progression": {"minutes": 10, "reps": 1},
+         "rest_every": 4, "rest_factor": 0.6}
+      ]
+    }
+
+- workouts: Vorlagen; Zahlen-Felder sind Parameter, "{name}" in name,
+  description und steps wird ersetzt.
+- week: Wochentag → Vorlage (Name, Dict mit Parameter-Overrides oder Liste).
+- progression: Zuwachs pro Belastungswoche innerhalb der Phase.
+- rest_every: jede n-te Woche ist Entlastungswoche: Parameter × rest_factor
+  (Standard 0.6), optional mit eigenem Muster "rest_week".
+
+Die plan_id ist <id_prefix>-<Datum>-<Vorlage>, damit ein erneutes Erzeugen
+dieselben Events trifft (Upsert über external_id).
+"""
+
+import argparse
+import datetime
+import json
+import sys
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEFAULT_REST_FACTOR = 0.6
+# Felder einer Vorlage, die keine Parameter sind
+TEMPLATE_FIELDS = ("name", "type", "category", "description", "steps")
+
+
+def load_plan_spec(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    validate_spec(spec)
+    return spec
+
+
+def _entries(value) -> list[dict]:
+    """
+    Tageseintrag des Wochenmusters → Liste von {"workout", ...Overrides}.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [e for v in value for e in _entries(v)]
+    if isinstance(value, str):
+        return [{"workout": value}]
+    if isinstance(value, dict) and "workout" in value:
+        return [value]
+    raise ValueError(f"Ungültiger Eintrag im Wochenmuster: {value!r}")
+
+
+def validate_spec(spec: dict):
+    """
+    Prüft die Spezifikation vorab, damit der Generator nicht erst mitten im
+    Upload an einem Tippfehler scheitert.
+    """
+    datetime.date.fromisoformat(spec["start"])
+    templates = spec.get("workouts") or {}
+    if not spec.get("phases"):
+        raise ValueError("Keine Phasen in der Plan-Spezifikation")
+    for key, template in templates.items():
+        try:
+            _fill(template, _params(template))
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Vorlage {key}: Platzhalter ohne Parameter ({e})") from e
+    for phase in spec["phases"]:
+        label = phase.get("name", "?")
+        if int(phase.get("weeks", 0)) < 1:
+            raise ValueError(f"Phase {label}: 'weeks' muss ≥ 1 sein")
+        for key in ("week", "rest_week"):
+            for day, value in (phase.get(key) or {}).items():
+                if day not in WEEKDAYS:
+                    raise ValueError(
+                        f"Phase {label}: unbekannter Wochentag '{day}' "
+                        f"(erlaubt: {', '.join(WEEKDAYS)})"
+                    )
+                for entry in _entries(value):
+                    if entry["workout"] not in templates:
+                        raise ValueError(
+                            f"Phase {label}: unbekannte Vorlage '{entry['workout']}'"
+                        )
+
+
+def _params(template: dict) -> dict:
+    return {
+        k: v for k, v in template.items()
+        if k not in TEMPLATE_FIELDS and isinstance(v, (int, float))
+        and not isinstance(v, bool)
+    }
+
+
+def _scale(value, factor: float):
+    scaled = value * factor
+    return max(1, int(round(scaled))) if isinstance(value, int) else round(scaled, 2)
+
+
+def _fill(value, params: dict):
+    """
+    Ersetzt "{param}" in Strings, auch in verschachtelten Steps.
+    """
+    if isinstance(value, str):
+        return value.format_map(params) if "{" in value else value
+    if isinstance(value, list):
+        return [_fill(v, params) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, params) for k, v in value.items()}
+    return value
+
+
+def expand_workout(
+    template: dict,
+    params: dict,
+    date: datetime.date,
+    plan_id: str,
+    phase: str,
+) -> dict:
+    workout = {
+        "date": date.isoformat(),
+        "plan_id": plan_id,
+        "name": _fill(template.get("name", plan_id), params),
+        "type": template.get("type", "Ride"),
+        "steps": _fill(template.get("steps") or [], params),
+    }
+    if "category" in template:
+        workout["category"] = template["category"]
+    description = _fill(template.get("description", ""), params)
+    workout["description"] = f"{phase}: {description}" if description else phase
+    return workout
+
+
+def iter_plan(spec: dict, from_date: datetime.date | None = None):
+    """
+    Liefert die Workouts der Spezifikation in Datumsreihenfolge.
+    Mit from_date werden frühere Tage übersprungen (ohne sie zu erzeugen).
+    """
+    templates = spec.get("workouts") or {}
+    prefix = spec.get("id_prefix", "GEN")
+    day = datetime.date.fromisoformat(spec["start"])
+
+    for phase in spec["phases"]:
+        name = phase.get("name", "")
+        weeks = int(phase["weeks"])
+        progression = phase.get("progression") or {}
+        rest_every = int(phase.get("rest_every") or 0)
+        rest_factor = float(phase.get("rest_factor", DEFAULT_REST_FACTOR))
+        load_weeks = 0
+
+        for week in range(1, weeks + 1):
+            week_start = day
+            day += datetime.timedelta(days=7)
+            if from_date and day <= from_date:
+                # ganze Woche liegt vor from_date; Progression trotzdem zählen
+                if not (rest_every and week % rest_every == 0):
+                    load_weeks += 1
+                continue
+
+            rest = bool(rest_every) and week % rest_every == 0
+            pattern = phase.get("rest_week") if rest and "rest_week" in phase else phase.get("week")
+            # Entlastung skaliert den Stand der letzten Belastungswoche
+            step = max(0, load_weeks - 1) if rest else load_weeks
+            label = f"{name} W{week}" + (" (Entlastung)" if rest else "")
+
+            for offset in range(7):
+                date = week_start + datetime.timedelta(days=offset)
+                if from_date and date < from_date:
+                    continue
+                seen: dict[str, int] = {}
+                for entry in _entries((pattern or {}).get(WEEKDAYS[date.weekday()])):
+                    key = entry["workout"]
+                    template = templates[key]
+                    params = _params(template)
+                    for p, inc in progression.items():
+                        if p in params:
+                            params[p] = params[p] + inc * step
+                    params.update(
+                        {k: v for k, v in entry.items() if k != "workout"})
+                    if rest:
+                        params = {k: _scale(v, rest_factor) for k, v in params.items()}
+
+                    seen[key] = seen.get(key, 0) + 1
+                    suffix = f"-{seen[key]}" if seen[key] > 1 else ""
+                    plan_id = f"{prefix}-{date.isoformat()}-{key}{suffix}"
+                    yield expand_workout(template, params, date, plan_id, label)
+
+            if not rest:
+                load_weeks += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Plan aus einer Block-Spezifikation erzeugen (JSON-Array)"
+    )
+    parser.add_argument("spec", help="Pfad zur Plan-Spezifikation (JSON).")
+    parser.add_argument("-o", "--output", help="Zieldatei (Standard: stdout).")
+    parser.add_argument(
+        "--from-date",
+        type=datetime.date.fromisoformat,
+        help="Erst ab diesem Datum erzeugen (YYYY-MM-DD).",
+    )
+    args = parser.parse_args()
+
+    spec = load_plan_spec(args.spec)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        # Element für Element schreiben, ohne die Liste aufzubauen
+        sep = "[\n  "
+        for workout in iter_plan(spec, args.from_date):
+            out.write(sep + json.dumps(workout, ensure_ascii=False))
+            sep = ",\n  "
+        out.write("[]\n" if sep.startswith("[") else "\n]\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
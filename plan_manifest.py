@@ -0,0 +1,87 @@
+import json
+import os
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_NAME = ".plan_manifest"
+
+
+class PlanManifest:
+    """
+    Merkt sich pro Plan-Datei mtime, Größe, SHA-256, Anzahl Workouts und das
+    früheste/späteste Workout-Datum.
+
+    Damit kann load_all_workouts() Dateien, die unverändert sind und nur
+    Workouts in der Vergangenheit enthalten, überspringen, ohne sie zu öffnen.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("files", {})
+            except (OSError, ValueError, AttributeError):
+                # kaputtes Manifest → einfach neu aufbauen
+                self.entries = {}
+
+    def get(self, name: str) -> dict | None:
+        return self.entries.get(name)
+
+    @staticmethod
+    def stat_matches(entry: dict, st: os.stat_result) -> bool:
+        return entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size
+
+    @staticmethod
+    def is_past(entry: dict, today_iso: str) -> bool:
+        """
+        True, wenn die Datei kein Workout ab heute enthält.
+        Dateien ohne gültiges Datum zählen ebenfalls als "vergangen".
+        """
+        max_date = entry.get("max_date")
+        return max_date is None or max_date < today_iso
+
+    def update(self, name: str, st: os.stat_result, **info):
+        self.entries[name] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            **info,
+        }
+        self.dirty = True
+
+    def touch(self, name: str, st: os.stat_result):
+        """
+        Inhalt gleich (Hash), nur mtime/Größe neu übernehmen.
+        """
+        entry = self.entries[name]
+        entry["mtime_ns"] = st.st_mtime_ns
+        entry["size"] = st.st_size
+        self.dirty = True
+
+    def prune(self, names):
+        """
+        Entfernt Einträge für Dateien, die es nicht mehr gibt.
+        """
+        keep = set(names)
+        for name in list(self.entries):
+            if name not in keep:
+                del self.entries[name]
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "files": self.entries},
+                f,
+                indent=1,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,206 @@
+import copy
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from intervals_client import DEFAULT_POOL_SIZE, IntervalsClient, create_session
+
+DEFAULT_ATHLETE_WORKERS = 4
+
+# Pfade, die pro Athlet eigenständig sein müssen
+ATHLETE_FILE_PATHS = (
+    "weekly_output", "sync_db", "analytics_output", "plan_file", "plan_manifest",
+    "upload_state", "compliance_output",
+)
+ATHLETE_DIR_PATHS = ("plan_dir", "columnar_dir", "streams_dir", "export_dir")
+
+
+def _personalize_path(template: str, name: str, is_dir: bool) -> str:
+    """
+    "{athlete}" im Pfad wird ersetzt. Ohne Platzhalter:
+    Verzeichnisse bekommen einen Unterordner, Dateien ein Namens-Suffix
+    (weekly_coach_data.json → weekly_coach_data.<name>.json).
+    """
+    if "{athlete}" in template:
+        return template.replace("{athlete}", name)
+    p = Path(template)
+    if is_dir:
+        return str(p / name)
+    return str(p.with_name(f"{p.stem}.{name}{p.suffix}"))
+
+
+def load_roster(config: dict) -> list[dict]:
+    """
+    Liest den Athleten-Kader aus config["athletes"] (Liste) oder aus der
+    Datei paths.roster (Liste oder {"athletes": [...]}).
+
+    Pro Athlet sind "name", "athlete_id" und "api_key" Pflicht; alle übrigen
+    Felder (auch "paths", "http", ...) überschreiben die globale Config.
+    Rückgabe: vollständige Config pro Athlet.
+    """
+    athletes = config.get("athletes")
+    roster_path = config.get("paths", {}).get("roster")
+    if athletes is None and roster_path:
+        with open(roster_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        athletes = data.get("athletes") if isinstance(data, dict) else data
+    if not athletes:
+        raise RuntimeError(
+            "Kein Athleten-Kader gefunden (config.athletes oder paths.roster)."
+        )
+
+    base = {k: v for k, v in config.items() if k != "athletes"}
+    result = []
+    seen = set()
+    for entry in athletes:
+        missing = [k for k in ("name", "athlete_id", "api_key") if not entry.get(k)]
+        if missing:
+            raise ValueError(f"Athlet {entry!r}: fehlende Felder {missing}")
+        name = entry["name"]
+        if name in seen:
+            raise ValueError(f"Athletenname doppelt im Kader: {name}")
+        seen.add(name)
+
+        athlete_cfg = copy.deepcopy(base)
+        for key, value in entry.items():
+            if isinstance(value, dict) and isinstance(athlete_cfg.get(key), dict):
+                athlete_cfg[key] = {**athlete_cfg[key], **value}
+            else:
+                athlete_cfg[key] = value
+
+        # globale Pfade ohne athletenspezifischen Override personalisieren
+        paths = dict(athlete_cfg.get("paths", {}))
+        own_paths = entry.get("paths", {})
+        for key in ATHLETE_FILE_PATHS + ATHLETE_DIR_PATHS:
+            if paths.get(key) and key not in own_paths:
+                paths[key] = _personalize_path(
+                    paths[key], name, key in ATHLETE_DIR_PATHS)
+        athlete_cfg["paths"] = paths
+        result.append(athlete_cfg)
+    return result
+
+
+def select_athletes(roster: list[dict], names: str | None) -> list[dict]:
+    """
+    Filtert den Kader nach komma-getrennten Namen (None = alle).
+    """
+    if not names:
+        return roster
+    wanted = [n.strip() for n in names.split(",") if n.strip()]
+    by_name = {a["name"]: a for a in roster}
+    unknown = [n for n in wanted if n not in by_name]
+    if unknown:
+        raise ValueError(f"Unbekannte Athleten: {', '.join(unknown)}")
+    return [by_name[n] for n in wanted]
+
+
+class _ThreadPrefixedStream:
+    """
+    stdout-Proxy, der Zeilen aus Athleten-Threads mit "[name] " präfixt.
+    Pro Thread wird bis zum Zeilenende gepuffert, damit sich parallele
+    Ausgaben nicht mitten in einer Zeile mischen.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_prefix(self, prefix: str | None):
+        # angefangene Zeile des vorherigen Athleten abschließen
+        rest = getattr(self._local, "buffer", "")
+        if rest:
+            with self._lock:
+                self._stream.write(self._local.prefix + rest + "\n")
+        self._local.prefix = prefix
+        self._local.buffer = ""
+
+    def write(self, text: str):
+        prefix = getattr(self._local, "prefix", None)
+        if not prefix:
+            return self._stream.write(text)
+        buffer = self._local.buffer + text
+        lines = buffer.splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            self._local.buffer = lines.pop()
+        else:
+            self._local.buffer = ""
+        if lines:
+            with self._lock:
+                self._stream.write("".join(prefix + line for line in lines))
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_for_roster(
+    athletes: list[dict],
+    task,
+    max_workers: int = DEFAULT_ATHLETE_WORKERS,
+    session: requests.Session | None = None,
+) -> list[dict]:
+    """
+    Führt task(athlete_cfg, client) für alle Athleten parallel aus.
+
+    Alle Clients teilen sich eine Session (Connection-Pool), haben aber eigene
+    Auth und eigenen Token-Bucket. Fehler eines Athleten (auch SystemExit)
+    werden isoliert und im Ergebnis vermerkt.
+    Rückgabe: pro Athlet {"name", "ok", "seconds", "result"|"error"}.
+    """
+    if session is None:
+        http_cfg = athletes[0].get("http", {}) if athletes else {}
+        per_athlete = http_cfg.get("pool_size", DEFAULT_POOL_SIZE)
+        session = create_session(per_athlete * max(1, min(max_workers, len(athletes))))
+
+    stream = _ThreadPrefixedStream(sys.stdout)
+
+    def run_one(athlete_cfg):
+        name = athlete_cfg["name"]
+        stream.set_prefix(f"[{name}] ")
+        t0 = time.perf_counter()
+        summary = {"name": name, "ok": False}
+        try:
+            client = IntervalsClient.from_config(athlete_cfg, session=session)
+            summary["result"] = task(athlete_cfg, client)
+            summary["ok"] = True
+        except SystemExit as e:
+            summary["error"] = f"abgebrochen (Exit-Code {e.code})"
+        except Exception as e:
+            summary["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            summary["seconds"] = round(time.perf_counter() - t0, 3)
+            stream.set_prefix(None)
+        return summary
+
+    original_stdout = sys.stdout
+    sys.stdout = stream
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            return list(pool.map(run_one, athletes))
+    finally:
+        sys.stdout = original_stdout
+        session.close()
+
+
+def print_roster_summary(summaries: list[dict], describe=None):
+    """
+    Gibt die Zusammenfassung über alle Athleten aus.
+    describe(result) → kurzer Text für erfolgreiche Läufe.
+    """
+    ok = [s for s in summaries if s["ok"]]
+    print(f"\nZusammenfassung: {len(ok)}/{len(summaries)} Athleten erfolgreich")
+    for s in summaries:
+        if s["ok"]:
+            detail = describe(s.get("result")) if describe else ""
+            print(f"  ✅ {s['name']} ({s['seconds']}s) {detail}".rstrip())
+        else:
+            print(f"  ❌ {s['name']} ({s['seconds']}s) {s['error']}")
@@ -1,27 +1,110 @@
-import requests
 import json
 import datetime
+import hashlib
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+
+import requests
+
 from config_loader import load_config
+from intervals_client import (
+    IntervalsClient,
+    DEFAULT_MAX_WORKERS,
+    execute_requests,
+    iter_json_array,
+)
+from instrumentation import METRICS
+from plan_manifest import PlanManifest, DEFAULT_MANIFEST_NAME
+from upload_state import UploadState, DEFAULT_UPLOAD_STATE_NAME
+from plan_generator import iter_plan, load_plan_spec
+from roster import (
+    DEFAULT_ATHLETE_WORKERS,
+    load_roster,
+    print_roster_summary,
+    run_for_roster,
+    select_athletes,
+)
+from workout_steps import compile_steps, parse_duration, planned_seconds, render_steps
+from plan_files import (
+    JSON_BACKEND,
+    parse_plan_data,
+    read_plan_dir_file,
+    read_plan_dir_files,
+    split_workouts_by_date,
+)
 import argparse
 
 config = load_config()
 
-API_KEY = config["api_key"]
-ATHLETE_ID = config["athlete_id"]
-BASE_URL = config["base_url"]
-PLAN_FILE = config["paths"].get("plan_file")
-PLAN_DIR = config["paths"].get("plan_dir")
+PLAN_FILE = config.get("paths", {}).get("plan_file")
+PLAN_DIR = config.get("paths", {}).get("plan_dir")
+PLAN_SPEC = config.get("paths", {}).get("plan_spec")
+
+def default_manifest_path(paths: dict) -> str | None:
+    # Manifest liegt standardmäßig im Plan-Verzeichnis
+    plan_dir = paths.get("plan_dir")
+    return paths.get("plan_manifest") or (
+        str(Path(plan_dir) / DEFAULT_MANIFEST_NAME) if plan_dir else None
+    )
+
+
+PLAN_MANIFEST = default_manifest_path(config.get("paths", {}))
+
+
+def default_upload_state_path(paths: dict) -> str | None:
+    # Upload-Status liegt wie das Manifest im Plan-Verzeichnis bzw. neben der Plan-Datei
+    if paths.get("upload_state"):
+        return paths["upload_state"]
+    if paths.get("plan_dir"):
+        return str(Path(paths["plan_dir"]) / DEFAULT_UPLOAD_STATE_NAME)
+    for key in ("plan_file", "plan_spec"):
+        if paths.get(key):
+            p = Path(paths[key])
+            return str(p.with_name(p.name + DEFAULT_UPLOAD_STATE_NAME))
+    return None
+
+
+UPLOAD_STATE = default_upload_state_path(config.get("paths", {}))
 DEFAULT_START_TIME = config.get("default_start_time", "17:00:00")
+# Anzahl paralleler PUT/DELETE-Requests
+MAX_WORKERS = config.get("upload", {}).get("max_workers", DEFAULT_MAX_WORKERS)
+# Anzahl Prozesse zum Parsen der Plan-Dateien (None = Anzahl CPU-Kerne)
+PARSE_WORKERS = config.get("upload", {}).get("parse_workers")
+ATHLETE_WORKERS = config.get("roster", {}).get(
+    "max_workers", DEFAULT_ATHLETE_WORKERS)
+# --watch: Abfrage-Intervall der Plan-Dateien und Neuaufbau des Event-Index (Sekunden)
+WATCH_INTERVAL = config.get("upload", {}).get("watch_interval", 2.0)
+WATCH_REFRESH = config.get("upload", {}).get("watch_refresh", 600)
+# Events pro Bulk-Upsert-Request
+BULK_CHUNK_SIZE = config.get("upload", {}).get("bulk_chunk_size", 200)
+# Alle n Tage die Events trotz Upload-Status laden und abgleichen (0 = nur per --rescan)
+FULL_CHECK_DAYS = config.get("upload", {}).get("full_check_days", 7)
+
+
+def upload_settings(cfg: dict) -> dict:
+    """
+    Upload-Einstellungen aus der (ggf. athletenspezifischen) Config.
+    """
+    upload_cfg = cfg.get("upload", {})
+    return {
+        "start_time": cfg.get("default_start_time", "17:00:00"),
+        "max_workers": upload_cfg.get("max_workers", DEFAULT_MAX_WORKERS),
+        "parse_workers": upload_cfg.get("parse_workers"),
+        "chunk_size": upload_cfg.get("bulk_chunk_size", 200),
+        "full_check_days": upload_cfg.get("full_check_days", 7),
+    }
 
 # Marker-Format in der Beschreibung für Matching
 PLAN_MARKER_PREFIX = "[PLAN-ID:"
 PLAN_MARKER_SUFFIX = "]"
+# Hash des Payloads, direkt hinter der PLAN-ID: [PLAN-ID:...] [PLAN-HASH:...]
+PLAN_HASH_PREFIX = "[PLAN-HASH:"
+PLAN_HASH_LENGTH = 16
 
-
-def auth():
-    # entspricht "API_KEY:<api_key>" Basic Auth
-    return ("API_KEY", API_KEY)
+# Eine gepoolte Session für alle Requests (Keep-Alive statt neuer TLS-Handshakes).
+# Reine Kader-Configs (nur "athletes") haben keinen Standard-Client.
+CLIENT = IntervalsClient.from_config(config) if config.get("athlete_id") else None
 
 
 def load_plan_file(path: str):
@@ -35,75 +118,166 @@ def load_plan_file(path: str):
     with p.open("r", encoding="utf-8") as f:
         data = json.load(f)
 
-    if isinstance(data, list):
-        return data
-    if isinstance(data, dict) and "trainings" in data:
-        return data["trainings"]
+    return parse_plan_data(data, path)
+
 
-    raise ValueError(f"Unbekanntes JSON-Format in {path}")
+def _print_invalid_dates(invalid: list[str]):
+    for date_str in invalid:
+        print(f"Ungültiges Datum im Workout (wird ignoriert): {date_str}")
 
 
-def load_all_workouts() -> list[dict]:
+@METRICS.timed()
+def load_all_workouts(
+    use_manifest: bool = True,
+    parse_workers: int | None = PARSE_WORKERS,
+    plan_dir: str | None = PLAN_DIR,
+    plan_file: str | None = PLAN_FILE,
+    manifest_path: str | None = PLAN_MANIFEST,
+) -> tuple[list[dict], list[str]]:
     """
     Lädt Workouts aus:
-    - allen JSON-Dateien in PLAN_DIR (falls gesetzt)
-    - ansonsten aus PLAN_FILE
+    - allen JSON-Dateien in plan_dir (Standard: PLAN_DIR, falls gesetzt)
+    - ansonsten aus plan_file (Standard: PLAN_FILE)
 
     Filtert anschließend alle Workouts < HEUTE heraus.
+
+    Für plan_dir wird ein Manifest (manifest_path) geführt: Dateien, die seit
+    dem letzten Lauf unverändert sind und nur vergangene Workouts enthalten,
+    werden nicht mehr geöffnet. Die übrigen Dateien werden bei größeren
+    Verzeichnissen parallel (parse_workers Prozesse) geparst.
+
+    Rückgabe: (Workouts ab heute, Dateien, die nicht gelesen werden konnten).
+    Fehlen Dateien, ist der Plan unvollständig – Aufrufer dürfen dann keine
+    Events als verwaist löschen.
     """
-    workouts: list[dict] = []
+    today = datetime.date.today()
+    today_iso = today.isoformat()
+    total = 0
+    filtered: list[dict] = []
+    failed_files: list[str] = []
 
-    if PLAN_DIR:
-        d = Path(PLAN_DIR)
+    if plan_dir:
+        d = Path(plan_dir)
         if not d.exists():
             raise FileNotFoundError(
-                f"Trainingsverzeichnis nicht gefunden: {PLAN_DIR}"
+                f"Trainingsverzeichnis nicht gefunden: {plan_dir}"
             )
 
-        json_files = sorted(d.glob("*.json"))
+        manifest = (
+            PlanManifest(manifest_path or d / DEFAULT_MANIFEST_NAME)
+            if use_manifest else None
+        )
+        json_files = [
+            jf for jf in sorted(d.glob("*.json"))
+            if manifest is None or jf.resolve() != manifest.path.resolve()
+        ]
         if not json_files:
-            print(f"Keine .json-Dateien in {PLAN_DIR} gefunden.")
+            print(f"Keine .json-Dateien in {plan_dir} gefunden.")
         else:
             print(
-                f"Lade Workouts aus {len(json_files)} Dateien in {PLAN_DIR} ..."
+                f"Lade Workouts aus {len(json_files)} Dateien in {plan_dir} "
+                f"(JSON-Backend: {JSON_BACKEND}) ..."
             )
+
+        skipped = 0
+        tasks = []
+        stats = {}
         for jf in json_files:
+            entry = manifest.get(jf.name) if manifest else None
             try:
-                file_data = load_plan_file(str(jf))
-                if not isinstance(file_data, list):
-                    print(f"Überspringe {jf}: kein Array von Workouts")
-                    continue
-                workouts.extend(file_data)
-            except Exception as e:
+                st = jf.stat()
+            except OSError as e:
                 print(f"Fehler beim Laden von {jf}: {e}")
+                failed_files.append(str(jf))
+                continue
+            # schneller Pfad: unverändert (mtime/Größe) und komplett vergangen
+            if (
+                entry
+                and PlanManifest.stat_matches(entry, st)
+                and PlanManifest.is_past(entry, today_iso)
+            ):
+                skipped += 1
+                total += entry.get("count", 0)
+                continue
+            stats[str(jf)] = (jf, st, entry)
+            known_sha256 = (
+                entry.get("sha256")
+                if entry and PlanManifest.is_past(entry, today_iso)
+                else None
+            )
+            tasks.append((str(jf), today_iso, known_sha256))
+
+        # Lesen + Parsen ggf. parallel; Ergebnisse in sortierter Dateireihenfolge
+        for result in read_plan_dir_files(tasks, parse_workers):
+            jf, st, entry = stats[result["path"]]
+            status = result["status"]
+            if status == "error":
+                print(f"Fehler beim Laden von {jf}: {result['error']}")
+                failed_files.append(str(jf))
+                continue
+            if status == "not_list":
+                print(f"Überspringe {jf}: kein Array von Workouts")
+                failed_files.append(str(jf))
+                continue
+            if status == "unchanged":
+                # nur angefasst, Inhalt identisch → nicht geparst
+                manifest.touch(jf.name, st)
+                skipped += 1
+                total += entry.get("count", 0)
+                continue
+
+            _print_invalid_dates(result["invalid"])
+            total += result["count"]
+            filtered.extend(result["workouts"])
+            if manifest:
+                manifest.update(
+                    jf.name,
+                    st,
+                    sha256=result["sha256"],
+                    count=result["count"],
+                    min_date=result["min_date"],
+                    max_date=result["max_date"],
+                )
+
+        if manifest:
+            manifest.prune(jf.name for jf in json_files)
+            manifest.save()
+        if skipped:
+            print(
+                f"{skipped} unveränderte Dateien mit nur vergangenen Workouts "
+                "übersprungen (Manifest)."
+            )
     else:
         # Fallback: einzelnes Plan-File wie bisher
-        if not PLAN_FILE:
+        if not plan_file:
             raise RuntimeError(
                 "Weder plan_dir noch plan_file in config.paths gesetzt."
             )
-        print(f"Lade Workouts aus Plan-Datei: {PLAN_FILE}")
-        workouts = load_plan_file(PLAN_FILE)
-
-    # Filter: nur Workouts ab heute
-    today = datetime.date.today()
-    filtered: list[dict] = []
-    for w in workouts:
-        date_str = w.get("date")
-        if not date_str:
-            continue
-        try:
-            d = datetime.date.fromisoformat(date_str)
-        except Exception:
-            print(f"Ungültiges Datum im Workout (wird ignoriert): {date_str}")
-            continue
-        if d >= today:
-            filtered.append(w)
+        print(f"Lade Workouts aus Plan-Datei: {plan_file}")
+        workouts = load_plan_file(plan_file)
+        filtered, _, _, invalid = split_workouts_by_date(workouts, today)
+        _print_invalid_dates(invalid)
+        total = len(workouts)
 
     print(
-        f"Gefundene Workouts gesamt: {len(workouts)}, davon ab heute: {len(filtered)}"
+        f"Gefundene Workouts gesamt: {total}, davon ab heute: {len(filtered)}"
     )
-    return filtered
+    if failed_files:
+        print(f"⚠️  {len(failed_files)} Plan-Dateien konnten nicht geladen werden.")
+    return filtered, failed_files
+
+
+def refuse_incomplete_plan(failed_files: list[str], action: str):
+    """
+    Bricht ab, wenn Plan-Dateien fehlen: deren Events würden sonst als
+    verwaist gelöscht.
+    """
+    if not failed_files:
+        return
+    print(f"❌ {action} abgebrochen – nicht geladene Plan-Dateien:")
+    for path in failed_files:
+        print(f"  - {path}")
+    raise SystemExit(1)
 
 
 def get_date_range_from_plan(plan: list[dict]):
@@ -130,53 +304,58 @@ def map_sport_to_event_type(sport: str) -> str:
     return "Workout"
 
 
-def fetch_existing_events(start_date: datetime.date, end_date: datetime.date):
+@METRICS.timed()
+def fetch_existing_events(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    client: IntervalsClient | None = None,
+):
     """
-    Holt alle Events im Datumsbereich.
+    Liefert alle Events im Datumsbereich als Iterator; die Antwort wird
+    beim Iterieren gestreamt dekodiert (Phase "json_decode").
+
+    Der Request läuft sofort, damit Fehler hier auffallen und die Phase
+    fetch_existing_events die Anfrage selbst misst.
     """
-    url = f"{BASE_URL}/athlete/{ATHLETE_ID}/events"
+    client = client or CLIENT
+    url = client.athlete_url("events")
     params = {
         "oldest": start_date.isoformat(),
         "newest": end_date.isoformat(),
     }
-    resp = requests.get(url, auth=auth(), params=params, timeout=30)
+    resp = client.get(url, params=params, stream=True)
     if not resp.ok:
         print("Fehler beim Laden vorhandener Events")
         print("Status:", resp.status_code)
         print("Antwort:", resp.text)
         resp.raise_for_status()
-    return resp.json()
+    return iter_json_array(resp, metrics=client.metrics)
 
 
 def convert_duration(duration: str) -> int:
     """
-    Konvertiert Dauer-Strings wie '10m', '30s' in Sekunden.
+    Konvertiert Dauer-Strings wie '10m', '30s' oder '1h30m' in Sekunden.
     (Nur für moving_time, nicht für die Description.)
     """
-    if not duration:
-        return 0
-    duration = duration.strip()
+    return parse_duration(duration)
 
-    if duration.endswith("m"):
-        val = float(duration.replace("m", "").strip())
-        return int(val * 60)
-    elif duration.endswith("s"):
-        val = float(duration.replace("s", "").strip())
-        return int(val)
-    else:
-        return int(float(duration))
 
-
-def build_description_with_steps(plan_id: str, user_description: str | None, steps: list[dict]) -> str:
+def build_description_with_steps(plan_id: str, user_description: str | None, steps) -> str:
     """
     Baut die description im gewünschten Stil:
 
     [PLAN-ID:...]
     <Beschreibung aus JSON>
     - 15m ramp Z1 Free intensity=warmup
+
+    3x
     - 8m SS 90rpm intensity=active
     - 5m Z1 Free intensity=recovery
+
     - 10m Z1 Free intensity=cooldown
+
+    `steps` sind die Steps aus dem Plan-JSON oder bereits kompilierte
+    Steps (siehe workout_steps.compile_steps).
     """
     lines: list[str] = []
 
@@ -197,88 +376,84 @@ def build_description_with_steps(plan_id: str, user_description: str | None, ste
     if lines and steps:
         lines.append("")
 
-    # Steps
-    for step in steps:
-        dur = (step.get("duration") or "").strip()
-        zone = (step.get("zone") or "").strip()
-        cadence = (step.get("cadence") or "").strip()
-        intensity = (step.get("intensity") or "").strip()
-        ramp = step.get("ramp", False)
-
-        if not dur:
-            continue
-
-        # Basis: "- 3m Z5"
-        line = f"- {dur}"
-
-        # ramp direkt nach der Zeit
-        if ramp:
-            line += " ramp"
-
-        # Zone anhängen (Z1, Z2, SS, Z5 ...)
-        if zone:
-            line += f" {zone}"
-
-        # Kadenz ohne Klammern, auch Bereiche wie "90-100rpm"
-        if cadence:
-            line += f" {cadence}"
-
-        # intensity als "intensity=..."
-        if intensity:
-            line += f" intensity={intensity}"
-
-        lines.append(line)
+    # Steps (kompiliert + pro Step-Folge gecacht gerendert)
+    steps_text = render_steps(steps if isinstance(steps, tuple) else compile_steps(steps))
+    if steps_text:
+        lines.append(steps_text)
 
     return "\n".join(lines).strip()
 
-def extract_plan_id_from_description(description: str | None) -> str | None:
-    """
-    Liest PLAN-ID aus der description, wenn vorhanden.
-    Sucht nach Muster: [PLAN-ID:...]
-    """
+def _extract_marker(description: str | None, prefix: str) -> str | None:
     if not description:
         return None
     text = description
 
-    start = text.find(PLAN_MARKER_PREFIX)
+    start = text.find(prefix)
     if start == -1:
         return None
     end = text.find(PLAN_MARKER_SUFFIX, start)
     if end == -1:
         return None
 
-    inner = text[start + len(PLAN_MARKER_PREFIX):end].strip()
+    inner = text[start + len(prefix):end].strip()
     return inner or None
 
 
-def build_event_payload(workout: dict) -> dict:
+def extract_plan_id_from_description(description: str | None) -> str | None:
+    """
+    Liest PLAN-ID aus der description, wenn vorhanden.
+    Sucht nach Muster: [PLAN-ID:...]
+    """
+    return _extract_marker(description, PLAN_MARKER_PREFIX)
+
+
+def extract_payload_hash_from_description(description: str | None) -> str | None:
+    """
+    Liest den Payload-Hash aus der description, wenn vorhanden.
+    Sucht nach Muster: [PLAN-HASH:...]
+    """
+    return _extract_marker(description, PLAN_HASH_PREFIX)
+
+
+def compute_payload_hash(payload: dict) -> str:
+    """
+    Stabiler Hash über den Event-Payload (ohne Hash-Marker).
+    Schlüsselreihenfolge und Whitespace spielen keine Rolle.
+    """
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:PLAN_HASH_LENGTH]
+
+
+def add_hash_marker(description: str, plan_id: str, payload_hash: str) -> str:
+    """
+    Hängt [PLAN-HASH:...] an die PLAN-ID-Zeile an.
+    """
+    marker = f"{PLAN_MARKER_PREFIX}{plan_id}{PLAN_MARKER_SUFFIX}"
+    hash_marker = f"{PLAN_HASH_PREFIX}{payload_hash}{PLAN_MARKER_SUFFIX}"
+    if description.startswith(marker):
+        return f"{marker} {hash_marker}{description[len(marker):]}"
+    return f"{hash_marker}\n{description}" if description else hash_marker
+
+
+@METRICS.timed()
+def build_event_payload(workout: dict, start_time: str = DEFAULT_START_TIME) -> dict:
     """
     Baut den Payload für ein Intervals.icu-Event aus einem Plan-Eintrag.
     WICHTIG:
     - Description mit PLAN-ID, JSON-Beschreibung und Steps
     - moving_time aus Steps bzw. Fallback aus duration/moving_time im Plan
+    - external_id = plan_id (Schlüssel für den Bulk-Upsert)
     """
     date = workout["date"]
-    start_date_local = f"{date}T{DEFAULT_START_TIME}"
+    start_date_local = f"{date}T{start_time}"
 
     steps = workout.get("steps", []) or []
+    compiled_steps = compile_steps(steps)
 
-    # moving_time: Summe der Step-Dauern, sonst Fallback
-    if steps:
-        total_secs = 0
-        for s in steps:
-            dstr = s.get("duration")
-            if not dstr:
-                continue
-            total_secs += convert_duration(dstr)
-        moving_time = total_secs
-    else:
-        if "moving_time" in workout and workout["moving_time"] is not None:
-            moving_time = int(workout["moving_time"])
-        elif "duration_minutes" in workout and workout["duration_minutes"] is not None:
-            moving_time = int(round(workout["duration_minutes"] * 60))
-        else:
-            moving_time = None
+    # moving_time: Summe der Step-Dauern (inkl. Wiederholungen), sonst Fallback
+    moving_time = planned_seconds(workout, compiled_steps)
 
     category = workout.get("category", "WORKOUT")
     plan_id = workout["plan_id"]
@@ -291,7 +466,7 @@ def build_event_payload(workout: dict) -> dict:
 
     # <- jetzt mit PLAN-ID + Beschreibung + Steps
     description = build_description_with_steps(
-        plan_id, user_description, steps)
+        plan_id, user_description, compiled_steps)
 
     payload = {
         "start_date_local": start_date_local,
@@ -303,6 +478,12 @@ def build_event_payload(workout: dict) -> dict:
         "steps": steps,  # Intervals ignoriert es evtl., schadet aber nicht
     }
 
+    # Hash über den Inhalt → beim Upsert werden unveränderte Events übersprungen
+    payload["description"] = add_hash_marker(
+        description, plan_id, compute_payload_hash(payload))
+    # nach dem Hash, damit Events älterer Versionen denselben Hash behalten
+    payload["external_id"] = plan_id
+
     return payload
 
 def index_events_by_plan_id_from_description(events: list[dict]) -> dict[str, dict]:
@@ -321,15 +502,39 @@ def index_events_by_plan_id_from_description(events: list[dict]) -> dict[str, di
     return by_plan_id
 
 
-def delete_plan_events_in_range(start_date: datetime.date, end_date: datetime.date):
+def group_events_by_plan_id(events: list[dict]) -> dict[str, list[dict]]:
+    """
+    Wie index_events_by_plan_id_from_description(), behält aber alle Events
+    pro plan_id (Duplikate), jeweils nach Event-ID sortiert.
+    """
+    groups: dict[str, list[dict]] = {}
+    for e in events:
+        plan_id = extract_plan_id_from_description(e.get("description") or "")
+        if plan_id:
+            groups.setdefault(plan_id, []).append(e)
+    for group in groups.values():
+        # ältestes Event (kleinste numerische ID) zuerst
+        group.sort(key=lambda e: (len(str(e.get("id"))), str(e.get("id"))))
+    return groups
+
+
+@METRICS.timed()
+def delete_plan_events_in_range(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    max_workers: int = MAX_WORKERS,
+    client: IntervalsClient | None = None,
+) -> list[dict]:
     """
     Löscht alle Events im Datumsbereich, die eine PLAN-ID in der
     description tragen. Echte aufgezeichnete Aktivitäten bleiben unangetastet.
+    Die DELETEs laufen parallel; zurückgegeben werden die fehlgeschlagenen.
     """
+    client = client or CLIENT
     print(
         f"⚠️  Lösche vorhandene PLAN-Events mit PLAN-ID zwischen {start_date} und {end_date} ..."
     )
-    events = fetch_existing_events(start_date, end_date)
+    events = fetch_existing_events(start_date, end_date, client=client)
     to_delete = []
 
     for e in events:
@@ -339,38 +544,145 @@ def delete_plan_events_in_range(start_date: datetime.date, end_date: datetime.da
 
     if not to_delete:
         print("Keine Events mit PLAN-ID im Bereich gefunden – nichts zu löschen.")
-        return
+        return []
 
     print(f"Es werden {len(to_delete)} Events mit PLAN-ID gelöscht ...")
-    for e in to_delete:
-        event_id = e["id"]
-        url = f"{BASE_URL}/athlete/{ATHLETE_ID}/events/{event_id}"
-        resp = requests.delete(url, auth=auth(), timeout=30)
-        if not resp.ok:
-            print(f"❌ Fehler beim Löschen von Event {event_id}")
-            print("Status:", resp.status_code)
-            print("Antwort:", resp.text)
-            # nicht abbrechen, sondern weiter versuchen
+    jobs = [
+        {
+            "label": f"Event {e['id']}",
+            "method": "DELETE",
+            "url": client.athlete_url(f"events/{e['id']}"),
+        }
+        for e in to_delete
+    ]
+
+    def progress(result):
+        if result["ok"]:
+            print(f"  ✅ {result['job']['label']} gelöscht")
+
+    # nicht abbrechen, sondern alle versuchen und Fehler sammeln
+    _, failed = execute_requests(client, jobs, max_workers, on_result=progress)
+    report_failed_requests("Löschen", failed)
+    return failed
+
+
+def report_failed_requests(action: str, failed: list[dict], show_payload: bool = False):
+    """
+    Gibt gesammelte Fehler aus execute_requests() gebündelt aus.
+    """
+    if not failed:
+        return
+    print(f"\n❌ {len(failed)} Fehler beim {action}:")
+    for result in failed:
+        job = result["job"]
+        print(f"- {job['label']}")
+        if show_payload and "json" in job:
+            print("  Payload:")
+            print(json.dumps(job["json"], indent=2, ensure_ascii=False))
+        if result["error"]:
+            print("  Fehler:", result["error"])
         else:
-            print(f"  ✅ Event {event_id} gelöscht")
+            print("  Status:", result["status"])
+            print("  Antwort:", result["text"])
 
 
-def upsert_plan(plan: list[dict], wipe_plan_range: bool = False):
+def classify_workouts(
+    plan: list[dict],
+    events_by_plan_id: dict[str, dict],
+    client: IntervalsClient,
+    verbose: bool = True,
+    start_time: str = DEFAULT_START_TIME,
+):
+    """
+    Vergleicht die Workouts per Payload-Hash mit den vorhandenen Events.
+    Rückgabe: (Payloads für neue Events, PUT-Jobs für geänderte, Anzahl unveränderter).
+    """
+    new_events_payloads = []
+    update_jobs = []
+    unchanged = 0
+
+    for workout in plan:
+        plan_id = workout["plan_id"]
+        payload = build_event_payload(workout, start_time)
+
+        existing = events_by_plan_id.get(plan_id)
+
+        if existing and (
+            extract_payload_hash_from_description(existing.get("description"))
+            == extract_payload_hash_from_description(payload["description"])
+        ):
+            unchanged += 1
+        elif existing:
+            event_id = existing["id"]
+            update_jobs.append({
+                "label": f"Event {event_id} (plan_id={plan_id})",
+                "method": "PUT",
+                "url": client.athlete_url(f"events/{event_id}"),
+                "json": payload,
+                "plan_id": plan_id,
+            })
+        else:
+            if verbose:
+                print(f"Plane neues Event (plan_id={plan_id}) zur Erstellung ...")
+            new_events_payloads.append(payload)
+
+    return new_events_payloads, update_jobs, unchanged
+
+
+@METRICS.timed()
+def upsert_plan(
+    plan: list[dict],
+    wipe_plan_range: bool = False,
+    max_workers: int = MAX_WORKERS,
+    client: IntervalsClient | None = None,
+    state: UploadState | None = None,
+    rescan: bool = False,
+    start_time: str = DEFAULT_START_TIME,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    failed_files: list[str] = (),
+    full_check_days: int | None = FULL_CHECK_DAYS,
+) -> dict:
+    """
+    Legt neue Events an und aktualisiert geänderte per Bulk-Upsert
+    (external_id = plan_id, chunk_size Events pro Request).
+
+    Unveränderte Workouts erkennt der lokale Upload-Status (state), ohne
+    Events zu laden; gesendet werden nur neue und geänderte. Ohne Status,
+    beim ersten Lauf, mit rescan oder wenn der letzte vollständige Abgleich
+    full_check_days Tage zurückliegt, werden die Events einmal geladen und
+    über die PLAN-ID in der description zugeordnet – so werden auch in
+    Intervals.icu gelöschte oder bearbeitete Events wiederhergestellt;
+    Events älterer Versionen ohne external_id bekommen sie per PUT.
+    Gibt die Zähler created/updated/unchanged/failed zurück; bei Fehlern
+    wird nach dem Report mit SystemExit(1) abgebrochen. wipe_plan_range
+    wird verweigert, wenn Plan-Dateien nicht geladen werden konnten
+    (failed_files).
+    """
+    client = client or CLIENT
+    if wipe_plan_range:
+        refuse_incomplete_plan(failed_files, "Löschen des Plan-Bereichs")
     if not plan:
         print("Kein Workout im Plan (ab heute) – nichts zu tun.")
-        return
+        return {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
 
     start_date, end_date = get_date_range_from_plan(plan)
     print(f"Datumsbereich im Plan (ab heute): {start_date} bis {end_date}")
 
+    failed: list[dict] = []
+    # None = Abgleich nur über den Upload-Status, ohne Events zu laden
+    events_by_plan_id: dict[str, dict] | None = None
+
     if wipe_plan_range:
         # erst alles mit PLAN-ID im Bereich löschen
-        delete_plan_events_in_range(start_date, end_date)
-        existing_events = []  # danach ist der Bereich bzgl. PLAN-Events leer
-        events_by_plan_id = {}
-    else:
+        failed += delete_plan_events_in_range(
+            start_date, end_date, max_workers, client=client)
+        if state:
+            state.forget_range(start_date.isoformat(), end_date.isoformat())
+        events_by_plan_id = {}  # danach ist der Bereich bzgl. PLAN-Events leer
+    elif (state is None or not state.migrated or rescan
+          or state.full_check_due(full_check_days)):
         print("Lade existierende Events aus Intervals.icu ...")
-        existing_events = fetch_existing_events(start_date, end_date)
+        existing_events = fetch_existing_events(start_date, end_date, client=client)
         events_by_plan_id = index_events_by_plan_id_from_description(
             existing_events
         )
@@ -378,52 +690,594 @@ def upsert_plan(plan: list[dict], wipe_plan_range: bool = False):
             f"Gefundene Events mit PLAN-ID in description: {len(events_by_plan_id)}"
         )
 
-    new_events_payloads = []
-    updated = 0
+    upserts: list[dict] = []
+    legacy_jobs: list[dict] = []
+    known: set[str] = set()  # plan_ids, zu denen schon ein Event existiert
+    unchanged = 0
 
     for workout in plan:
         plan_id = workout["plan_id"]
-        payload = build_event_payload(workout)
+        payload = build_event_payload(workout, start_time)
+        payload_hash = extract_payload_hash_from_description(payload["description"])
 
-        existing = events_by_plan_id.get(plan_id)
+        if events_by_plan_id is None:
+            uploaded_hash = state.hash_of(plan_id)
+            if uploaded_hash == payload_hash:
+                unchanged += 1
+                continue
+            if uploaded_hash is not None:
+                known.add(plan_id)
+            upserts.append(payload)
+            continue
 
-        if existing:
+        existing = events_by_plan_id.get(plan_id)
+        if existing is None:
+            upserts.append(payload)
+            continue
+        known.add(plan_id)
+        if existing.get("external_id") != plan_id:
+            # Event einer älteren Version: external_id einmalig per PUT nachtragen
             event_id = existing["id"]
-            url = f"{BASE_URL}/athlete/{ATHLETE_ID}/events/{event_id}"
-            print(f"Update Event {event_id} (plan_id={plan_id}) ...")
-            resp = requests.put(url, auth=auth(), json=payload, timeout=30)
-            if not resp.ok:
-                print(
-                    f"\n❌ Fehler beim Update von Event {event_id} (plan_id={plan_id})"
-                )
-                print("Payload (PUT):")
-                print(json.dumps(payload, indent=2, ensure_ascii=False))
-                print("Status:", resp.status_code)
-                print("Antwort:", resp.text)
-                raise SystemExit(1)
-            updated += 1
+            legacy_jobs.append({
+                "label": f"Event {event_id} (plan_id={plan_id})",
+                "method": "PUT",
+                "url": client.athlete_url(f"events/{event_id}"),
+                "json": payload,
+            })
+        elif extract_payload_hash_from_description(existing.get("description")) == payload_hash:
+            unchanged += 1
+            if state:
+                state.record(plan_id, payload_hash, payload["start_date_local"][:10])
         else:
-            print(f"Plane neues Event (plan_id={plan_id}) zur Erstellung ...")
-            new_events_payloads.append(payload)
+            upserts.append(payload)
 
     created = 0
-    if new_events_payloads:
-        url = f"{BASE_URL}/athlete/{ATHLETE_ID}/events/bulk"
-        print(f"Sende {len(new_events_payloads)} neue Events an {url} ...")
-        resp = requests.post(
-            url, auth=auth(), json=new_events_payloads, timeout=30
+    updated = 0
+    if legacy_jobs:
+        print(
+            f"Ergänze external_id bei {len(legacy_jobs)} Events älterer Versionen "
+            f"({max_workers} parallel) ..."
+        )
+        succeeded, legacy_failed = execute_requests(client, legacy_jobs, max_workers)
+        updated += len(succeeded)
+        if state:
+            _record_uploaded(state, [r["job"]["json"] for r in succeeded])
+        report_failed_requests("Migrieren", legacy_failed, show_payload=True)
+        failed += legacy_failed
+
+    if upserts:
+        url = client.athlete_url("events/bulk") + "?upsert=true"
+        chunk_size = max(1, chunk_size)
+        chunks = [
+            upserts[i:i + chunk_size] for i in range(0, len(upserts), chunk_size)
+        ]
+        print(
+            f"Sende {len(upserts)} neue/geänderte Events per Bulk-Upsert "
+            f"({len(chunks)} Request(s)) an {url} ..."
+        )
+        jobs = [
+            {
+                "label": f"Bulk-Upsert {i}/{len(chunks)} ({len(chunk)} Events)",
+                "method": "POST",
+                "url": url,
+                "json": chunk,
+            }
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        succeeded, upsert_failed = execute_requests(client, jobs, max_workers)
+        for result in succeeded:
+            payloads = result["job"]["json"]
+            for payload in payloads:
+                if payload["external_id"] in known:
+                    updated += 1
+                else:
+                    created += 1
+            if state:
+                _record_uploaded(state, payloads)
+        report_failed_requests("Bulk-Upsert", upsert_failed, show_payload=True)
+        failed += upsert_failed
+
+    if state:
+        if events_by_plan_id is not None and not failed:
+            state.mark_migrated()
+            state.mark_checked()
+        state.save()
+
+    print(
+        f"\n{'❌' if failed else '✅'} Fertig. Neu erstellt: {created}, "
+        f"aktualisiert: {updated}, unverändert: {unchanged}, "
+        f"fehlgeschlagen: {len(failed)}"
+    )
+    if failed:
+        raise SystemExit(1)
+    return {
+        "created": created,
+        "updated": updated,
+        "unchanged": unchanged,
+        "failed": 0,
+    }
+
+
+@METRICS.timed()
+def upsert_stream(
+    workouts,
+    max_workers: int = MAX_WORKERS,
+    client: IntervalsClient | None = None,
+    state: UploadState | None = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    start_time: str = DEFAULT_START_TIME,
+) -> dict:
+    """
+    Lädt Workouts aus einem (lazy) Iterator als Pipeline hoch: Payloads
+    werden gebaut, sobald das Workout erzeugt ist, und jeder volle Block geht
+    sofort per Bulk-Upsert raus, während die nächsten entstehen. Es sind
+    höchstens max_workers Blöcke gleichzeitig unterwegs (konstanter Speicher).
+
+    Vorhandene Events werden nicht geladen; die Zuordnung läuft nur über die
+    external_id (z.B. für generierte Pläne); laut Upload-Status unveränderte
+    Workouts werden nicht gesendet. Gibt die Zähler wie
+    upsert_plan() zurück; bei Fehlern SystemExit(1) nach dem Report.
+    """
+    client = client or CLIENT
+    url = client.athlete_url("events/bulk") + "?upsert=true"
+    chunk_size = max(1, chunk_size)
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    failed: list[dict] = []
+    pending: dict = {}  # Future → Job
+
+    def run(job):
+        return client.request(job["method"], job["url"], json=job["json"])
+
+    def collect(done):
+        for fut in done:
+            job = pending.pop(fut)
+            result = {"job": job, "ok": False, "status": None, "text": None, "error": None}
+            try:
+                resp = fut.result()
+                result.update(ok=resp.ok, status=resp.status_code, text=resp.text)
+            except requests.RequestException as e:
+                result["error"] = str(e)
+            if not result["ok"]:
+                failed.append(result)
+                continue
+            print(f"  ✅ {job['label']}")
+            for payload in job["json"]:
+                known = payload["external_id"] in job["known"]
+                counts["updated" if known else "created"] += 1
+            if state:
+                _record_uploaded(state, job["json"])
+
+    print(f"Lade erzeugte Workouts fortlaufend per Bulk-Upsert nach {url} hoch ...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        def submit(chunk, known):
+            if len(pending) >= max(1, max_workers):
+                # Rückstau: erst auf einen laufenden Block warten
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                collect(done)
+            job = {
+                "label": (
+                    f"Bulk-Upsert {chunk[0]['start_date_local'][:10]} bis "
+                    f"{chunk[-1]['start_date_local'][:10]} ({len(chunk)} Events)"
+                ),
+                "method": "POST",
+                "url": url,
+                "json": chunk,
+                "known": known,
+            }
+            pending[pool.submit(run, job)] = job
+
+        chunk: list[dict] = []
+        known: set[str] = set()
+        for workout in workouts:
+            payload = build_event_payload(workout, start_time)
+            plan_id = workout["plan_id"]
+            if state:
+                uploaded_hash = state.hash_of(plan_id)
+                if uploaded_hash == extract_payload_hash_from_description(
+                        payload["description"]):
+                    counts["unchanged"] += 1
+                    continue
+                if uploaded_hash is not None:
+                    known.add(plan_id)
+            chunk.append(payload)
+            if len(chunk) >= chunk_size:
+                submit(chunk, known)
+                chunk, known = [], set()
+        if chunk:
+            submit(chunk, known)
+        collect(wait(list(pending)).done)
+
+    if state:
+        state.save()
+    report_failed_requests("Bulk-Upsert", failed)
+    counts["failed"] = len(failed)
+    print(
+        f"\n{'❌' if failed else '✅'} Fertig. Neu erstellt: {counts['created']}, "
+        f"aktualisiert: {counts['updated']}, unverändert: {counts['unchanged']}, "
+        f"fehlgeschlagen: {len(failed)}"
+    )
+    if failed:
+        raise SystemExit(1)
+    return counts
+
+
+def _record_uploaded(state: UploadState, payloads: list[dict]):
+    for payload in payloads:
+        state.record(
+            payload["external_id"],
+            extract_payload_hash_from_description(payload["description"]),
+            payload["start_date_local"][:10],
         )
-        if not resp.ok:
-            print("\n❌ Fehler beim Erstellen neuer Events (bulk)")
-            print("Payload (POST bulk):")
-            print(json.dumps(new_events_payloads, indent=2, ensure_ascii=False))
-            print("Status:", resp.status_code)
-            print("Antwort:", resp.text)
-            raise SystemExit(1)
 
-        created = len(new_events_payloads)
 
-    print(f"\n✅ Fertig. Neu erstellt: {created}, aktualisiert: {updated}")
+class PlanWatcher:
+    """
+    Watch-Modus: fragt die Plan-Dateien regelmäßig ab (mtime/Größe) und lädt
+    nur Workouts hoch, deren Payload-Hash vom bekannten Event abweicht.
+
+    Session und Event-Index (plan_id → Event) bleiben zwischen den
+    Durchläufen erhalten; der Index wird nur für neue Datumsbereiche bzw.
+    alle `refresh_s` Sekunden neu von der API geladen. Neue Workouts gehen
+    per Bulk-Upsert (external_id = plan_id) raus; die Hashes hochgeladener
+    Events landen im Upload-Status (state), wie beim normalen Upload.
+    Events zu Workouts, die aus dem Plan verschwinden, bleiben bestehen.
+    """
+
+    def __init__(
+        self,
+        client: IntervalsClient,
+        plan_dir: str | None = PLAN_DIR,
+        plan_file: str | None = PLAN_FILE,
+        max_workers: int = MAX_WORKERS,
+        refresh_s: float = WATCH_REFRESH,
+        state: UploadState | None = None,
+    ):
+        if not plan_dir and not plan_file:
+            raise RuntimeError("Weder plan_dir noch plan_file in config.paths gesetzt.")
+        self.client = client
+        self.plan_dir = plan_dir
+        self.plan_file = plan_file
+        self.max_workers = max_workers
+        self.refresh_s = refresh_s
+        self.state = state
+        self.file_stats: dict[str, tuple[int, int]] = {}
+        self.file_sha256: dict[str, str] = {}
+        self.workouts_by_file: dict[str, dict[str, dict]] = {}
+        self.events_by_plan_id: dict[str, dict] = {}
+        self.indexed_range: tuple[datetime.date, datetime.date] | None = None
+        self.indexed_at = 0.0
+
+    def plan_paths(self) -> list[str]:
+        if self.plan_dir:
+            return [str(p) for p in sorted(Path(self.plan_dir).glob("*.json"))]
+        return [self.plan_file] if Path(self.plan_file).exists() else []
+
+    def scan(self):
+        """
+        Rückgabe: (neue/geänderte Dateien, entfernte Dateien).
+        """
+        changed = []
+        seen = set()
+        for path in self.plan_paths():
+            try:
+                st = Path(path).stat()
+            except OSError:
+                continue
+            seen.add(path)
+            sig = (st.st_mtime_ns, st.st_size)
+            if self.file_stats.get(path) != sig:
+                self.file_stats[path] = sig
+                changed.append(path)
+        removed = [p for p in self.file_stats if p not in seen]
+        for path in removed:
+            del self.file_stats[path]
+        return changed, removed
+
+    def ensure_index(self, start_date: datetime.date, end_date: datetime.date):
+        """
+        Lädt Events nach, wenn der Bereich noch nicht im Index liegt oder
+        der Index älter als refresh_s ist.
+        """
+        if self.indexed_range:
+            lo, hi = self.indexed_range
+            fresh = time.monotonic() - self.indexed_at <= self.refresh_s
+            if fresh and lo <= start_date and end_date <= hi:
+                return
+            start_date, end_date = min(lo, start_date), max(hi, end_date)
+
+        events = fetch_existing_events(start_date, end_date, client=self.client)
+        self.events_by_plan_id = index_events_by_plan_id_from_description(events)
+        self.indexed_range = (start_date, end_date)
+        self.indexed_at = time.monotonic()
+
+    def _reload_files(self, changed: list[str], removed: list[str], today_iso: str):
+        """
+        Liest geänderte Dateien neu; gibt die Workouts aus diesen Dateien und
+        die Anzahl nicht mehr geplanter plan_ids zurück.
+        """
+        candidates: list[dict] = []
+        dropped = set()
+        for path in removed:
+            dropped.update(self.workouts_by_file.pop(path, {}))
+            self.file_sha256.pop(path, None)
+
+        for path in changed:
+            result = read_plan_dir_file(path, today_iso, self.file_sha256.get(path))
+            if result["status"] == "unchanged":
+                continue
+            if result["status"] != "parsed":
+                print(f"Fehler beim Laden von {path}: {result['error'] or 'kein Array von Workouts'}")
+                continue
+            _print_invalid_dates(result["invalid"])
+            self.file_sha256[path] = result["sha256"]
+            workouts = {w["plan_id"]: w for w in result["workouts"]}
+            dropped.update(set(self.workouts_by_file.get(path, {})) - set(workouts))
+            self.workouts_by_file[path] = workouts
+            candidates.extend(workouts.values())
+
+        # in einer anderen Datei weiterhin geplant → nicht verschwunden
+        still_planned = set()
+        for workouts in self.workouts_by_file.values():
+            still_planned.update(workouts)
+        return candidates, len(dropped - still_planned)
+
+    @METRICS.timed("watch_sync")
+    def sync_once(self) -> dict | None:
+        """
+        Ein Durchlauf. None, wenn sich keine Datei geändert hat.
+        """
+        changed, removed = self.scan()
+        if not changed and not removed:
+            return None
+
+        candidates, dropped = self._reload_files(
+            changed, removed, datetime.date.today().isoformat())
+        summary = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        if dropped:
+            print(f"{dropped} Workouts nicht mehr im Plan (Events bleiben bestehen).")
+        if not candidates:
+            return summary
+
+        self.ensure_index(*get_date_range_from_plan(candidates))
+        new_payloads, update_jobs, summary["unchanged"] = classify_workouts(
+            candidates, self.events_by_plan_id, self.client)
+
+        if update_jobs:
+            succeeded, failed = execute_requests(
+                self.client, update_jobs, self.max_workers)
+            for result in succeeded:
+                job = result["job"]
+                self.events_by_plan_id[job["plan_id"]] = {
+                    "id": job["url"].rsplit("/", 1)[-1],
+                    "description": job["json"]["description"],
+                }
+            if self.state:
+                _record_uploaded(self.state, [r["job"]["json"] for r in succeeded])
+            report_failed_requests("Update", failed)
+            summary["updated"] = len(succeeded)
+            summary["failed"] += len(failed)
+
+        if new_payloads:
+            resp = self.client.post(
+                self.client.athlete_url("events/bulk") + "?upsert=true",
+                json=new_payloads)
+            if resp.ok:
+                summary["created"] = len(new_payloads)
+                if self.state:
+                    _record_uploaded(self.state, new_payloads)
+                created = resp.json()
+                if isinstance(created, list):
+                    self.events_by_plan_id.update(
+                        index_events_by_plan_id_from_description(created))
+                else:
+                    self.indexed_range = None  # IDs unbekannt → neu laden
+            else:
+                print(f"❌ Fehler beim Erstellen neuer Events (bulk): {resp.status_code} {resp.text}")
+                summary["failed"] += len(new_payloads)
+
+        if self.state:
+            self.state.save()
+        if summary["failed"]:
+            self.forget_files()
+        print(
+            f"{time.strftime('%H:%M:%S')} neu: {summary['created']}, "
+            f"aktualisiert: {summary['updated']}, unverändert: {summary['unchanged']}, "
+            f"fehlgeschlagen: {summary['failed']}"
+        )
+        return summary
+
+    def forget_files(self):
+        """
+        Nach Fehlern: alle Dateien beim nächsten Durchlauf erneut abgleichen
+        (unveränderte Workouts werden per Hash übersprungen).
+        """
+        self.file_stats.clear()
+        self.file_sha256.clear()
+
+    def run(self, interval: float = WATCH_INTERVAL):
+        where = self.plan_dir or self.plan_file
+        print(f"Beobachte {where} (alle {interval}s, Strg+C zum Beenden) ...")
+        try:
+            while True:
+                try:
+                    self.sync_once()
+                except Exception as e:
+                    # z.B. Netzwerk weg oder API-Antwort unerwartet:
+                    # protokollieren und beim nächsten Durchlauf erneut versuchen
+                    print(f"❌ Fehler beim Abgleich: {type(e).__name__}: {e}")
+                    self.forget_files()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\nWatch-Modus beendet.")
+
+
+@METRICS.timed()
+def compute_plan_diff(
+    plan: list[dict],
+    events: list[dict],
+    client: IntervalsClient,
+    start_time: str = DEFAULT_START_TIME,
+) -> dict:
+    """
+    Vollständiger Abgleich zwischen Plan und vorhandenen PLAN-Events:
+
+    - "create": Payloads für Workouts ohne Event
+    - "update": PUT-Jobs für Events mit abweichendem Payload-Hash
+    - "unchanged": Anzahl Events mit identischem Hash
+    - "delete": Events, deren plan_id nicht mehr im Plan steht (verwaist)
+    - "duplicate": weitere Events mit derselben plan_id (das erste bleibt)
+    - "plan_duplicates": plan_ids, die im Plan mehrfach vorkommen (letztes gilt)
+    """
+    by_plan_id: dict[str, dict] = {}
+    plan_duplicates = []
+    for workout in plan:
+        if workout["plan_id"] in by_plan_id:
+            plan_duplicates.append(workout["plan_id"])
+        by_plan_id[workout["plan_id"]] = workout
+
+    groups = group_events_by_plan_id(events)
+    kept = {plan_id: group[0] for plan_id, group in groups.items()}
+    duplicate = [e for group in groups.values() for e in group[1:]]
+    delete = [e for plan_id, e in kept.items() if plan_id not in by_plan_id]
+
+    create, update, unchanged = classify_workouts(
+        list(by_plan_id.values()), kept, client, verbose=False, start_time=start_time)
+    return {
+        "create": create,
+        "update": update,
+        "unchanged": unchanged,
+        "delete": delete,
+        "duplicate": duplicate,
+        "plan_duplicates": plan_duplicates,
+    }
+
+
+def _event_label(event: dict) -> str:
+    plan_id = extract_plan_id_from_description(event.get("description") or "")
+    date = (event.get("start_date_local") or "")[:10]
+    return f"{date} {plan_id} – {event.get('name', '')} (Event {event.get('id')})"
+
+
+def print_plan_diff(diff: dict):
+    for plan_id in diff["plan_duplicates"]:
+        print(f"⚠️  plan_id mehrfach im Plan, letzter Eintrag gilt: {plan_id}")
+    for payload in diff["create"]:
+        plan_id = extract_plan_id_from_description(payload["description"])
+        print(f"  + {payload['start_date_local'][:10]} {plan_id} – {payload['name']}")
+    for job in diff["update"]:
+        print(f"  ~ {job['json']['start_date_local'][:10]} {job['plan_id']} – {job['json']['name']}")
+    for event in diff["delete"]:
+        print(f"  - {_event_label(event)} (nicht mehr im Plan)")
+    for event in diff["duplicate"]:
+        print(f"  - {_event_label(event)} (Duplikat)")
+    print(
+        f"Abgleich: neu {len(diff['create'])}, geändert {len(diff['update'])}, "
+        f"verwaist {len(diff['delete'])}, Duplikate {len(diff['duplicate'])}, "
+        f"unverändert {diff['unchanged']}"
+    )
+
+
+@METRICS.timed()
+def reconcile_plan(
+    plan: list[dict],
+    max_workers: int = MAX_WORKERS,
+    client: IntervalsClient | None = None,
+    dry_run: bool = False,
+    state: UploadState | None = None,
+    start_time: str = DEFAULT_START_TIME,
+    failed_files: list[str] = (),
+) -> dict:
+    """
+    Bringt die PLAN-Events im Datumsbereich (heute bis letztes Workout) mit
+    minimalen Requests auf den Stand des Plans: neue per Bulk-POST, geänderte
+    per PUT, verwaiste und doppelte Events per DELETE. Gelöscht wird erst
+    nach dem Anlegen/Aktualisieren, der Kalender ist also nie leer.
+    Mit dry_run werden nur die Änderungen ausgegeben. Der Upload-Status
+    (state) wird mitgeführt, damit upsert_plan() danach korrekt abgleicht.
+    Konnten Plan-Dateien nicht geladen werden (failed_files), wird ohne
+    dry_run abgebrochen, bevor etwas gesendet wird.
+    """
+    client = client or CLIENT
+    if not dry_run:
+        refuse_incomplete_plan(failed_files, "Abgleich")
+    summary = {
+        "created": 0, "updated": 0, "deleted": 0, "unchanged": 0, "failed": 0,
+    }
+    if not plan:
+        print("Kein Workout im Plan (ab heute) – nichts abzugleichen.")
+        return summary
+
+    _, end_date = get_date_range_from_plan(plan)
+    start_date = datetime.date.today()
+    print(f"Abgleich der PLAN-Events von {start_date} bis {end_date} ...")
+    events = fetch_existing_events(start_date, end_date, client=client)
+    diff = compute_plan_diff(plan, events, client, start_time)
+    print_plan_diff(diff)
+    summary["unchanged"] = diff["unchanged"]
+    if failed_files:
+        print(
+            f"⚠️  {len(failed_files)} Plan-Dateien nicht geladen – "
+            "als verwaist gelistete Events können noch geplant sein."
+        )
+    if dry_run:
+        print("Dry-Run: keine Änderungen gesendet.")
+        return summary
+
+    failed: list[dict] = []
+    if diff["create"]:
+        resp = client.post(
+            client.athlete_url("events/bulk") + "?upsert=true", json=diff["create"])
+        if resp.ok:
+            summary["created"] = len(diff["create"])
+            if state:
+                _record_uploaded(state, diff["create"])
+        else:
+            failed.append({
+                "job": {"label": f"Bulk-POST ({len(diff['create'])} Events)"},
+                "error": None, "status": resp.status_code, "text": resp.text,
+            })
+    if diff["update"]:
+        succeeded, update_failed = execute_requests(client, diff["update"], max_workers)
+        summary["updated"] = len(succeeded)
+        if state:
+            _record_uploaded(state, [r["job"]["json"] for r in succeeded])
+        failed += update_failed
+    to_delete = diff["delete"] + diff["duplicate"]
+    if to_delete and not failed:
+        orphans = {id(e) for e in diff["delete"]}
+        jobs = [
+            {
+                "label": f"Event {e['id']}",
+                "method": "DELETE",
+                "url": client.athlete_url(f"events/{e['id']}"),
+                # verwaiste plan_ids danach aus dem Upload-Status entfernen
+                "plan_id": (
+                    extract_plan_id_from_description(e.get("description"))
+                    if id(e) in orphans else None
+                ),
+            }
+            for e in to_delete
+        ]
+        succeeded, delete_failed = execute_requests(client, jobs, max_workers)
+        summary["deleted"] = len(succeeded)
+        if state:
+            state.forget(r["job"]["plan_id"] for r in succeeded if r["job"]["plan_id"])
+        failed += delete_failed
+    elif to_delete:
+        print("Löschen übersprungen, da Anlegen/Aktualisieren fehlgeschlagen ist.")
+
+    if state:
+        state.save()
+    report_failed_requests("Abgleich", failed)
+    summary["failed"] = len(failed)
+    print(
+        f"\n{'❌' if failed else '✅'} Fertig. Neu erstellt: {summary['created']}, "
+        f"aktualisiert: {summary['updated']}, gelöscht: {summary['deleted']}, "
+        f"unverändert: {summary['unchanged']}, fehlgeschlagen: {len(failed)}"
+    )
+    if failed:
+        raise SystemExit(1)
+    return summary
 
 
 def main():
@@ -438,11 +1292,237 @@ def main():
             "die eine PLAN-ID in der description haben."
         ),
     )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help=(
+            "Vollständiger Abgleich statt Upsert: zusätzlich verwaiste und "
+            "doppelte PLAN-Events ab heute löschen (minimale Requests)."
+        ),
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Nur den Abgleich (wie --reconcile) anzeigen, nichts senden.",
+    )
+    parser.add_argument(
+        "--generate",
+        nargs="?",
+        const="",
+        metavar="SPEC",
+        help=(
+            "Plan aus einer Block-Spezifikation erzeugen (Standard: paths.plan_spec) "
+            "und fortlaufend hochladen, statt Plan-Dateien zu lesen."
+        ),
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help=(
+            "Lokalen Upload-Status nicht vertrauen: vorhandene Events laden und "
+            "per PLAN-ID abgleichen (z.B. nach Löschen in Intervals.icu)."
+        ),
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help=f"Anzahl paralleler Update-/Lösch-Requests (Standard: {MAX_WORKERS}).",
+    )
+    parser.add_argument(
+        "--rebuild-manifest",
+        action="store_true",
+        help="Plan-Manifest ignorieren und alle Plan-Dateien neu einlesen.",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help=(
+            "Anzahl Prozesse zum Parsen der Plan-Dateien "
+            "(Standard: upload.parse_workers bzw. CPU-Kerne)."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help=(
+            "Requests und Phasen messen und am Ende als JSON-Report schreiben "
+            "(ohne PATH auf stderr)."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        nargs="?",
+        type=float,
+        const=WATCH_INTERVAL,
+        metavar="SEKUNDEN",
+        help=(
+            "Dauerbetrieb: Plan-Dateien regelmäßig prüfen und nur geänderte "
+            f"Workouts hochladen (Standard-Intervall: {WATCH_INTERVAL}s)."
+        ),
+    )
+    parser.add_argument(
+        "--all-athletes",
+        action="store_true",
+        help=(
+            "Für alle Athleten im Kader (config.athletes bzw. paths.roster) "
+            "parallel hochladen, jeweils mit eigenem plan_dir."
+        ),
+    )
+    parser.add_argument(
+        "--athletes",
+        help="Nur diese Athleten aus dem Kader (komma-getrennte Namen).",
+    )
+    parser.add_argument(
+        "--athlete-workers",
+        type=int,
+        default=ATHLETE_WORKERS,
+        help=f"Anzahl parallel bearbeiteter Athleten (Standard: {ATHLETE_WORKERS}).",
+    )
     args = parser.parse_args()
 
-    plan = load_all_workouts()
+    if args.watch is not None:
+        if args.watch <= 0:
+            parser.error("--watch braucht ein Intervall > 0 Sekunden.")
+        conflicts = [
+            flag for flag, used in (
+                ("--generate", args.generate is not None),
+                ("--wipe-plan-range", args.wipe_plan_range),
+                ("--reconcile", args.reconcile),
+                ("--dry-run", args.dry_run),
+            ) if used
+        ]
+        if conflicts:
+            parser.error(
+                f"--watch lädt nur geänderte Workouts hoch und ist nicht mit "
+                f"{', '.join(conflicts)} kombinierbar."
+            )
+    try:
+        if args.all_athletes or args.athletes:
+            if args.watch is not None:
+                print("--watch ist nur für einen einzelnen Athleten möglich.")
+                return
+            run_roster(args)
+        elif CLIENT is None:
+            print("Keine athlete_id in der Config – --all-athletes verwenden?")
+        elif args.watch is not None:
+            state = UploadState(UPLOAD_STATE, CLIENT.athlete_id) if UPLOAD_STATE else None
+            PlanWatcher(
+                CLIENT, max_workers=args.max_workers or MAX_WORKERS, state=state,
+            ).run(args.watch)
+        else:
+            run_upload(args)
+    finally:
+        if args.profile:
+            METRICS.write_report(
+                args.profile, script="upload_plan_to_intervals", args=vars(args))
+
+
+def run_roster(args):
+    athletes = select_athletes(load_roster(config), args.athletes)
+    print(f"Lade Pläne für {len(athletes)} Athleten hoch ...")
+
+    def task(athlete_cfg, client):
+        paths = athlete_cfg.get("paths", {})
+        return run_upload(
+            args,
+            client=client,
+            plan_dir=paths.get("plan_dir"),
+            plan_file=paths.get("plan_file"),
+            manifest_path=default_manifest_path(paths),
+            state_path=default_upload_state_path(paths),
+            plan_spec=paths.get("plan_spec"),
+            settings=upload_settings(athlete_cfg),
+        )
+
+    summaries = run_for_roster(athletes, task, max_workers=args.athlete_workers)
+    print_roster_summary(
+        summaries,
+        describe=lambda r: (
+            f"neu {r['created']}, aktualisiert {r['updated']}, "
+            + (f"gelöscht {r['deleted']}, " if "deleted" in r else "")
+            + f"unverändert {r['unchanged']}"
+        ),
+    )
+    if not all(s["ok"] for s in summaries):
+        raise SystemExit(1)
+
+
+def run_upload(
+    args,
+    client: IntervalsClient | None = None,
+    plan_dir: str | None = PLAN_DIR,
+    plan_file: str | None = PLAN_FILE,
+    manifest_path: str | None = PLAN_MANIFEST,
+    state_path: str | None = UPLOAD_STATE,
+    plan_spec: str | None = PLAN_SPEC,
+    settings: dict | None = None,
+) -> dict:
+    """
+    Ein kompletter Upload-Lauf für einen Athleten. settings: siehe
+    upload_settings() (Standard: globale Config); Kommandozeilen-Optionen
+    haben Vorrang.
+    """
+    client = client or CLIENT
+    settings = settings or upload_settings(config)
+    max_workers = args.max_workers or settings["max_workers"]
+    parse_workers = (
+        args.parse_workers if args.parse_workers is not None else settings["parse_workers"]
+    )
+    start_time = settings["start_time"]
+    failed_files: list[str] = []
+    state = UploadState(state_path, client.athlete_id) if state_path else None
+    if args.generate is not None:
+        spec_path = args.generate or plan_spec
+        if not spec_path:
+            raise SystemExit("Keine Plan-Spezifikation (--generate SPEC oder paths.plan_spec).")
+        workouts = iter_plan(load_plan_spec(spec_path), from_date=datetime.date.today())
+        full_check = args.rescan or (
+            state is not None and state.full_check_due(settings["full_check_days"]))
+        if not (args.reconcile or args.dry_run or args.wipe_plan_range or full_check):
+            return upsert_stream(
+                workouts,
+                max_workers=max_workers,
+                client=client,
+                state=state,
+                chunk_size=settings["chunk_size"],
+                start_time=start_time,
+            )
+        # Abgleich, Löschen und der volle Event-Abgleich brauchen den kompletten Datumsbereich
+        plan = list(workouts)
+    else:
+        if args.rebuild_manifest and manifest_path:
+            Path(manifest_path).unlink(missing_ok=True)
+        plan, failed_files = load_all_workouts(
+            parse_workers=parse_workers,
+            plan_dir=plan_dir,
+            plan_file=plan_file,
+            manifest_path=manifest_path,
+        )
     print(f"{len(plan)} Einheiten im Plan (ab heute).")
-    upsert_plan(plan, wipe_plan_range=args.wipe_plan_range)
+    if args.reconcile or args.dry_run:
+        return reconcile_plan(
+            plan,
+            max_workers=max_workers,
+            client=client,
+            dry_run=args.dry_run,
+            state=state,
+            start_time=start_time,
+            failed_files=failed_files,
+        )
+    return upsert_plan(
+        plan,
+        wipe_plan_range=args.wipe_plan_range,
+        max_workers=max_workers,
+        client=client,
+        state=state,
+        rescan=args.rescan,
+        start_time=start_time,
+        chunk_size=settings["chunk_size"],
+        failed_files=failed_files,
+        full_check_days=settings["full_check_days"],
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import datetime
+import json
+import os
+from pathlib import Path
+
+UPLOAD_STATE_VERSION = 1
+DEFAULT_UPLOAD_STATE_NAME = ".upload_state"
+
+
+class UploadState:
+    """
+    Merkt sich pro plan_id den Payload-Hash und das Datum des zuletzt
+    erfolgreich hochgeladenen Events (lokal, pro Athlet).
+
+    Damit erkennt upsert_plan() unveränderte Workouts ohne die Events aus
+    Intervals.icu zu laden. Gehört die Datei zu einem anderen Athleten oder
+    fehlt sie, ist `migrated` False und der Upload sucht einmalig über die
+    PLAN-ID in der description nach Events älterer Versionen. `checked` ist
+    das Datum des letzten vollständigen Abgleichs mit den Events (für die
+    periodische Prüfung auf in Intervals.icu gelöschte Events).
+    """
+
+    def __init__(self, path: str | Path, athlete_id: str):
+        self.path = Path(path)
+        self.athlete_id = athlete_id
+        self.entries: dict[str, dict] = {}
+        self.migrated = False
+        self.checked: str | None = None
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if (
+                    data.get("version") == UPLOAD_STATE_VERSION
+                    and data.get("athlete_id") == athlete_id
+                ):
+                    self.entries = data.get("events", {})
+                    self.migrated = bool(data.get("migrated"))
+                    self.checked = data.get("checked")
+            except (OSError, ValueError, AttributeError):
+                # kaputter Status → wie beim ersten Lauf neu aufbauen
+                self.entries = {}
+
+    def hash_of(self, plan_id: str) -> str | None:
+        entry = self.entries.get(plan_id)
+        return entry.get("hash") if entry else None
+
+    def record(self, plan_id: str, payload_hash: str, date: str):
+        self.entries[plan_id] = {"hash": payload_hash, "date": date}
+        self.dirty = True
+
+    def forget(self, plan_ids):
+        for plan_id in plan_ids:
+            if self.entries.pop(plan_id, None) is not None:
+                self.dirty = True
+
+    def forget_range(self, start_iso: str, end_iso: str):
+        """
+        Entfernt alle Einträge mit start_iso ≤ Datum ≤ end_iso
+        (z.B. nachdem die Events dort gelöscht wurden).
+        """
+        self.forget([
+            plan_id for plan_id, entry in self.entries.items()
+            if start_iso <= entry.get("date", "") <= end_iso
+        ])
+
+    def mark_migrated(self):
+        if not self.migrated:
+            self.migrated = True
+            self.dirty = True
+
+    def mark_checked(self, date_iso: str | None = None):
+        self.checked = date_iso or datetime.date.today().isoformat()
+        self.dirty = True
+
+    def full_check_due(self, days: int | None) -> bool:
+        """
+        True, wenn der letzte vollständige Abgleich mindestens days Tage
+        zurückliegt (days None/0: nie, nur per --rescan).
+        """
+        if not days:
+            return False
+        if not self.checked:
+            return True
+        try:
+            last = datetime.date.fromisoformat(self.checked)
+        except ValueError:
+            return True
+        return (datetime.date.today() - last).days >= days
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": UPLOAD_STATE_VERSION,
+                    "athlete_id": self.athlete_id,
+                    "migrated": self.migrated,
+                    "checked": self.checked,
+                    "events": self.entries,
+                },
+                f,
+                indent=1,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, self.path)
+        self.dirty = False
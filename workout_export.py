@@ -0,0 +1,362 @@
+"""
+Export geplanter Workouts als strukturierte Dateien für Geräte und
+Trainingssoftware:
+
+- .zwo (Zwift u.a.): XML, Leistung relativ zur FTP, Kadenz, Rampen,
+  Wiederholungen aus zwei Steps als IntervalsT
+- .erg: Leistung in Watt über die Zeit (braucht die FTP)
+- .mrc: Leistung in % FTP über die Zeit
+
+Grundlage sind die kompilierten Steps (workout_steps): Dauer, Zone
+(→ % FTP über ZONE_FTP_PCT), ramp und Kadenz. Eine Rampe läuft vom Ziel
+des vorherigen Steps (bzw. RAMP_START_PCT) zum Ziel ihrer Zone.
+
+export_workouts() verteilt die Workouts auf einen Prozess-Pool;
+unveränderte Workouts (gleicher Inhalt und gleiche Einstellungen laut
+Export-Manifest) werden übersprungen.
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from workout_steps import Repeat, compile_steps, iter_flat_steps
+
+EXPORT_VERSION = 1
+FORMATS = ("zwo", "erg", "mrc")
+EXPORT_MANIFEST_NAME = ".export_manifest"
+
+# Zielleistung pro Zone (Mitte der Coggan-Zonen) als Anteil der FTP
+ZONE_FTP_PCT = {
+    "Z1": 0.50,
+    "Z2": 0.65,
+    "Z3": 0.83,
+    "Z4": 0.98,
+    "SS": 0.90,
+    "Z5": 1.13,
+    "Z6": 1.35,
+    "Z7": 1.60,
+}
+RAMP_START_PCT = 0.40
+# Unterhalb dieser Anzahl Workouts lohnt sich der Start eines Prozess-Pools nicht
+PARALLEL_MIN_WORKOUTS = 32
+
+_PERCENT_ZONE = re.compile(r"^(\d+(?:\.\d+)?)%$")
+_UNSAFE_NAME = re.compile(r"[^\w.-]+")
+
+_ZWO_SPORT = {"Run": "run", "VirtualRun": "run"}
+
+
+def zone_to_pct(zone: str, zones: dict) -> float:
+    """
+    "SS" → 0.90 (über die Zonentabelle), "75%" → 0.75.
+    """
+    if zone in zones:
+        return float(zones[zone])
+    m = _PERCENT_ZONE.match(zone or "")
+    if m:
+        return float(m.group(1)) / 100.0
+    raise ValueError(f"Unbekannte Zone '{zone}' (bekannt: {', '.join(zones)} oder NN%)")
+
+
+def cadence_rpm(cadence: str) -> int | None:
+    """
+    "90rpm" → 90, "90-100rpm" → 95, "Free"/leer → None.
+    """
+    if not cadence or not cadence.lower().endswith("rpm"):
+        return None
+    values = [int(v) for v in cadence[:-3].split("-")]
+    return round(sum(values) / len(values))
+
+
+def power_segments(steps: tuple, zones: dict) -> list[tuple]:
+    """
+    Flache Liste (Sekunden, Start-%, End-%, Step) mit aufgelösten Wiederholungen.
+    """
+    segments = []
+    previous = RAMP_START_PCT
+    for step in iter_flat_steps(steps):
+        target = zone_to_pct(step.zone, zones)
+        start = previous if step.ramp else target
+        segments.append((step.seconds, start, target, step))
+        previous = target
+    return segments
+
+
+def _zwo_attrs(**attrs) -> str:
+    return " ".join(
+        f"{k}={quoteattr(str(v))}" for k, v in attrs.items() if v is not None)
+
+
+def _pct(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def render_zwo(workout: dict, steps: tuple, zones: dict) -> str:
+    lines = [
+        "<workout_file>",
+        "    <author>intervals.icu-training</author>",
+        f"    <name>{escape(workout.get('name', ''))}</name>",
+        f"    <description>{escape(workout.get('description') or '')}</description>",
+        f"    <sportType>{_ZWO_SPORT.get(workout.get('type') or workout.get('sport'), 'bike')}</sportType>",
+        "    <workout>",
+    ]
+    previous = RAMP_START_PCT
+    for item in steps:
+        on_off = (
+            isinstance(item, Repeat) and len(item.steps) == 2
+            and not any(s.ramp for s in item.steps)
+        )
+        if on_off:
+            on, off = item.steps
+            attrs = _zwo_attrs(
+                Repeat=item.count,
+                OnDuration=on.seconds,
+                OffDuration=off.seconds,
+                OnPower=_pct(zone_to_pct(on.zone, zones)),
+                OffPower=_pct(zone_to_pct(off.zone, zones)),
+                Cadence=cadence_rpm(on.cadence),
+                CadenceResting=cadence_rpm(off.cadence),
+            )
+            lines.append(f"        <IntervalsT {attrs}/>")
+            previous = zone_to_pct(off.zone, zones)
+            continue
+
+        for seconds, start, end, step in power_segments(
+                item.steps * item.count if isinstance(item, Repeat) else (item,), zones):
+            if step.ramp:
+                start = previous
+                tag = {"warmup": "Warmup", "cooldown": "Cooldown"}.get(step.intensity, "Ramp")
+                attrs = _zwo_attrs(
+                    Duration=seconds, PowerLow=_pct(start), PowerHigh=_pct(end),
+                    Cadence=cadence_rpm(step.cadence))
+            else:
+                tag = "SteadyState"
+                attrs = _zwo_attrs(
+                    Duration=seconds, Power=_pct(end), Cadence=cadence_rpm(step.cadence))
+            lines.append(f"        <{tag} {attrs}/>")
+            previous = end
+    lines += ["    </workout>", "</workout_file>", ""]
+    return "\n".join(lines)
+
+
+def _render_course(workout: dict, steps: tuple, zones: dict, ftp: float | None) -> str:
+    """
+    Gemeinsamer Aufbau von .erg (Watt, ftp gesetzt) und .mrc (% FTP).
+    """
+    header = [
+        "[COURSE HEADER]",
+        "VERSION = 2",
+        "UNITS = ENGLISH",
+        f"DESCRIPTION = {workout.get('name', '')}",
+        f"FILE NAME = {workout.get('plan_id', '')}",
+    ]
+    if ftp:
+        header += [f"FTP = {round(ftp)}", "MINUTES WATTS"]
+    else:
+        header.append("MINUTES PERCENT")
+    lines = header + ["[END COURSE HEADER]", "[COURSE DATA]"]
+
+    def value(pct: float) -> str:
+        return str(round(pct * ftp)) if ftp else _pct(pct * 100.0)
+
+    t = 0
+    for seconds, start, end, _step in power_segments(steps, zones):
+        lines.append(f"{t / 60:.2f}\t{value(start)}")
+        t += seconds
+        lines.append(f"{t / 60:.2f}\t{value(end)}")
+    lines += ["[END COURSE DATA]", ""]
+    return "\n".join(lines)
+
+
+def render_erg(workout: dict, steps: tuple, zones: dict, ftp: float) -> str:
+    return _render_course(workout, steps, zones, ftp)
+
+
+def render_mrc(workout: dict, steps: tuple, zones: dict) -> str:
+    return _render_course(workout, steps, zones, None)
+
+
+def safe_name(plan_id: str) -> str:
+    return _UNSAFE_NAME.sub("_", plan_id).strip("_") or "workout"
+
+
+def export_key(workout: dict, formats, zones: dict, ftp: float | None) -> str:
+    """
+    Hash über Workout und Export-Einstellungen; gleicher Key → Dateien aktuell.
+    """
+    canonical = json.dumps(
+        {
+            "version": EXPORT_VERSION,
+            "workout": workout,
+            "formats": list(formats),
+            "zones": zones,
+            "ftp": ftp,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def export_workout(
+    workout: dict,
+    out_dir: str,
+    formats,
+    zones: dict,
+    ftp: float | None,
+) -> dict:
+    """
+    Schreibt ein Workout in alle Formate (läuft ggf. in einem Worker-Prozess,
+    daher nur picklebare Argumente und Rückgaben, keine Ausgaben).
+    Rückgabe: {"plan_id", "files"} oder {"plan_id", "error"}; Workouts ohne
+    Steps (Kraft, Ruhetag, Freitext) liefern keine Dateien und "no_steps".
+    """
+    plan_id = workout.get("plan_id", "")
+    result = {"plan_id": plan_id}
+    try:
+        steps = compile_steps(workout.get("steps"))
+        if not steps:
+            result.update(files=[], no_steps=True)
+            return result
+        name = safe_name(plan_id)
+        files = []
+        for fmt in formats:
+            if fmt == "zwo":
+                text = render_zwo(workout, steps, zones)
+            elif fmt == "erg":
+                text = render_erg(workout, steps, zones, ftp)
+            elif fmt == "mrc":
+                text = render_mrc(workout, steps, zones)
+            else:
+                raise ValueError(f"Unbekanntes Format: {fmt}")
+            path = Path(out_dir) / fmt / f"{name}.{fmt}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+            files.append(str(path.relative_to(out_dir)))
+        result["files"] = files
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _export_workout_args(args):
+    return export_workout(*args)
+
+
+def load_export_manifest(out_dir: str) -> dict:
+    path = Path(out_dir) / EXPORT_MANIFEST_NAME
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == EXPORT_VERSION:
+            return data.get("workouts", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def save_export_manifest(out_dir: str, entries: dict):
+    path = Path(out_dir) / EXPORT_MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(
+            {"version": EXPORT_VERSION, "workouts": entries},
+            f,
+            indent=1,
+            ensure_ascii=False,
+        )
+    os.replace(tmp, path)
+
+
+def export_workouts(
+    workouts: list[dict],
+    out_dir: str,
+    formats=FORMATS,
+    zones: dict | None = None,
+    ftp: float | None = None,
+    max_workers: int | None = None,
+    from_date: str | None = None,
+    remove_missing: bool = True,
+) -> dict:
+    """
+    Exportiert alle Workouts inkrementell nach out_dir/<format>/<plan_id>.<format>.
+
+    Workouts, deren Key (Inhalt + Einstellungen) im Manifest steht und deren
+    Dateien existieren, werden übersprungen; die übrigen laufen bei größeren
+    Mengen parallel über einen Prozess-Pool. Dateien von Workouts ab
+    from_date, die es im Plan nicht mehr gibt, werden gelöscht – außer mit
+    remove_missing=False (z.B. wenn Plan-Dateien nicht gelesen werden konnten).
+    Workouts ohne Steps werden übersprungen und als "no_steps" gezählt.
+    Rückgabe: {"exported", "skipped", "no_steps", "removed",
+    "failed": [(plan_id, Fehler)]}.
+    """
+    zones = zones or ZONE_FTP_PCT
+    formats = tuple(formats)
+    if "erg" in formats and not ftp:
+        raise ValueError("Für .erg wird die FTP gebraucht (export.ftp).")
+
+    entries = load_export_manifest(out_dir)
+    summary = {"exported": 0, "skipped": 0, "no_steps": 0, "removed": 0, "failed": []}
+    tasks = []
+    keys = {}
+    seen = set()
+    for workout in workouts:
+        plan_id = workout.get("plan_id")
+        if not plan_id:
+            continue
+        seen.add(plan_id)
+        key = export_key(workout, formats, zones, ftp)
+        entry = entries.get(plan_id)
+        if entry and entry.get("key") == key and all(
+                (Path(out_dir) / f).exists() for f in entry.get("files", [])):
+            summary["no_steps" if entry.get("no_steps") else "skipped"] += 1
+            continue
+        keys[plan_id] = (key, workout.get("date"))
+        tasks.append((workout, out_dir, formats, zones, ftp))
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) < PARALLEL_MIN_WORKOUTS:
+        results = [export_workout(*t) for t in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_export_workout_args, tasks, chunksize=chunksize))
+
+    for result in results:
+        plan_id = result["plan_id"]
+        if "error" in result:
+            summary["failed"].append((plan_id, result["error"]))
+            entries.pop(plan_id, None)
+            continue
+        key, date = keys[plan_id]
+        old_files = set(entries.get(plan_id, {}).get("files", []))
+        for stale in old_files - set(result["files"]):
+            (Path(out_dir) / stale).unlink(missing_ok=True)
+        entries[plan_id] = {"key": key, "date": date, "files": result["files"]}
+        if result.get("no_steps"):
+            entries[plan_id]["no_steps"] = True
+            summary["no_steps"] += 1
+        else:
+            summary["exported"] += 1
+
+    # Workouts, die aus dem Plan verschwunden sind
+    for plan_id in list(entries) if remove_missing else []:
+        entry = entries[plan_id]
+        if plan_id in seen or (from_date and (entry.get("date") or "") < from_date):
+            continue
+        for f in entry.get("files", []):
+            (Path(out_dir) / f).unlink(missing_ok=True)
+        del entries[plan_id]
+        summary["removed"] += 1
+
+    save_export_manifest(out_dir, entries)
+    return summary
@@ -0,0 +1,247 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Größe der Memo-Caches (einzelne Steps bzw. komplette Step-Folgen)
+STEP_CACHE_SIZE = 4096
+SEQUENCE_CACHE_SIZE = 4096
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*([hms])")
+_DURATION_FULL = re.compile(r"(?:\s*\d+(?:\.\d+)?\s*[hms])+\s*")
+_REPEAT = re.compile(r"^\s*(\d+)\s*x\s*\[(.*)\]\s*$", re.DOTALL)
+_CADENCE = re.compile(r"^\d+(?:-\d+)?rpm$", re.IGNORECASE)
+
+_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+
+
+class Step(NamedTuple):
+    """
+    Ein einzelner Abschnitt, z.B. "8m SS 90rpm intensity=active".
+    NamedTuple: kompakt (ohne __dict__), unveränderlich und hashbar –
+    damit als Cache-Key für ganze Step-Folgen nutzbar.
+    """
+
+    duration: str
+    seconds: int
+    zone: str = ""
+    cadence: str = ""
+    intensity: str = ""
+    ramp: bool = False
+
+
+class Repeat(NamedTuple):
+    """
+    Wiederholungsblock, z.B. 3x [8m SS, 5m Z1].
+    """
+
+    count: int
+    steps: tuple
+
+
+def parse_duration(duration: str) -> int:
+    """
+    Konvertiert Dauer-Strings wie '10m', '30s', '1h30m', '1m30s' in Sekunden.
+    Ohne Einheit werden Sekunden angenommen ('45' → 45).
+    """
+    if not duration:
+        return 0
+    duration = duration.strip()
+
+    if _DURATION_FULL.fullmatch(duration):
+        total = 0.0
+        for value, unit in _DURATION_PART.findall(duration):
+            total += float(value) * _UNIT_SECONDS[unit]
+        return int(total)
+    return int(float(duration))
+
+
+@lru_cache(maxsize=STEP_CACHE_SIZE)
+def _make_step(duration, zone, cadence, intensity, ramp) -> Step | None:
+    duration = (duration or "").strip()
+    if not duration:
+        return None
+    return Step(
+        duration=duration,
+        seconds=parse_duration(duration),
+        zone=(zone or "").strip(),
+        cadence=(cadence or "").strip(),
+        intensity=(intensity or "").strip(),
+        ramp=bool(ramp),
+    )
+
+
+@lru_cache(maxsize=STEP_CACHE_SIZE)
+def parse_step_text(text: str) -> Step | None:
+    """
+    Parst die Kurzform eines Steps, identisch zur gerenderten Zeile:
+    "15m ramp Z1 Free intensity=warmup" (führendes "- " ist erlaubt).
+    """
+    tokens = text.strip().lstrip("-").split()
+    if not tokens:
+        return None
+    zone = cadence = intensity = ""
+    ramp = False
+    for tok in tokens[1:]:
+        if tok == "ramp":
+            ramp = True
+        elif tok.startswith("intensity="):
+            intensity = tok[len("intensity="):]
+        elif tok == "Free" or _CADENCE.match(tok):
+            cadence = tok
+        elif not zone:
+            zone = tok
+        else:
+            raise ValueError(f"Unbekanntes Token '{tok}' in Step '{text}'")
+    return _make_step(tokens[0], zone, cadence, intensity, ramp)
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts = []
+    depth = 0
+    current = []
+    for ch in text:
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return [p for p in parts if p.strip()]
+
+
+def _compile_item(item, allow_repeat: bool = True):
+    if isinstance(item, str):
+        m = _REPEAT.match(item)
+        if m:
+            if not allow_repeat:
+                raise ValueError(f"Verschachtelte Wiederholung nicht erlaubt: {item}")
+            inner = tuple(
+                s for s in (
+                    _compile_item(p, allow_repeat=False)
+                    for p in _split_top_level(m.group(2))
+                ) if s is not None
+            )
+            return Repeat(int(m.group(1)), inner)
+        return parse_step_text(item)
+
+    if isinstance(item, dict):
+        if "repeat" in item:
+            if not allow_repeat:
+                raise ValueError("Verschachtelte Wiederholung nicht erlaubt")
+            inner = tuple(
+                s for s in (
+                    _compile_item(x, allow_repeat=False)
+                    for x in item.get("steps") or []
+                ) if s is not None
+            )
+            return Repeat(int(item["repeat"]), inner)
+        return _make_step(
+            item.get("duration"),
+            item.get("zone"),
+            item.get("cadence"),
+            item.get("intensity"),
+            bool(item.get("ramp", False)),
+        )
+
+    raise ValueError(f"Unbekanntes Step-Format: {item!r}")
+
+
+def compile_steps(raw_steps) -> tuple:
+    """
+    Wandelt die Steps aus dem Plan-JSON in ein Tupel aus Step/Repeat um.
+
+    Erlaubt sind pro Eintrag:
+    - Dict wie bisher: {"duration": "8m", "zone": "SS", "cadence": "90rpm", ...}
+    - Dict mit Wiederholung: {"repeat": 3, "steps": [ ... ]}
+    - Kurzform als String: "8m SS 90rpm intensity=active"
+    - Wiederholung als String: "3x [8m SS 90rpm, 5m Z1 Free]"
+
+    Steps ohne Dauer werden (wie bisher) ignoriert.
+    """
+    return tuple(
+        s for s in (_compile_item(item) for item in raw_steps or []) if s is not None
+    )
+
+
+def render_step(step: Step) -> str:
+    # Basis: "- 3m Z5"
+    line = f"- {step.duration}"
+    # ramp direkt nach der Zeit
+    if step.ramp:
+        line += " ramp"
+    # Zone anhängen (Z1, Z2, SS, Z5 ...)
+    if step.zone:
+        line += f" {step.zone}"
+    # Kadenz ohne Klammern, auch Bereiche wie "90-100rpm"
+    if step.cadence:
+        line += f" {step.cadence}"
+    # intensity als "intensity=..."
+    if step.intensity:
+        line += f" intensity={step.intensity}"
+    return line
+
+
+@lru_cache(maxsize=SEQUENCE_CACHE_SIZE)
+def render_steps(steps: tuple) -> str:
+    """
+    Rendert eine kompilierte Step-Folge als Intervals.icu-Workout-Text.
+    Wiederholungen werden als "3x"-Block mit Leerzeilen davor/danach
+    ausgegeben (statt jeden Step auszuschreiben).
+    Ergebnis wird pro eindeutiger Step-Folge gecacht.
+    """
+    lines: list[str] = []
+    for item in steps:
+        if isinstance(item, Repeat):
+            if lines and lines[-1] != "":
+                lines.append("")
+            lines.append(f"{item.count}x")
+            lines.extend(render_step(s) for s in item.steps)
+            lines.append("")
+        else:
+            lines.append(render_step(item))
+    return "\n".join(lines).strip("\n")
+
+
+@lru_cache(maxsize=SEQUENCE_CACHE_SIZE)
+def total_seconds(steps: tuple) -> int:
+    """
+    Gesamtdauer einer kompilierten Step-Folge in Sekunden (inkl. Wiederholungen).
+    """
+    total = 0
+    for item in steps:
+        if isinstance(item, Repeat):
+            total += item.count * sum(s.seconds for s in item.steps)
+        else:
+            total += item.seconds
+    return total
+
+
+def planned_seconds(workout: dict, steps: tuple | None = None) -> int | None:
+    """
+    Geplante Dauer eines Workouts: Summe der Step-Dauern, ohne Steps
+    moving_time bzw. duration_minutes aus dem Plan (sonst None).
+    `steps` sind die bereits kompilierten Steps, falls vorhanden.
+    """
+    if workout.get("steps"):
+        return total_seconds(steps if steps is not None else compile_steps(workout["steps"]))
+    if workout.get("moving_time") is not None:
+        return int(workout["moving_time"])
+    if workout.get("duration_minutes") is not None:
+        return int(round(workout["duration_minutes"] * 60))
+    return None
+
+
+def iter_flat_steps(steps: tuple):
+    """
+    Liefert alle Steps mit aufgelösten Wiederholungen.
+    """
+    for item in steps:
+        if isinstance(item, Repeat):
+            for _ in range(item.count):
+                yield from item.steps
+        else:
+            yield item